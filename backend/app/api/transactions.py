@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from datetime import date, datetime
 from decimal import Decimal
 
-from app.api.v1.deps import get_current_user, get_db
+from app.api.v1.deps import get_current_user, get_db, Principal
 from app.db import models
 
 router = APIRouter()
@@ -30,7 +30,7 @@ def list_transactions(
     type: Optional[str] = Query(None, description="income or expense"),
     page: int = Query(1, ge=1),
     per_page: int = Query(25, ge=1, le=200),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
@@ -63,7 +63,7 @@ def list_transactions(
     }
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-def create_transaction(payload: Dict = None, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def create_transaction(payload: Dict = None, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
     # simple, expect JSON like {"type":"expense","amount":250.5,"currency":"INR","date":"2025-10-06","description":"...","category_id":1}
     if not payload:
         raise HTTPException(status_code=400, detail="Missing payload")
@@ -88,7 +88,7 @@ def create_transaction(payload: Dict = None, current_user: models.User = Depends
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{txn_id}")
-def update_transaction(txn_id: int, payload: Dict = None, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def update_transaction(txn_id: int, payload: Dict = None, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
     txn = db.query(models.Transaction).filter(models.Transaction.id == txn_id, models.Transaction.user_id == current_user.id).first()
     if not txn:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -113,7 +113,7 @@ def update_transaction(txn_id: int, payload: Dict = None, current_user: models.U
     return txn_to_dict(txn)
 
 @router.delete("/{txn_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_transaction(txn_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_transaction(txn_id: int, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
     txn = db.query(models.Transaction).filter(models.Transaction.id == txn_id, models.Transaction.user_id == current_user.id).first()
     if not txn:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -1,46 +1,297 @@
 # app/api/v1/analytics.py
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
 from datetime import date
 
-from app.api.v1.deps import get_current_user, get_db
+from app.api.v1.deps import get_current_user, get_db_dep, get_read_db, Principal
+from app.api.v1.etag import data_version, etag_guard, fx_etag_guard
+from app.core.json_response import fast_response
 from app.db import models
+from app.schemas.analytics import CategoryTotal, DateTotal, BalanceSeries, DashboardSummary, RecurringSeriesOut
+from app.services import balances, columnar, fx, recurring, rollups, summary, time_buckets
+from app.services.cache import analytics_cache
 from sqlalchemy import func
 
 router = APIRouter()
 
-@router.get("/by_category", response_model=List[Dict[str,Any]])
+REPORTING_CURRENCY_QUERY = Query(None, description="convert amounts to this currency (default: REPORTING_CURRENCY setting)")
+
+def _reporting(db: Session, reporting_currency: Optional[str]) -> Dict[str, str]:
+    """Currency + FX table version, part of every converted result's cache key."""
+    return {"currency": fx.reporting_currency(reporting_currency), "fx": fx.rates.refresh(db).version}
+
+@router.get("/by_category", response_model=List[CategoryTotal], dependencies=[Depends(fx_etag_guard)])
 def expenses_by_category(
+    response: Response,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    reporting_currency: Optional[str] = REPORTING_CURRENCY_QUERY,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    version: int = Depends(data_version),
 ):
-    q = db.query(models.Category.name.label("category"), func.sum(models.Transaction.amount).label("total")) \
-        .join(models.Transaction, models.Transaction.category_id == models.Category.id) \
-        .filter(models.Category.user_id == current_user.id, models.Transaction.type == models.TransactionType.expense)
-    if start_date:
-        q = q.filter(models.Transaction.date >= start_date)
-    if end_date:
-        q = q.filter(models.Transaction.date <= end_date)
-    q = q.group_by(models.Category.name).order_by(func.sum(models.Transaction.amount).desc())
-    rows = q.all()
-    return [{"category": r.category, "total": float(r.total or 0)} for r in rows]
+    fx_params = _reporting(db, reporting_currency)
+
+    def compute():
+        # read pre-aggregated buckets (app/services/rollups.py), not raw transactions;
+        # other currencies are converted in the query at each day's rate
+        convert = fx.needs_conversion(db, current_user.id, fx_params["currency"])
+        R = models.DailyRollup if convert else rollups.pick_rollup(start_date, end_date)
+        amount = fx.converted(R.total, R.currency, R.day, fx_params["currency"]) if convert else R.total
+        total = func.sum(amount)
+        q = db.query(models.Category.name.label("category"), total.label("total")) \
+            .join(R, R.category_id == models.Category.id) \
+            .filter(models.Category.user_id == current_user.id, R.user_id == current_user.id, R.type == models.TransactionType.expense)
+        q = rollups.filter_range(q, R, start_date, end_date)
+        q = q.group_by(models.Category.name).having(func.sum(R.txn_count) > 0).order_by(total.desc())
+        return [{"category": r.category, "total": float(r.total or 0)} for r in q.all()]
 
-@router.get("/by_date", response_model=List[Dict[str,Any]])
+    params = {"start_date": start_date, "end_date": end_date, **fx_params}
+    try:
+        result = analytics_cache.get_or_compute(current_user.id, version, "by_category", params, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_response(result, response)
+
+@router.get("/by_date", response_model=List[DateTotal], dependencies=[Depends(fx_etag_guard)])
 def expenses_by_date(
+    response: Response,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    granularity: Optional[str] = Query(None, description="day (default), week, month, quarter or year"),
+    reporting_currency: Optional[str] = REPORTING_CURRENCY_QUERY,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    version: int = Depends(data_version),
+):
+    """
+    Income, expense and net per bucket (bucket start in "date"). Zero-filled
+    when a date bound or a granularity is given; without any, only the days
+    with transactions are listed, as before. "total" is the expense sum,
+    kept for existing clients.
+    """
+    zero_fill = start_date is not None or end_date is not None or granularity is not None
+    granularity = granularity or "day"
+    if granularity not in time_buckets.GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be one of: " + ", ".join(time_buckets.GRANULARITIES))
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    fx_params = _reporting(db, reporting_currency)
+    def compute():
+        series = rollups.bucket_series(db, current_user.id, start_date, end_date, granularity, fx_params["currency"],
+                                       zero_fill=zero_fill)
+        for point in series:
+            point["total"] = point["expense"]
+        return series
+
+    params = {"start_date": start_date, "end_date": end_date, "granularity": granularity, "zero_fill": zero_fill, **fx_params}
+    try:
+        series = analytics_cache.get_or_compute(current_user.id, version, "by_date", params, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_response(series, response)
+
+@router.get("/balance", response_model=BalanceSeries, dependencies=[Depends(fx_etag_guard)])
+def running_balance(
+    response: Response,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    granularity: str = Query("month", description="day, week, month, quarter or year"),
+    reporting_currency: Optional[str] = REPORTING_CURRENCY_QUERY,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    version: int = Depends(data_version),
+):
+    """
+    Running balance and cumulative income/expense per bucket. Only the
+    requested window is returned; "opening_balance" accounts for everything
+    before start_date.
+    """
+    if granularity not in time_buckets.GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be one of: " + ", ".join(time_buckets.GRANULARITIES))
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    fx_params = _reporting(db, reporting_currency)
+    params = {"start_date": start_date, "end_date": end_date, "granularity": granularity, **fx_params}
+    try:
+        result = analytics_cache.get_or_compute(
+            current_user.id, version, "balance", params,
+            lambda: {**balances.balance_series(db, current_user.id, start_date, end_date, granularity, fx_params["currency"]),
+                     "currency": fx_params["currency"]},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_response(result, response)
+
+@router.get("/summary", response_model=DashboardSummary, dependencies=[Depends(fx_etag_guard)])
+def dashboard_summary(
+    response: Response,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    granularity: str = Query("month", description="day, week, month, quarter or year"),
+    top: int = Query(5, ge=1, le=50, description="number of top merchants"),
+    reporting_currency: Optional[str] = REPORTING_CURRENCY_QUERY,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    version: int = Depends(data_version),
+):
+    """
+    Everything the dashboard needs in one request: totals, expenses per
+    category, income/expense per period and top merchants, from a single
+    grouped pass over the transactions in range.
+    """
+    if granularity not in time_buckets.GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be one of: " + ", ".join(time_buckets.GRANULARITIES))
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    fx_params = _reporting(db, reporting_currency)
+    params = {"start_date": start_date, "end_date": end_date, "granularity": granularity, "top": top, **fx_params}
+    try:
+        result = analytics_cache.get_or_compute(
+            current_user.id, version, "summary", params,
+            lambda: summary.dashboard_summary(db, current_user.id, start_date, end_date, granularity, top, fx_params["currency"]),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return fast_response(result, response)
+
+# --- vectorized statistics over the per-user NumPy frame (app/services/columnar.py) ---
+
+def _stats_frame(db: Session, user_id: int):
+    if not columnar.NUMPY_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Statistics need NumPy on the server (pip install numpy)")
+    return columnar.frames.get(db, user_id)
+
+def _stats_type(type: str) -> Optional[str]:
+    if type not in ("income", "expense", "all"):
+        raise HTTPException(status_code=400, detail="type must be income, expense or all")
+    return None if type == "all" else type
+
+def _category_names(db: Session, user_id: int) -> Dict[int, str]:
+    rows = db.query(models.Category.id, models.Category.name).filter(models.Category.user_id == user_id).all()
+    return {cid: name for cid, name in rows}
+
+@router.get("/stats/percentiles", dependencies=[Depends(etag_guard)])
+def amount_percentiles(
+    response: Response,
+    q: str = Query("50,90,95,99", description="comma separated percentiles, 0-100"),
+    type: str = Query("expense", description="income, expense or all"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    try:
+        qs = [float(x) for x in q.split(",") if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="q must be comma separated numbers")
+    if not qs or any(x < 0 or x > 100 for x in qs):
+        raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    frame = _stats_frame(db, current_user.id)
+    return fast_response(columnar.percentiles(frame, qs, _stats_type(type), start_date, end_date), response)
+
+@router.get("/stats/moving_average", dependencies=[Depends(etag_guard)])
+def daily_moving_average(
+    response: Response,
+    window: int = Query(7, ge=1, le=365, description="trailing window in days"),
+    type: str = Query("expense", description="income, expense or all"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    frame = _stats_frame(db, current_user.id)
+    return fast_response(columnar.moving_average(frame, window, _stats_type(type), start_date, end_date), response)
+
+@router.get("/stats/outliers", dependencies=[Depends(etag_guard)])
+def amount_outliers(
+    response: Response,
+    threshold: float = Query(3.0, gt=0, description="minimum |z-score| within the category"),
+    limit: int = Query(50, ge=1, le=500),
+    type: str = Query("expense", description="income, expense or all"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    frame = _stats_frame(db, current_user.id)
+    rows = columnar.zscore_outliers(frame, threshold, _stats_type(type), start_date, end_date, limit)
+    names = _category_names(db, current_user.id)
+    for r in rows:
+        r["category"] = names.get(r["category_id"])
+    return fast_response(rows, response)
+
+@router.get("/stats/category_share", dependencies=[Depends(etag_guard)])
+def category_share(
+    response: Response,
+    granularity: str = Query("month", description="day, week, month, quarter or year"),
+    type: str = Query("expense", description="income, expense or all"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    if granularity not in time_buckets.GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be one of: " + ", ".join(time_buckets.GRANULARITIES))
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    frame = _stats_frame(db, current_user.id)
+    buckets = columnar.category_share(frame, granularity, _stats_type(type), start_date, end_date)
+    names = _category_names(db, current_user.id)
+    for b in buckets:
+        for c in b["categories"]:
+            c["category"] = names.get(c["category_id"]) or "Uncategorized"
+    return fast_response(buckets, response)
+
+# --- recurring transactions / subscriptions (cached in recurring_series by app/services/recurring.py) ---
+
+def _series_to_dict(s: models.RecurringSeries) -> Dict[str, Any]:
+    return {
+        "id": s.id, "merchant": s.label, "merchant_key": s.merchant_key,
+        "type": s.type.value if hasattr(s.type, "value") else s.type, "currency": s.currency,
+        "category_id": s.category_id, "cadence": s.cadence, "interval_days": s.interval_days,
+        "amount": float(s.amount), "occurrences": s.occurrences, "first_date": s.first_date,
+        "last_date": s.last_date, "next_date": s.next_date, "confidence": float(s.confidence),
+    }
+
+@router.get("/recurring", response_model=List[RecurringSeriesOut])
+def recurring_series(
+    type: str = Query("expense", description="income, expense or all"),
+    min_confidence: float = Query(0.0, ge=0, le=1),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Detected series as of the last batch run (detect_recurring.py) or POST /recurring/refresh."""
+    q = db.query(models.RecurringSeries).filter(models.RecurringSeries.user_id == current_user.id)
+    t = _stats_type(type)
+    if t:
+        q = q.filter(models.RecurringSeries.type == t)
+    if min_confidence:
+        q = q.filter(models.RecurringSeries.confidence >= min_confidence)
+    items = q.order_by(models.RecurringSeries.next_date, models.RecurringSeries.id).all()
+    return fast_response([_series_to_dict(s) for s in items])
+
+@router.post("/recurring/refresh", response_model=List[RecurringSeriesOut])
+def refresh_recurring_series(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db_dep),
 ):
-    q = db.query(models.Transaction.date.label("date"), func.sum(models.Transaction.amount).label("total")) \
-        .filter(models.Transaction.user_id == current_user.id, models.Transaction.type == models.TransactionType.expense)
-    if start_date:
-        q = q.filter(models.Transaction.date >= start_date)
-    if end_date:
-        q = q.filter(models.Transaction.date <= end_date)
-    q = q.group_by(models.Transaction.date).order_by(models.Transaction.date)
-    rows = q.all()
-    return [{"date": r.date.isoformat(), "total": float(r.total or 0)} for r in rows]
+    if not recurring.NUMPY_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Recurring detection needs NumPy on the server (pip install numpy)")
+    recurring.run(db, [current_user.id])
+    items = (
+        db.query(models.RecurringSeries)
+        .filter(models.RecurringSeries.user_id == current_user.id)
+        .order_by(models.RecurringSeries.next_date, models.RecurringSeries.id)
+        .all()
+    )
+    return fast_response([_series_to_dict(s) for s in items])
@@ -0,0 +1,121 @@
+# app/api/v1/async_routes.py
+"""
+Async twins of the sync routers, served when DB_ASYNC=true (app/main.py).
+
+`asyncify(router)` returns a router with the same paths, models and status
+codes whose endpoints are coroutines: the request session is an AsyncSession
+(get_async_db), authentication and the ETag check await it directly, and the
+unchanged sync handler body runs through AsyncSession.run_sync. Its queries
+then wait on the event loop instead of pinning one of the ~40 threadpool
+threads each, which is what caps sync throughput once many requests sit on
+DB latency at the same time.
+
+Handler code must therefore not block on anything other than the DB: locks
+held across queries and cross-request waits go through
+app/core/concurrency.py. Routes that take file uploads, or are marked with
+@file_io because they read or delete stored files, stay sync -- reading,
+writing and parsing files (or talking to an object store) belongs in the
+threadpool, not on the loop.
+
+Usage:
+    app.include_router(asyncify(transactions.router), prefix="/api/v1/transactions")
+"""
+import functools
+import inspect
+from typing import Callable
+
+from fastapi import APIRouter, Depends, UploadFile, params
+from fastapi.routing import APIRoute
+
+from app.api.v1.deps import get_current_user, get_current_user_async, get_db_dep, get_read_db
+from app.api.v1.etag import (
+    data_version, data_version_async, etag_guard, etag_guard_async, fx_etag_guard, fx_etag_guard_async,
+)
+from app.db.session import get_async_db, get_db
+
+_SESSION_DEPENDENCIES = (get_db, get_db_dep, get_read_db)
+
+_ASYNC_DEPENDENCIES = {
+    get_db: get_async_db,
+    get_db_dep: get_async_db,
+    get_read_db: get_async_db,  # no async replicas: reads go to the primary
+    get_current_user: get_current_user_async,
+    etag_guard: etag_guard_async,
+    fx_etag_guard: fx_etag_guard_async,
+    data_version: data_version_async,
+}
+
+
+def _swap(dep: params.Depends) -> params.Depends:
+    target = _ASYNC_DEPENDENCIES.get(dep.dependency)
+    return Depends(target, use_cache=dep.use_cache) if target is not None else dep
+
+
+def file_io(endpoint: Callable) -> Callable:
+    """Keep this route sync under asyncify: it does blocking storage I/O besides DB work."""
+    endpoint._file_io = True
+    return endpoint
+
+
+def _takes_upload(endpoint: Callable) -> bool:
+    if getattr(endpoint, "_file_io", False):
+        return True
+    return any(
+        isinstance(p.default, params.File) or p.annotation is UploadFile
+        for p in inspect.signature(endpoint).parameters.values()
+    )
+
+
+def _async_endpoint(endpoint: Callable) -> Callable:
+    sig = inspect.signature(endpoint)
+    session_args = [
+        name for name, p in sig.parameters.items()
+        if isinstance(p.default, params.Depends) and p.default.dependency in _SESSION_DEPENDENCIES
+    ]
+    if len(session_args) != 1:
+        raise ValueError(f"{endpoint.__name__}: expected exactly one DB session dependency")
+    session_arg = session_args[0]
+
+    @functools.wraps(endpoint)
+    async def run(**kwargs):
+        def call(sync_db):
+            kwargs[session_arg] = sync_db
+            return endpoint(**kwargs)
+        return await kwargs[session_arg].run_sync(call)
+
+    run.__signature__ = sig.replace(parameters=[
+        p.replace(default=_swap(p.default)) if isinstance(p.default, params.Depends) else p
+        for p in sig.parameters.values()
+    ])
+    return run
+
+
+def asyncify(router: APIRouter) -> APIRouter:
+    """A copy of `router` whose DB routes are async (see module docstring)."""
+    out = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute) or _takes_upload(route.endpoint):
+            out.routes.append(route)
+            continue
+        out.add_api_route(
+            route.path,
+            _async_endpoint(route.endpoint),
+            methods=route.methods,
+            name=route.name,
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=[_swap(d) for d in route.dependencies],
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            deprecated=route.deprecated,
+            operation_id=route.operation_id,
+            include_in_schema=route.include_in_schema,
+            response_class=route.response_class,
+        )
+    return out
+
+
+__all__ = ["asyncify", "file_io"]
@@ -1,34 +1,74 @@
 # app/api/v1/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.db import models
 from app.db.session import get_db
 from app.schemas.auth import UserCreate, Token
-from app.services.security import create_access_token, hash_password, verify_password
+from app.services.data_version import create_data_version
+from app.services.security import (
+    HashingBusy, create_access_token, hash_password_async, verify_and_update_async,
+)
 
 router = APIRouter()
 
-@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-def register(payload: UserCreate, db: Session = Depends(get_db)):
-    # check exists by email
-    existing = db.query(models.User).filter(models.User.email == payload.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
+# register/login are async so PBKDF2 waits on the hashing executor without holding a
+# threadpool thread; the (short) DB calls still go through run_in_threadpool.
+
+def _busy() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many sign-in attempts, retry shortly", headers={"Retry-After": "1"})
+
+def _credentials_by_email(db: Session, email: str):
+    """(id, hashed_password) or None. Closes the session so no pooled connection is held while hashing."""
+    try:
+        return db.query(models.User.id, models.User.hashed_password).filter(models.User.email == email).first()
+    finally:
+        db.close()
+
+def _create_user(db: Session, payload: UserCreate, hashed: str) -> models.User:
     user = models.User(
         email=payload.email,
         username=payload.username,
-        hashed_password=hash_password(payload.password)
+        hashed_password=hashed
     )
     db.add(user)
+    db.flush()
+    create_data_version(db, user.id)
     db.commit()
     db.refresh(user)
+    return user
+
+def _store_rehash(db: Session, user_id: int, new_hash: str) -> None:
+    db.query(models.User).filter(models.User.id == user_id).update({models.User.hashed_password: new_hash}, synchronize_session=False)
+    db.commit()
+
+@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
+async def register(payload: UserCreate, db: Session = Depends(get_db)):
+    # check exists by email
+    existing = await run_in_threadpool(_credentials_by_email, db, payload.email)
+    if existing:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    try:
+        hashed = await hash_password_async(payload.password)
+    except HashingBusy:
+        raise _busy()
+    user = await run_in_threadpool(_create_user, db, payload, hashed)
     token = create_access_token(str(user.id))
     return {"access_token": token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(payload: UserCreate, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == payload.email).first()
-    if not user or not user.hashed_password or not verify_password(payload.password, user.hashed_password):
+async def login(payload: UserCreate, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_credentials_by_email, db, payload.email)
+    if not user or not user.hashed_password:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    try:
+        ok, new_hash = await verify_and_update_async(payload.password, user.hashed_password)
+    except HashingBusy:
+        raise _busy()
+    if not ok:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        # stored hash predates the current PASSWORD_HASH_ROUNDS: upgrade it transparently
+        await run_in_threadpool(_store_rehash, db, user.id, new_hash)
     token = create_access_token(str(user.id))
     return {"access_token": token, "token_type": "bearer"}
@@ -0,0 +1,100 @@
+# app/api/v1/budgets.py
+from fastapi import APIRouter, Depends, HTTPException, status, Response
+from sqlalchemy.orm import Session
+from typing import List
+from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetOut, BudgetAlertOut
+from app.api.v1.deps import get_db_dep, get_read_db, get_current_user, Principal
+from app.api.v1.etag import etag_guard
+from app.core.json_response import fast_response
+from app.db import models
+from app.services import budgets as budget_service
+from app.services.data_version import bump_data_version
+
+router = APIRouter(tags=["budgets"])
+
+def _get_budget(db: Session, budget_id: int, user_id: int) -> models.Budget:
+    b = db.query(models.Budget).filter(models.Budget.id == budget_id, models.Budget.user_id == user_id).first()
+    if not b:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Budget not found")
+    return b
+
+def _alert_to_dict(a: models.BudgetAlert) -> dict:
+    return {
+        "id": a.id, "budget_id": a.budget_id, "period_start": a.period_start, "level": a.level,
+        "spent": budget_service.money(a.spent), "limit_amount": budget_service.money(a.limit_amount),
+        "created_at": a.created_at, "acknowledged": bool(a.acknowledged),
+    }
+
+@router.post("", response_model=BudgetOut, status_code=status.HTTP_201_CREATED)
+def create_budget(payload: BudgetCreate, db: Session = Depends(get_db_dep), current_user: Principal = Depends(get_current_user)):
+    if payload.category_id is not None:
+        cat = db.query(models.Category).filter(models.Category.id == payload.category_id, models.Category.user_id == current_user.id).first()
+        if not cat:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid category_id")
+    b = models.Budget(
+        user_id=current_user.id,
+        category_id=payload.category_id,
+        period=payload.period.value,
+        limit_amount=payload.limit,
+        currency=payload.currency,
+        alert_threshold=payload.alert_threshold,
+    )
+    db.add(b)
+    db.flush()
+    budget_service.reevaluate(db, b)  # spend so far this period may already be over the threshold
+    bump_data_version(db, current_user.id)
+    db.commit()
+    db.refresh(b)
+    return budget_service.current_status(db, [b])[0]
+
+@router.get("", response_model=List[BudgetOut], dependencies=[Depends(etag_guard)])
+def list_budgets(response: Response, db: Session = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
+    items = db.query(models.Budget).filter(models.Budget.user_id == current_user.id).order_by(models.Budget.id).all()
+    return fast_response(budget_service.current_status(db, items), response)
+
+@router.get("/alerts", response_model=List[BudgetAlertOut], dependencies=[Depends(etag_guard)])
+def list_alerts(response: Response, include_acknowledged: bool = False, limit: int = 100, db: Session = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
+    q = db.query(models.BudgetAlert).filter(models.BudgetAlert.user_id == current_user.id)
+    if not include_acknowledged:
+        q = q.filter(models.BudgetAlert.acknowledged.is_(False))
+    items = q.order_by(models.BudgetAlert.id.desc()).limit(limit).all()
+    return fast_response([_alert_to_dict(a) for a in items], response)
+
+@router.post("/alerts/{alert_id}/ack", response_model=BudgetAlertOut)
+def acknowledge_alert(alert_id: int, response: Response, db: Session = Depends(get_db_dep), current_user: Principal = Depends(get_current_user)):
+    a = db.query(models.BudgetAlert).filter(models.BudgetAlert.id == alert_id, models.BudgetAlert.user_id == current_user.id).first()
+    if not a:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Alert not found")
+    a.acknowledged = True
+    bump_data_version(db, current_user.id)
+    db.commit()
+    db.refresh(a)
+    return fast_response(_alert_to_dict(a), response)
+
+@router.get("/{budget_id}", response_model=BudgetOut, dependencies=[Depends(etag_guard)])
+def get_budget(budget_id: int, response: Response, db: Session = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
+    b = _get_budget(db, budget_id, current_user.id)
+    return fast_response(budget_service.current_status(db, [b])[0], response)
+
+@router.put("/{budget_id}", response_model=BudgetOut)
+def update_budget(budget_id: int, payload: BudgetUpdate, db: Session = Depends(get_db_dep), current_user: Principal = Depends(get_current_user)):
+    b = _get_budget(db, budget_id, current_user.id)
+    if payload.limit is not None:
+        b.limit_amount = payload.limit
+    if payload.alert_threshold is not None:
+        b.alert_threshold = payload.alert_threshold
+    budget_service.reevaluate(db, b)
+    bump_data_version(db, current_user.id)
+    db.commit()
+    db.refresh(b)
+    return budget_service.current_status(db, [b])[0]
+
+@router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_budget(budget_id: int, db: Session = Depends(get_db_dep), current_user: Principal = Depends(get_current_user)):
+    b = _get_budget(db, budget_id, current_user.id)
+    for model in (models.BudgetAlert, models.BudgetSpend):
+        db.query(model).filter(model.budget_id == b.id).delete(synchronize_session=False)
+    db.delete(b)
+    bump_data_version(db, current_user.id)
+    db.commit()
+    return None
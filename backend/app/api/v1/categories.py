@@ -1,39 +1,50 @@
 ﻿# app/api/v1/categories.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Dict, Any
 from app.schemas.category import CategoryCreate, CategoryOut, CategoryUpdate
-from app.api.v1.deps import get_db_dep, get_current_user
+from app.api.v1.deps import get_db_dep, get_read_db, get_current_user, Principal
+from app.api.v1.etag import etag_guard
+from app.core.json_response import fast_response
+from app.db.query_stats import query_budget
 from app.db import models
+from app.services import ledger
+from app.services.data_version import bump_data_version
 
 router = APIRouter(tags=["categories"])
 
+def category_to_dict(cat: models.Category) -> Dict[str, Any]:
+    # same shape as CategoryOut, without per-row pydantic validation
+    return {"id": cat.id, "user_id": cat.user_id, "name": cat.name, "description": cat.description}
+
 @router.post("", response_model=CategoryOut, status_code=status.HTTP_201_CREATED)
-def create_category(payload: CategoryCreate, db: Session = Depends(get_db_dep), current_user: models.User = Depends(get_current_user)):
+def create_category(payload: CategoryCreate, db: Session = Depends(get_db_dep), current_user: Principal = Depends(get_current_user)):
     # enforce name uniqueness for this user (optional - change to global if desired)
     existing = db.query(models.Category).filter(models.Category.user_id == current_user.id, models.Category.name == payload.name).first()
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category with this name already exists")
     new = models.Category(user_id=current_user.id, name=payload.name, description=payload.description)
     db.add(new)
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(new)
     return new
 
-@router.get("", response_model=List[CategoryOut])
-def list_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db_dep), current_user: models.User = Depends(get_current_user)):
+@router.get("", response_model=List[CategoryOut], dependencies=[Depends(etag_guard)])
+@query_budget(3)
+def list_categories(response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     items = db.query(models.Category).filter(models.Category.user_id == current_user.id).offset(skip).limit(limit).all()
-    return items
+    return fast_response([category_to_dict(c) for c in items], response)
 
-@router.get("/{category_id}", response_model=CategoryOut)
-def get_category(category_id: int, db: Session = Depends(get_db_dep), current_user: models.User = Depends(get_current_user)):
+@router.get("/{category_id}", response_model=CategoryOut, dependencies=[Depends(etag_guard)])
+def get_category(category_id: int, response: Response, db: Session = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     cat = db.query(models.Category).filter(models.Category.id == category_id, models.Category.user_id == current_user.id).first()
     if not cat:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-    return cat
+    return fast_response(category_to_dict(cat), response)
 
 @router.put("/{category_id}", response_model=CategoryOut)
-def update_category(category_id: int, payload: CategoryUpdate, db: Session = Depends(get_db_dep), current_user: models.User = Depends(get_current_user)):
+def update_category(category_id: int, payload: CategoryUpdate, db: Session = Depends(get_db_dep), current_user: Principal = Depends(get_current_user)):
     cat = db.query(models.Category).filter(models.Category.id == category_id, models.Category.user_id == current_user.id).first()
     if not cat:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
@@ -42,15 +53,18 @@ def update_category(category_id: int, payload: CategoryUpdate, db: Session = Dep
     if payload.description is not None:
         cat.description = payload.description
     db.add(cat)
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(cat)
     return cat
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_category(category_id: int, db: Session = Depends(get_db_dep), current_user: models.User = Depends(get_current_user)):
+def delete_category(category_id: int, db: Session = Depends(get_db_dep), current_user: Principal = Depends(get_current_user)):
     cat = db.query(models.Category).filter(models.Category.id == category_id, models.Category.user_id == current_user.id).first()
     if not cat:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    ledger.record_category_deleted(db, current_user.id, cat.id)
     db.delete(cat)
+    bump_data_version(db, current_user.id)
     db.commit()
     return None
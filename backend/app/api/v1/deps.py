@@ -1,11 +1,16 @@
 # app/api/v1/deps.py
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Generator, Optional
-from app.db.session import get_db
+from typing import Generator, Optional, Tuple
+from app.db.query_stats import unbudgeted
+from app.db.session import engine, get_async_db, get_db, read_session, replicas
 from app.db import models
 from app.services.security import decode_access_token
+from app.services.principals import Principal, load_principal, principal_cache
+from app.services.data_version import on_data_change
 from app.core.config import settings
 from jose import JWTError, jwt
 
@@ -21,31 +26,77 @@ def get_db_dep() -> Generator[Session, None, None]:
     finally:
         db.close()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme), db: Session = Depends(get_db_dep)) -> models.User:
-    token = credentials.credentials
-    # try your local helper decode first (it will raise on invalid tokens as appropriate)
+def _verified_subject(token: str) -> Tuple[int, Optional[float]]:
+    """(user id, exp) of a valid access token; 401 otherwise."""
     try:
         payload = decode_access_token(token)
-    except Exception:
-        # fallback to direct decode using secret if decode_access_token not present/valid
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        except JWTError:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
 
     sub = payload.get("sub")
     if sub is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token (no sub)")
 
     try:
-        user_id = int(sub)
+        return int(sub), payload.get("exp")
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+
+def _remember(token: str, principal: Optional[Principal], exp: Optional[float]) -> Principal:
+    if principal is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    principal_cache.put(token, principal, exp)
+    return principal
+
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme), db: Session = Depends(get_db_dep)) -> Principal:
+    """
+    The authenticated Principal (id, email, username). A token seen recently
+    is answered from principal_cache without decoding it again or touching
+    the users table; use get_current_user_from_bearer for the full ORM row.
+    """
+    token = credentials.credentials
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+    user_id, exp = _verified_subject(token)
+    with unbudgeted():
+        principal = load_principal(db, user_id)
+    return _remember(token, principal, exp)
+
+
+async def get_current_user_async(credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """get_current_user for the DB_ASYNC routes: same cache, the miss lookup awaits the AsyncSession."""
+    token = credentials.credentials
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+    user_id, exp = _verified_subject(token)
+    with unbudgeted():
+        principal = await db.run_sync(load_principal, user_id)
+    return _remember(token, principal, exp)
+
+
+# a user's committed writes pin their reads to the primary for REPLICA_STICKY_SECONDS
+on_data_change(replicas.mark_write)
+
+
+def get_read_db(current_user: Principal = Depends(get_current_user)) -> Generator[Session, None, None]:
+    """
+    Session for read-only handlers (lists, analytics): a read replica when
+    DATABASE_REPLICA_URLS is set, else -- or right after this user wrote --
+    the primary (see ReplicaRouter in app/db/session.py).
+    """
+    db = read_session(current_user.id)
+    try:
+        yield db
+    except DBAPIError as e:
+        if e.connection_invalidated and db.get_bind() is not engine:
+            replicas.mark_down(db.get_bind())
+        raise
+    finally:
+        db.close()
 
 
 def get_current_user_from_bearer(
@@ -0,0 +1,128 @@
+# app/api/v1/etag.py
+"""
+Conditional GET support.
+
+`etag_guard` is a route dependency: it derives an ETag from the user's data
+version plus the request path and query params. If the client's
+If-None-Match already matches, it answers 304 before the handler runs (so
+none of the list/analytics queries execute); otherwise it attaches the ETag
+to the response. `fx_etag_guard` also folds in the FX table version, for the
+endpoints that convert amounts to a reporting currency; the rest never
+look at fx_rates.
+
+The ETag and the body are read through the same (possibly replica) session,
+so a lagging replica can never pair an old body with a newer version.
+
+Usage:
+    @router.get("", dependencies=[Depends(etag_guard)])
+
+Handlers that need the version themselves (the analytics result cache keys
+on it) depend on `data_version`; FastAPI resolves it once per request, so
+guard and handler share one read.
+"""
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.v1.deps import get_current_user, get_current_user_async, get_read_db, Principal
+from app.db.query_stats import unbudgeted
+from app.db.session import get_async_db
+from app.services import fx
+from app.services.data_version import get_data_version
+
+
+def compute_etag(user_id: int, version, request: Request) -> str:
+    # sort params so ?a=1&b=2 and ?b=2&a=1 share a validator
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    raw = f"{user_id}:{version}:{request.url.path}?{params}"
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison as in RFC 9110: ignore W/ prefixes, accept '*' and lists."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def data_version(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+) -> int:
+    """The user's data version, read through the request's (possibly replica) session."""
+    with unbudgeted():
+        return get_data_version(db, current_user.id)
+
+
+async def data_version_async(
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> int:
+    """data_version for the DB_ASYNC routes (same AsyncSession as the handler)."""
+    with unbudgeted():
+        return await db.run_sync(get_data_version, current_user.id)
+
+
+def _fx_version(db: Session, version: int) -> str:
+    with unbudgeted():
+        return f"{version}:{fx.rates.refresh(db).version}"
+
+
+def _check(request: Request, response: Response, user_id: int, version: str) -> str:
+    etag = compute_etag(user_id, version, request)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return etag
+
+
+def etag_guard(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    version: int = Depends(data_version),
+) -> str:
+    return _check(request, response, current_user.id, str(version))
+
+
+def fx_etag_guard(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    version: int = Depends(data_version),
+) -> str:
+    """etag_guard for responses converted at FX rates: importing rates changes the ETag too."""
+    return _check(request, response, current_user.id, _fx_version(db, version))
+
+
+async def etag_guard_async(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_user_async),
+    version: int = Depends(data_version_async),
+) -> str:
+    """etag_guard for the DB_ASYNC routes."""
+    return _check(request, response, current_user.id, str(version))
+
+
+async def fx_etag_guard_async(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    version: int = Depends(data_version_async),
+) -> str:
+    """fx_etag_guard for the DB_ASYNC routes."""
+    return _check(request, response, current_user.id, await db.run_sync(_fx_version, version))
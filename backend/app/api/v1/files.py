@@ -0,0 +1,99 @@
+# app/api/v1/files.py
+"""
+Streaming responses for stored uploads (app/services/storage.py), with
+single-range HTTP Range support so PDF viewers and image loaders can fetch
+parts of a file. Also serves GET /uploads/<key>, the URL kept in
+receipts.file_path, in place of the old StaticFiles mount, and
+GET /derivatives/<kind>-<px>/<key>, the receipt thumbnails and previews
+(app/services/derivatives.py).
+"""
+import mimetypes
+import re
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.v1.deps import get_db_dep
+from app.services import derivatives
+from app.services.storage import storage
+
+router = APIRouter()
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single-range "bytes=" header, None to send
+    the whole file (no header, a multi-range or malformed one). Raises 416
+    when the range lies past the end of the file.
+    """
+    m = _RANGE.match((header or "").strip())
+    if not m or m.group(1) == m.group(2) == "":
+        return None
+    first, last = m.group(1), m.group(2)
+    if first == "":
+        # suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    if start >= size or end < start:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def storage_response(request: Request, key: str, download_name: Optional[str] = None,
+                     cache_control: Optional[str] = None) -> StreamingResponse:
+    """Stream a stored object (or the requested byte range of it); 404 if it does not exist."""
+    backend = storage()
+    try:
+        size = backend.size(key)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    headers = {"Accept-Ranges": "bytes"}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if download_name:
+        # same encoding as starlette's FileResponse
+        quoted = quote(download_name)
+        if quoted != download_name:
+            headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quoted}"
+        else:
+            headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+
+    byte_range = parse_range(request.headers.get("range"), size)
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(backend.iter_range(key), media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(backend.iter_range(key, start, end), status_code=206, media_type=media_type, headers=headers)
+
+
+@router.api_route("/uploads/{key:path}", methods=["GET", "HEAD"], include_in_schema=False)
+def serve_upload(key: str, request: Request):
+    """Public URL of an upload (what the frontend links to), like the former static mount."""
+    return storage_response(request, key)
+
+
+@router.api_route("/derivatives/{variant}/{key:path}", methods=["GET", "HEAD"], include_in_schema=False)
+def serve_derivative(variant: str, key: str, request: Request, db: Session = Depends(get_db_dep)):
+    """WebP thumbnail / preview of a receipt image, made from the original if missing; cacheable forever."""
+    try:
+        dkey = derivatives.ensure(db, key, variant)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="File not found")
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    return storage_response(request, dkey, cache_control=derivatives.IMMUTABLE)
+
+
+__all__ = ["router", "parse_range", "storage_response"]
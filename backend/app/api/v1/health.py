@@ -1,8 +1,19 @@
 from fastapi import APIRouter
 from app.schemas.simple import Health
+from app.db.pool import pool_metrics
+from app.db.session import replicas
 
 router = APIRouter()
 
 @router.get('/health', response_model=Health)
 def health():
     return {'status': 'ok'}
+
+@router.get('/health/db-pool')
+def db_pool():
+    """Live pool gauges, checkout wait histogram and connection churn per engine."""
+    return {name: m.snapshot() for name, m in pool_metrics.items()}
+
+@router.get('/health/replicas')
+def replica_health():
+    return {"replicas": replicas.status(), "sticky_seconds": replicas.sticky_seconds}
@@ -0,0 +1,49 @@
+# app/api/v1/metrics.py
+from typing import List
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics
+from app.db.pool import pool_metrics
+
+router = APIRouter()
+
+_POOL_GAUGES = ("size", "checked_out", "checked_in", "overflow", "max_overflow")
+_POOL_COUNTERS = (
+    ("checkouts", "db_pool_checkouts_total", "Connections handed out by the pool"),
+    ("checkout_timeouts", "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT"),
+    ("connections_opened", "db_pool_connections_opened_total", "DBAPI connections opened"),
+    ("connections_closed", "db_pool_connections_closed_total", "DBAPI connections closed"),
+    ("connections_invalidated", "db_pool_connections_invalidated_total", "Connections invalidated after errors"),
+    ("idle_pings", "db_pool_idle_pings_total", "Pre-pings of connections idle past DB_POOL_PING_IDLE_SECONDS"),
+)
+
+
+def _pool_lines() -> List[str]:
+    """Pool state is read from PoolMetrics snapshots at scrape time (no per-checkout cost here)."""
+    snapshots = [m.snapshot() for m in pool_metrics.values()]
+    lines: List[str] = []
+    for key in _POOL_GAUGES:
+        lines += [f"# HELP db_pool_{key} Pool {key.replace('_', ' ')}", f"# TYPE db_pool_{key} gauge"]
+        lines += [f'db_pool_{key}{{engine="{s["name"]}"}} {s[key]}' for s in snapshots if key in s]
+    for key, name, help in _POOL_COUNTERS:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+        lines += [f'{name}{{engine="{s["name"]}"}} {s[key]}' for s in snapshots]
+    lines += ["# HELP db_pool_checkout_wait_seconds Wait for a free pooled connection",
+              "# TYPE db_pool_checkout_wait_seconds histogram"]
+    for s in snapshots:
+        wait = s["checkout_wait_seconds"]
+        lines += [f'db_pool_checkout_wait_seconds_bucket{{engine="{s["name"]}",le="{le}"}} {n}' for le, n in wait["buckets"].items()]
+        lines.append(f'db_pool_checkout_wait_seconds_sum{{engine="{s["name"]}"}} {wait["sum"]}')
+        lines.append(f'db_pool_checkout_wait_seconds_count{{engine="{s["name"]}"}} {wait["count"]}')
+    return lines
+
+
+metrics.register_collector(_pool_lines)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus text exposition (format 0.0.4) of the series in app/core/metrics.py plus DB pool state."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
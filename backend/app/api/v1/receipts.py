@@ -1,33 +1,62 @@
 ﻿# app/api/v1/receipts.py
 import os
 import time
-import uuid
 import json
 import logging
-from typing import List
-
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, BackgroundTasks
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-
-from app.api.v1.deps import get_current_user, get_db_dep
-from app.schemas.receipt import ReceiptOut
+from typing import Dict, Any, Optional, Sequence
+
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, BackgroundTasks, Query, Request, Response
+from sqlalchemy.orm import Session, load_only, undefer_group
+
+from app.api.v1.async_routes import file_io
+from app.api.v1.deps import get_current_user, get_db_dep, get_read_db, Principal
+from app.api.v1.etag import etag_guard
+from app.api.v1.files import storage_response
+from app.core.json_response import fast_response
+from app.core import metrics
+from app.db.query_stats import query_budget
+from app.schemas.receipt import ReceiptOut, ReceiptPage
 from app.db import models
-from app.services.receipts import ocr_image_to_text, parse_receipt_text
+from app.services.receipts import ocr_image_to_text, parse_receipt_text, summary_fields
 from app.db.session import SessionLocal
+from app.services.data_version import bump_data_version
+from app.services import derivatives, storage
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# where to store uploads (relative to backend root)
-UPLOAD_ROOT = os.path.abspath(os.path.join(os.getcwd(), "uploads"))
-
-def ensure_user_upload_dir(user_id: int) -> str:
-    d = os.path.join(UPLOAD_ROOT, str(user_id))
-    os.makedirs(d, exist_ok=True)
-    return d
-
-def _process_receipt_in_background(receipt_id: int, rel_path: str) -> None:
+# output field -> (columns it reads, value); the same shape as ReceiptOut
+_FIELDS = {
+    "id": (("id",), lambda r: r.id),
+    "user_id": (("user_id",), lambda r: r.user_id),
+    "file_path": (("file_path",), lambda r: r.file_path),
+    "thumbnail_url": (("file_path",), lambda r: derivatives.url(storage.key_from_file_path(r.file_path), "thumb")),
+    "preview_url": (("file_path",), lambda r: derivatives.url(storage.key_from_file_path(r.file_path), "preview")),
+    "uploaded_at": (("uploaded_at",), lambda r: r.uploaded_at),
+    "status": (("status",), lambda r: r.status),
+    "total": (("total",), lambda r: str(r.total) if r.total is not None else None),
+    "merchant": (("merchant",), lambda r: r.merchant),
+    "receipt_date": (("receipt_date",), lambda r: r.receipt_date),
+    "raw_text": (("raw_text",), lambda r: r.raw_text),
+    "parsed_json": (("parsed_json",), lambda r: r.parsed_json),
+}
+# what GET /receipts returns without fields=: everything but the OCR text columns
+LIST_FIELDS = tuple(f for f in _FIELDS if f not in ("raw_text", "parsed_json"))
+
+def receipt_to_dict(rec: models.Receipt, fields: Sequence[str] = tuple(_FIELDS)) -> Dict[str, Any]:
+    # without per-row pydantic validation; only reads the columns behind `fields`
+    return {f: _FIELDS[f][1](rec) for f in fields}
+
+def _parse_fields(fields: Optional[str]) -> Sequence[str]:
+    if not fields:
+        return LIST_FIELDS
+    wanted = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in wanted if f not in _FIELDS]
+    if unknown or not wanted:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}; choose from {', '.join(_FIELDS)}")
+    return wanted
+
+def _process_receipt_in_background(receipt_id: int, file_path: str) -> None:
     """
     Background worker: open a fresh DB session, run OCR & parsing,
     save raw_text and parsed_json back to the Receipt record.
@@ -39,13 +68,23 @@ def _process_receipt_in_background(receipt_id: int, rel_path: str) -> None:
             logger.warning("Background OCR: receipt id %s not found", receipt_id)
             return
 
-        abs_path = os.path.join(os.getcwd(), rel_path)
+        key = storage.key_from_file_path(file_path)
+        ocr_ok = True
+        started = time.perf_counter()
         try:
-            raw = ocr_image_to_text(abs_path) or ""
+            # Tesseract needs a real file; remote backends download to a temp file here
+            with storage.storage().local_path(key) as abs_path:
+                # thumbnail / preview first (and optional lossless recompression); never raises
+                derivatives.process_upload(key, abs_path)
+                started = time.perf_counter()
+                raw = ocr_image_to_text(abs_path) or ""
+            metrics.OCR_SECONDS.observe(time.perf_counter() - started, "ok")
         except Exception as exc:
-            # OCR failed (missing tesseract or runtime error). Log and store empty raw_text.
-            logger.exception("OCR failed for receipt %s (%s): %s", receipt_id, abs_path, exc)
+            # OCR failed (missing file or tesseract, runtime error). Log and store empty raw_text.
+            metrics.OCR_SECONDS.observe(time.perf_counter() - started, "error")
+            logger.exception("OCR failed for receipt %s (%s): %s", receipt_id, file_path, exc)
             raw = ""
+            ocr_ok = False
 
         parsed = {}
         try:
@@ -58,7 +97,12 @@ def _process_receipt_in_background(receipt_id: int, rel_path: str) -> None:
         try:
             rec.raw_text = raw
             rec.parsed_json = json.dumps(parsed, ensure_ascii=False)
+            # list columns (GET /receipts never reads the two above)
+            rec.status = "done" if ocr_ok else "failed"
+            for name, value in summary_fields(parsed).items():
+                setattr(rec, name, value)
             db.add(rec)
+            bump_data_version(db, rec.user_id)
             db.commit()
             logger.info("Background OCR complete for receipt %s", receipt_id)
         except Exception:
@@ -66,12 +110,13 @@ def _process_receipt_in_background(receipt_id: int, rel_path: str) -> None:
             db.rollback()
     finally:
         db.close()
+        metrics.OCR_QUEUE_DEPTH.dec()
 
 @router.post("", response_model=ReceiptOut, status_code=status.HTTP_201_CREATED)
 def upload_receipt(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db_dep),
 ):
     # validate file type (basic)
@@ -79,17 +124,12 @@ def upload_receipt(
     if len(filename) == 0:
         raise HTTPException(status_code=400, detail="Missing filename")
 
-    user_dir = ensure_user_upload_dir(current_user.id)
-    # create unique filename: <timestamp>_<uuid>_<original>
-    suffix = str(uuid.uuid4())[:8]
-    save_name = f"{int(time.time())}_{suffix}_{filename}"
-    dest_path = os.path.join(user_dir, save_name)
+    # unique sharded key: <uu>/<user>/<ff>/<timestamp>_<uuid>_<original>
+    key = storage.new_key(current_user.id, filename)
 
-    # save file
+    # stream the upload to storage in chunks
     try:
-        with open(dest_path, "wb") as f:
-            content = file.file.read()
-            f.write(content)
+        storage.storage().save(key, file.file)
     finally:
         try:
             file.file.close()
@@ -97,54 +137,77 @@ def upload_receipt(
             pass
 
     # create DB record (raw_text/parsed_json empty for now)
-    rel_path = os.path.relpath(dest_path, os.getcwd())
     rec = models.Receipt(
         user_id=current_user.id,
-        file_path=rel_path,
+        file_path=storage.file_path_for(key),
         raw_text="",
         parsed_json=json.dumps({"total": None, "date": None, "merchant": None, "raw_lines": []}),
     )
     db.add(rec)
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(rec)
 
     # schedule background OCR + parse job (non-blocking)
+    metrics.OCR_QUEUE_DEPTH.inc()
     background_tasks.add_task(_process_receipt_in_background, rec.id, rec.file_path)
 
-    return rec
+    return receipt_to_dict(rec)
 
-@router.get("", response_model=List[ReceiptOut])
+@router.get("", response_model=ReceiptPage, dependencies=[Depends(etag_guard)])
+@query_budget(2)
 def list_receipts(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db_dep),
+    response: Response,
+    limit: int = Query(25, ge=1, le=100),
+    cursor: Optional[int] = Query(None, ge=1, description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="comma separated, e.g. id,thumbnail_url,status,total; "
+                                                     "raw_text and parsed_json only when listed"),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
 ):
-    rows = (
-        db.query(models.Receipt)
-        .filter(models.Receipt.user_id == current_user.id)
-        .order_by(models.Receipt.uploaded_at.desc())
-        .all()
-    )
-    return rows
-
-@router.get("/{receipt_id}", response_model=ReceiptOut)
+    """
+    Receipts of the current user, newest first, `limit` at a time. Follow
+    next_cursor for the next page (keyset on id: every page is one index
+    range scan). The OCR text is left out unless fields= asks for it; use
+    GET /receipts/{id} for one receipt's full text.
+    """
+    wanted = _parse_fields(fields)
+    R = models.Receipt
+    columns = {getattr(R, c) for f in wanted for c in _FIELDS[f][0]}
+    q = db.query(R).options(load_only(*columns)).filter(R.user_id == current_user.id)
+    if cursor is not None:
+        q = q.filter(R.id < cursor)
+    rows = q.order_by(R.id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return fast_response({
+        "items": [receipt_to_dict(r, wanted) for r in rows[:limit]],
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }, response)
+
+@router.get("/{receipt_id}", response_model=ReceiptOut, dependencies=[Depends(etag_guard)])
 def get_receipt(
     receipt_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db_dep),
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
 ):
     rec = (
         db.query(models.Receipt)
+        .options(undefer_group("ocr"))  # the full OCR text lives here, not in the list
         .filter(models.Receipt.id == receipt_id, models.Receipt.user_id == current_user.id)
         .first()
     )
     if not rec:
         raise HTTPException(status_code=404, detail="Receipt not found")
-    return rec
+    return fast_response(receipt_to_dict(rec), response)
 
 @router.get("/{receipt_id}/download")
+@file_io
 def download_receipt(
     receipt_id: int,
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db_dep),
 ):
     rec = (
@@ -155,15 +218,14 @@ def download_receipt(
     if not rec:
         raise HTTPException(status_code=404, detail="Receipt not found")
 
-    path = os.path.join(os.getcwd(), rec.file_path)
-    if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail="File not found on disk")
-    return FileResponse(path, filename=os.path.basename(path))
+    key = storage.key_from_file_path(rec.file_path)
+    return storage_response(request, key, download_name=os.path.basename(key))
 
 @router.delete("/{receipt_id}", status_code=status.HTTP_204_NO_CONTENT)
+@file_io
 def delete_receipt(
     receipt_id: int,
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db_dep),
 ):
     rec = (
@@ -174,14 +236,15 @@ def delete_receipt(
     if not rec:
         raise HTTPException(status_code=404, detail="Receipt not found")
 
-    # delete file (best-effort)
+    # delete file and its thumbnails (best-effort)
+    key = storage.key_from_file_path(rec.file_path)
     try:
-        disk_path = os.path.join(os.getcwd(), rec.file_path)
-        if os.path.exists(disk_path):
-            os.remove(disk_path)
+        storage.storage().delete(key)
     except Exception:
         logger.exception("Failed to delete receipt file %s", rec.file_path)
+    derivatives.delete_all(key)
 
     db.delete(rec)
+    bump_data_version(db, current_user.id)
     db.commit()
     return None
@@ -1,13 +1,21 @@
 ﻿# app/api/v1/transactions.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
+from heapq import merge
+from itertools import islice
+from sqlalchemy.orm import Session, joinedload
 from datetime import date, datetime
 from decimal import Decimal
 
-from app.api.v1.deps import get_current_user, get_db_dep
+from app.api.v1.deps import get_current_user, get_db_dep, get_read_db, Principal
+from app.api.v1.etag import etag_guard
+from app.core.json_response import fast_response
+from app.db.query_stats import query_budget
 from app.db import models
-from sqlalchemy import func
+from app.schemas.transactions import TransactionOut, TransactionPage
+from app.services import archive, ledger
+from app.services.data_version import bump_data_version
+from sqlalchemy import case, func
 
 router = APIRouter(tags=["transactions"])
 
@@ -18,22 +26,44 @@ def txn_to_dict(txn: models.Transaction) -> Dict[str, Any]:
         "type": txn.type.value if txn.type is not None else None,
         "amount": str(txn.amount),
         "currency": txn.currency,
-        "date": txn.date.isoformat() if txn.date else None,
+        "date": txn.date,  # date/datetime are encoded by FastJSONResponse
         "description": txn.description,
         "category_id": txn.category_id,
         "category": {"id": txn.category.id, "name": txn.category.name} if getattr(txn, "category", None) else None,
-        "created_at": txn.created_at.isoformat() if getattr(txn, "created_at", None) else None,
+        "created_at": getattr(txn, "created_at", None),
     }
 
-@router.get("", response_model=Dict[str, Any])
+def archived_to_dict(row: Dict[str, Any], names: Dict[int, str]) -> Dict[str, Any]:
+    """txn_to_dict for a row read back from cold storage (app/services/archive.py); names = live categories."""
+    cid = row["category_id"] if row["category_id"] in names else None
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "type": row["type"],
+        "amount": str(row["amount"]),
+        "currency": row["currency"],
+        "date": row["date"],
+        "description": row["description"],
+        "category_id": cid,
+        "category": {"id": cid, "name": names[cid]} if cid is not None else None,
+        "created_at": row["created_at"],
+    }
+
+def _reject_archived(db: Session, user_id: int, txn_id: int) -> None:
+    if archive.find(db, user_id, txn_id) is not None:
+        raise HTTPException(status_code=409, detail="Transaction is archived and read-only")
+
+@router.get("", response_model=TransactionPage, dependencies=[Depends(etag_guard)])
+@query_budget(5)
 def list_transactions(
+    response: Response,
     start_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
     end_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
     type: Optional[str] = Query(None, description="income or expense"),
     page: int = Query(1, ge=1),
     per_page: int = Query(25, ge=1, le=200),
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db_dep),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
 ):
     """
     Paginated list of transactions for current user, with optional date range and type filter.
@@ -50,17 +80,54 @@ def list_transactions(
         # map string to Enum
         q = q.filter(models.Transaction.type == models.TransactionType[type])
 
-    total = q.count()
-    items = (
-        q.order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
-        .offset((page - 1) * per_page)
-        .limit(per_page)
-        .all()
-    )
-    return {"total": total, "page": page, "per_page": per_page, "items": [txn_to_dict(t) for t in items]}
+    offset = (page - 1) * per_page
+    newest_first = (models.Transaction.date.desc(), models.Transaction.id.desc())
+    parts = archive.partitions(db, current_user.id, start_date, end_date)
+    if not parts:
+        total = q.count()
+        items = (
+            q.options(joinedload(models.Transaction.category))  # txn_to_dict reads txn.category
+            .order_by(*newest_first)
+            .offset(offset)
+            .limit(per_page)
+            .all()
+        )
+        return fast_response({"total": total, "page": page, "per_page": per_page, "items": [txn_to_dict(t) for t in items]}, response)
+
+    # cold storage: hot rows dated after the newest archived day come first and page straight
+    # from SQL; only a page reaching past them merges the rest of the hot table with the archive
+    cutoff = max(p.max_date for p in parts)
+    total, recent = q.with_entities(
+        func.count(models.Transaction.id), func.sum(case((models.Transaction.date > cutoff, 1), else_=0)),
+    ).one()
+    recent = int(recent or 0)
+    names = archive.category_names(db, current_user.id)
+    cold = archive.read_rows(parts, names, start_date, end_date, type)
+    total += cold.num_rows
 
-@router.post("", status_code=status.HTTP_201_CREATED)
-def create_transaction(payload: Dict = None, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db_dep)):
+    items = []
+    if offset < recent:
+        items = [txn_to_dict(t) for t in (
+            q.filter(models.Transaction.date > cutoff)
+            .options(joinedload(models.Transaction.category))
+            .order_by(*newest_first).offset(offset).limit(per_page).all()
+        )]
+    if len(items) < per_page:
+        skip = max(offset - recent, 0)
+        wanted = skip + per_page - len(items)
+        older = [txn_to_dict(t) for t in (
+            q.filter(models.Transaction.date <= cutoff)
+            .options(joinedload(models.Transaction.category))
+            .order_by(*newest_first).limit(wanted).all()
+        )]
+        archived = [archived_to_dict(r, names) for r in (
+            cold.sort_by([("date", "descending"), ("id", "descending")]).slice(0, wanted).to_pylist()
+        )]
+        items += islice(merge(older, archived, key=lambda t: (t["date"], t["id"]), reverse=True), skip, wanted)
+    return fast_response({"total": total, "page": page, "per_page": per_page, "items": items}, response)
+
+@router.post("", response_model=TransactionOut, status_code=status.HTTP_201_CREATED)
+def create_transaction(payload: Dict = None, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db_dep)):
     """
     Create a transaction. Expect JSON:
     {
@@ -88,29 +155,37 @@ def create_transaction(payload: Dict = None, current_user: models.User = Depends
             category_id=payload.get("category_id"),
         )
         db.add(t)
+        ledger.record_created(db, [t])
+        bump_data_version(db, current_user.id)
         db.commit()
         db.refresh(t)
-        return txn_to_dict(t)
+        return fast_response(txn_to_dict(t), status_code=status.HTTP_201_CREATED)
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Missing field: {e}")
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/{txn_id}", response_model=Dict[str, Any])
-def get_transaction(txn_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db_dep)):
+@router.get("/{txn_id}", response_model=TransactionOut, dependencies=[Depends(etag_guard)])
+@query_budget(4)
+def get_transaction(txn_id: int, response: Response, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_read_db)):
     txn = db.query(models.Transaction).filter(models.Transaction.id == txn_id, models.Transaction.user_id == current_user.id).first()
     if not txn:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    return txn_to_dict(txn)
+        row = archive.find(db, current_user.id, txn_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        return fast_response(archived_to_dict(row, archive.category_names(db, current_user.id)), response)
+    return fast_response(txn_to_dict(txn), response)
 
-@router.put("/{txn_id}")
-def update_transaction(txn_id: int, payload: Dict = None, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db_dep)):
+@router.put("/{txn_id}", response_model=TransactionOut)
+def update_transaction(txn_id: int, payload: Dict = None, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db_dep)):
     txn = db.query(models.Transaction).filter(models.Transaction.id == txn_id, models.Transaction.user_id == current_user.id).first()
     if not txn:
+        _reject_archived(db, current_user.id, txn_id)
         raise HTTPException(status_code=404, detail="Transaction not found")
     if payload is None:
         raise HTTPException(status_code=400, detail="Missing payload")
+    before = ledger.snapshot(txn)
     # update fields
     if "type" in payload:
         txn.type = models.TransactionType[payload["type"]]
@@ -125,15 +200,20 @@ def update_transaction(txn_id: int, payload: Dict = None, current_user: models.U
     if "category_id" in payload:
         txn.category_id = payload["category_id"]
     db.add(txn)
+    ledger.record_updated(db, before, txn)
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(txn)
-    return txn_to_dict(txn)
+    return fast_response(txn_to_dict(txn))
 
 @router.delete("/{txn_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_transaction(txn_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db_dep)):
+def delete_transaction(txn_id: int, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db_dep)):
     txn = db.query(models.Transaction).filter(models.Transaction.id == txn_id, models.Transaction.user_id == current_user.id).first()
     if not txn:
+        _reject_archived(db, current_user.id, txn_id)
         raise HTTPException(status_code=404, detail="Transaction not found")
+    ledger.record_deleted(db, [ledger.snapshot(txn)])
     db.delete(txn)
+    bump_data_version(db, current_user.id)
     db.commit()
     return None
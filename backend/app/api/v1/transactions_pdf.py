@@ -1,7 +1,6 @@
 # app/api/v1/transactions_pdf.py
 import os
 import time
-import uuid
 from decimal import Decimal
 from typing import List, Dict, Any
 
@@ -9,25 +8,20 @@ from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import datetime
 
-from app.api.v1.deps import get_current_user, get_db_dep
+from app.api.v1.deps import get_current_user, get_db_dep, Principal
+from app.core import metrics
 from app.db import models
+from app.services import ledger
+from app.services.data_version import bump_data_version
+from app.services import storage
 from app.services.pdf_parser import parse_transactions_from_pdf
 
 router = APIRouter(tags=["transactions_pdf"])
 
-# reuse uploads root (same as receipts)
-UPLOAD_ROOT = os.path.abspath(os.path.join(os.getcwd(), "uploads"))
-os.makedirs(UPLOAD_ROOT, exist_ok=True)
-
-def ensure_user_upload_dir(user_id: int) -> str:
-    d = os.path.join(UPLOAD_ROOT, str(user_id))
-    os.makedirs(d, exist_ok=True)
-    return d
-
 @router.post("/upload_pdf", status_code=status.HTTP_201_CREATED)
 def upload_and_parse_pdf(
     file: UploadFile = File(...),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Upload a PDF and parse tabular transaction rows.
@@ -39,21 +33,19 @@ def upload_and_parse_pdf(
     filename = os.path.basename(file.filename or "")
     if not filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
-    user_dir = ensure_user_upload_dir(current_user.id)
-    suffix = str(uuid.uuid4())[:8]
-    save_name = f"{int(time.time())}_{suffix}_{filename}"
-    dest_path = os.path.join(user_dir, save_name)
+    # same storage and key layout as receipts
+    key = storage.new_key(current_user.id, filename)
     try:
-        with open(dest_path, "wb") as f:
-            f.write(file.file.read())
+        storage.storage().save(key, file.file)
     finally:
         try:
             file.file.close()
         except Exception:
             pass
 
-    # call existing parser
-    parsed = parse_transactions_from_pdf(dest_path) or []
+    # call existing parser (pdfplumber needs a real file; remote backends download to a temp file)
+    with storage.storage().local_path(key) as pdf_path:
+        parsed = parse_transactions_from_pdf(pdf_path) or []
     # normalize parsed rows: ensure keys and types
     normalized = []
     for r in parsed:
@@ -73,13 +65,13 @@ def upload_and_parse_pdf(
             "amount": amount,
         })
 
-    return {"rows": normalized, "file": os.path.relpath(dest_path, os.getcwd())}
+    return {"rows": normalized, "file": storage.file_path_for(key)}
 
 class BulkCreatePayload(Base := Dict):  # type: ignore - simple typing
     pass
 
 @router.post("/bulk", status_code=status.HTTP_201_CREATED)
-def bulk_create_transactions(payload: Dict[str, Any], current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db_dep)):
+def bulk_create_transactions(payload: Dict[str, Any], current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db_dep)):
     """
     Accept JSON payload: {"rows": [{"date":"YYYY-MM-DD" (or null), "description":"...", "amount":123.45, "type":"expense"|"income" (optional)} , ...]}
     Creates transactions for current_user. If date is missing, uses today. Type defaults to "expense" for negative amounts? We'll default to "expense".
@@ -89,6 +81,7 @@ def bulk_create_transactions(payload: Dict[str, Any], current_user: models.User
     if not rows or not isinstance(rows, list):
         raise HTTPException(status_code=400, detail="Missing rows array in payload")
     created = []
+    started = time.perf_counter()
     try:
         for r in rows:
             try:
@@ -126,11 +119,16 @@ def bulk_create_transactions(payload: Dict[str, Any], current_user: models.User
             )
             db.add(txn)
             created.append(txn)
+        if created:
+            ledger.record_created(db, created)
+            bump_data_version(db, current_user.id)
+        # ids are assigned by the flush; read them now rather than refreshing every row after commit
+        db.flush()
+        ids = [t.id for t in created]
         db.commit()
     except Exception as exc:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create transactions: {exc}")
-    # refresh to get ids
-    for t in created:
-        db.refresh(t)
-    return {"created": len(created), "ids": [t.id for t in created]}
+    metrics.BULK_SECONDS.observe(time.perf_counter() - started)
+    metrics.BULK_ROWS.inc(amount=len(created))
+    return {"created": len(created), "ids": ids}
@@ -0,0 +1,59 @@
+# app/core/concurrency.py
+"""
+Blocking primitives that stay safe under the async DB stack.
+
+With DB_ASYNC on, sync handler code runs inside AsyncSession.run_sync: on the
+event loop thread, in a greenlet that hands control back to the loop at every
+DB round trip. Requests then share one OS thread, so a threading.Lock held
+across a query -- or an Event.wait() for another request's result -- would
+block the very loop the other side needs to finish. Inside such a greenlet
+these helpers poll with a short asyncio sleep instead; anywhere else they are
+the plain blocking calls.
+"""
+import asyncio
+import threading
+import time
+
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+_POLL_SECONDS = 0.002
+
+
+class LoopSafeLock:
+    """threading.Lock that yields to the event loop while contended inside run_sync."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        if not in_greenlet():
+            return self._lock.acquire()
+        while not self._lock.acquire(blocking=False):
+            await_only(asyncio.sleep(_POLL_SECONDS))
+        return True
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def __enter__(self) -> "LoopSafeLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def wait_event(event: threading.Event, timeout: float) -> bool:
+    """event.wait(timeout) that does not stall the event loop inside run_sync."""
+    if not in_greenlet():
+        return event.wait(timeout)
+    deadline = time.monotonic() + timeout
+    while not event.is_set():
+        if time.monotonic() >= deadline:
+            return False
+        await_only(asyncio.sleep(_POLL_SECONDS))
+    return True
+
+
+__all__ = ["LoopSafeLock", "wait_event"]
@@ -0,0 +1,57 @@
+# app/core/json_response.py
+"""
+Fast JSON rendering for hot endpoints.
+
+Returning a FastJSONResponse from a handler skips FastAPI's response_model
+validation and jsonable_encoder pass; the payload (plain dicts/lists built by
+the handler) goes straight to orjson. Falls back to the stdlib json module
+when orjson is not installed.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Mapping, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+# optional fast encoder (don't fail import if missing)
+try:
+    import orjson  # type: ignore
+    ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None  # type: ignore
+    ORJSON_AVAILABLE = False
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively. Decimals stay strings to avoid float issues."""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (date, datetime)):  # stdlib json fallback only; orjson does these natively
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """
+    Wrap content in a FastJSONResponse. Pass the injected `response` so headers
+    set by dependencies (e.g. the ETag from etag_guard) are carried over --
+    FastAPI ignores the sub-response once a handler returns a Response itself.
+    """
+    headers: Optional[Mapping[str, str]] = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
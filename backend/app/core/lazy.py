@@ -0,0 +1,45 @@
+# app/core/lazy.py
+"""
+Deferred imports for heavy optional dependencies.
+
+`lazy_import("numpy")` returns a stand-in module that imports the real one
+on first attribute access and then takes over its namespace, so call sites
+keep writing `np.zeros(...)` while `import app.main` stays free of NumPy,
+pyarrow, Pillow, pytesseract, dateutil and pdfplumber until a request
+actually needs them. `available` tells whether a package is installed
+without importing it.
+
+benchmarks/startup_profile.py checks that web workers keep starting without
+these modules, within a time and RSS budget.
+"""
+import importlib
+import importlib.util
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Placeholder for a not-yet-imported module (see module docstring)."""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        # copy the namespace so later lookups are plain attribute hits, not __getattr__ calls
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self.__name__!r}>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    return LazyModule(name)
+
+
+def available(name: str) -> bool:
+    """Whether the top-level package of `name` is installed (nothing is imported)."""
+    try:
+        return importlib.util.find_spec(name.partition(".")[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+__all__ = ["LazyModule", "lazy_import", "available"]
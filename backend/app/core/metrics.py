@@ -0,0 +1,228 @@
+# app/core/metrics.py
+"""
+Prometheus metrics without a client library.
+
+Hot-path updates are lock-free: every thread writes only to its own shard
+(a plain dict registered once per thread), so `inc`/`observe` are a dict
+lookup and an add with no lock and no contention between threadpool
+workers. A scrape copies each shard and sums them. Values collected only at
+scrape time (DB pool gauges) come from `register_collector` callbacks.
+
+GET /metrics (app/api/v1/metrics.py) renders everything in the Prometheus
+text format; MetricsMiddleware feeds the HTTP series. Rates such as PDF
+pages/sec or bulk rows/sec are the usual rate() over the *_total counters.
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+_local = threading.local()
+_shards: List[Dict] = []
+_shards_lock = threading.Lock()
+_metrics: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[str]]] = []
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _shard() -> Dict:
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _local.shard = {}
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        _metrics.append(self)
+
+    def _merged(self) -> Dict[Tuple, object]:
+        with _shards_lock:
+            shards = list(_shards)
+        merged: Dict[Tuple, object] = {}
+        for shard in shards:
+            for key, value in shard.copy().items():
+                if key[0] is self:
+                    merged[key[1]] = self._add(merged.get(key[1]), value)
+        return merged
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self._merged().items(), key=lambda kv: kv[0]):
+            lines.extend(self._render_value(labels, value))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        shard = _shard()
+        key = (self, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    @staticmethod
+    def _add(total, value):
+        return (total or 0) + value
+
+    def _render_value(self, labels, value):
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_fmt(value)}"]
+
+
+class Gauge(Counter):
+    """Sum of per-thread deltas: use inc/dec (e.g. queue depth), not absolute sets."""
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        shard = _shard()
+        key = (self, labels)
+        counts = shard.get(key)
+        if counts is None:
+            # per bucket (+Inf last), then sum and count
+            counts = shard[key] = [0] * (len(self.buckets) + 3)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def time(self, *labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    @staticmethod
+    def _add(total, value):
+        value = list(value)
+        return value if total is None else [a + b for a, b in zip(total, value)]
+
+    def _render_value(self, labels, counts):
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{_fmt(bound)}"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(counts[-2])}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {counts[-1]}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+def register_collector(collect: Callable[[], Iterable[str]]) -> None:
+    """collect() returns ready-made exposition lines, evaluated on every scrape."""
+    _collectors.append(collect)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+# --- series -----------------------------------------------------------------
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"))
+
+OCR_SECONDS = Histogram("receipt_ocr_duration_seconds", "Receipt OCR time (load, preprocess, tesseract)", ("outcome",),
+                        buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+OCR_PREPROCESS_SECONDS = Histogram("receipt_ocr_preprocess_seconds", "Image preprocessing time before OCR",
+                                   buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+OCR_QUEUE_DEPTH = Gauge("receipt_ocr_queue_depth", "Receipts uploaded and waiting for / in background OCR")
+DERIVATIVE_SECONDS = Histogram("receipt_derivative_seconds", "Receipt thumbnail / preview generation time", ("trigger",),
+                               buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+
+PDF_PAGES = Counter("pdf_pages_total", "PDF statement pages parsed")
+PDF_ROWS = Counter("pdf_rows_parsed_total", "Transaction rows extracted from PDF statements")
+PDF_SECONDS = Histogram("pdf_parse_duration_seconds", "PDF statement parse time", buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+BULK_ROWS = Counter("bulk_insert_rows_total", "Transactions created through bulk inserts")
+BULK_SECONDS = Histogram("bulk_insert_duration_seconds", "Bulk insert request DB time")
+
+
+# scope key a middleware that answers before routing sets to the (bounded) path label to use
+ROUTE_PATH_KEY = "metrics_route_path"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: one counter and one histogram update per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            # the route template keeps label cardinality bounded; unmatched paths share one series
+            path = getattr(route, "path", None) or scope.get(ROUTE_PATH_KEY, "<unmatched>")
+            labels = (scope["method"], path, str(status))
+            HTTP_REQUESTS.inc(*labels)
+            HTTP_LATENCY.observe(time.perf_counter() - start, *labels)
+
+
+__all__ = [
+    "Counter", "Gauge", "Histogram", "MetricsMiddleware", "ROUTE_PATH_KEY", "register_collector", "render",
+    "HTTP_REQUESTS", "HTTP_LATENCY", "OCR_SECONDS", "OCR_PREPROCESS_SECONDS", "OCR_QUEUE_DEPTH", "DERIVATIVE_SECONDS",
+    "PDF_PAGES", "PDF_ROWS", "PDF_SECONDS", "BULK_ROWS", "BULK_SECONDS",
+]
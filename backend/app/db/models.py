@@ -1,6 +1,6 @@
 ﻿# app/db/models.py — canonical version with User, Transaction, Receipt, Category
-from sqlalchemy import Column, Integer, String, DateTime, func, Numeric, Text, Date, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, func, Numeric, Text, Date, ForeignKey, Enum, UniqueConstraint, Boolean, Index
+from sqlalchemy.orm import relationship, deferred
 from .base import Base
 import enum
 
@@ -46,12 +46,21 @@ class Transaction(Base):
 
 class Receipt(Base):
     __tablename__ = "receipts"
+    # keyset pagination of a user's receipts, newest first (GET /receipts)
+    __table_args__ = (Index("ix_receipts_user_id_id", "user_id", "id"),)
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     file_path = Column(String(1024), nullable=False)
     uploaded_at = Column(DateTime, server_default=func.now(), nullable=False)
-    raw_text = Column(Text, nullable=True)
-    parsed_json = Column(Text, nullable=True)
+    # OCR output; not loaded with the row unless asked for (undefer / attribute access)
+    raw_text = deferred(Column(Text, nullable=True), group="ocr")
+    parsed_json = deferred(Column(Text, nullable=True), group="ocr")
+    # summary of parsed_json for lists, set by the background OCR job
+    # (existing databases: python safe_add_receipt_summary_columns.py)
+    status = Column(String(16), nullable=False, default="pending", server_default="pending")  # pending | done | failed
+    total = Column(Numeric(12,2), nullable=True)
+    merchant = Column(String(255), nullable=True)
+    receipt_date = Column(Date, nullable=True)
 
     user = relationship("User", back_populates="receipts")
 
@@ -64,3 +73,123 @@ class Category(Base):
 
     user = relationship("User", back_populates="categories")
     transactions = relationship("Transaction", back_populates="category")
+
+class UserDataVersion(Base):
+    """Per-user counter bumped by every transaction/category/receipt write (drives ETags)."""
+    __tablename__ = "user_data_versions"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+# --- analytics rollups (maintained by app/services/rollups.py) ---
+# category_id 0 means "uncategorized" so the unique key never contains NULL.
+
+class DailyRollup(Base):
+    __tablename__ = "rollup_daily"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", "type", "category_id", "currency", name="uq_rollup_daily_bucket"),
+    )
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    type = Column(Enum(TransactionType), nullable=False)
+    category_id = Column(Integer, nullable=False, default=0)
+    currency = Column(String(10), nullable=False, default="INR")
+    total = Column(Numeric(14,2), nullable=False, default=0)
+    txn_count = Column(Integer, nullable=False, default=0)
+
+class MonthlyRollup(Base):
+    __tablename__ = "rollup_monthly"
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", "type", "category_id", "currency", name="uq_rollup_monthly_bucket"),
+    )
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    month = Column(Date, nullable=False)  # first day of the month
+    type = Column(Enum(TransactionType), nullable=False)
+    category_id = Column(Integer, nullable=False, default=0)
+    currency = Column(String(10), nullable=False, default="INR")
+    total = Column(Numeric(14,2), nullable=False, default=0)
+    txn_count = Column(Integer, nullable=False, default=0)
+
+# --- budgets (spend maintained by app/services/budgets.py on every transaction write) ---
+
+class Budget(Base):
+    __tablename__ = "budgets"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # NULL category = budget over all expenses
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=True, index=True)
+    period = Column(String(20), nullable=False, default="monthly")  # weekly | monthly | quarterly | yearly
+    limit_amount = Column(Numeric(12,2), nullable=False)
+    currency = Column(String(10), nullable=False, default="INR")
+    alert_threshold = Column(Integer, nullable=False, default=80)  # percent of limit that raises a warning
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+class BudgetSpend(Base):
+    __tablename__ = "budget_spend"
+    __table_args__ = (UniqueConstraint("budget_id", "period_start", name="uq_budget_spend_period"),)
+    id = Column(Integer, primary_key=True)
+    budget_id = Column(Integer, ForeignKey("budgets.id", ondelete="CASCADE"), nullable=False)
+    period_start = Column(Date, nullable=False)
+    spent = Column(Numeric(14,2), nullable=False, default=0)
+    alert_level = Column(Integer, nullable=False, default=0)  # 0 ok, 1 warning, 2 exceeded
+
+class BudgetAlert(Base):
+    __tablename__ = "budget_alerts"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    budget_id = Column(Integer, ForeignKey("budgets.id", ondelete="CASCADE"), nullable=False)
+    period_start = Column(Date, nullable=False)
+    level = Column(String(20), nullable=False)  # warning | exceeded
+    spent = Column(Numeric(14,2), nullable=False)
+    limit_amount = Column(Numeric(12,2), nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    acknowledged = Column(Boolean, nullable=False, default=False)
+
+# --- recurring series (written by app/services/recurring.py; a cache, safe to rebuild) ---
+
+class RecurringSeries(Base):
+    __tablename__ = "recurring_series"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    merchant_key = Column(String(255), nullable=False)  # normalized description
+    label = Column(String(255), nullable=True)  # a representative original description
+    type = Column(Enum(TransactionType), nullable=False)
+    currency = Column(String(10), nullable=False, default="INR")
+    category_id = Column(Integer, nullable=True)  # most recent occurrence's category
+    cadence = Column(String(20), nullable=False)  # weekly | biweekly | monthly | quarterly | yearly
+    interval_days = Column(Integer, nullable=False)  # median gap between occurrences
+    amount = Column(Numeric(12,2), nullable=False)  # median amount
+    occurrences = Column(Integer, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    next_date = Column(Date, nullable=False)  # predicted
+    confidence = Column(Numeric(4,3), nullable=False)
+    detected_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+# --- FX rates (loaded by import_fx_rates.py; see app/services/fx.py) ---
+
+class FxRate(Base):
+    __tablename__ = "fx_rates"
+    __table_args__ = (UniqueConstraint("currency", "day", name="uq_fx_rate_day"),)
+    id = Column(Integer, primary_key=True)
+    currency = Column(String(10), nullable=False)
+    day = Column(Date, nullable=False)
+    rate = Column(Numeric(20,8), nullable=False)  # value of 1 unit of `currency` in settings.FX_BASE_CURRENCY
+
+# --- cold storage manifest (written by app/services/archive.py / archive_transactions.py) ---
+
+class TransactionArchive(Base):
+    """One Parquet partition holding a user's transactions for one closed year."""
+    __tablename__ = "transaction_archives"
+    __table_args__ = (UniqueConstraint("user_id", "year", name="uq_transaction_archive_year"),)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    year = Column(Integer, nullable=False)
+    path = Column(String(1024), nullable=False)  # relative to settings.ARCHIVE_DIR
+    row_count = Column(Integer, nullable=False)
+    min_id = Column(Integer, nullable=False)
+    max_id = Column(Integer, nullable=False)
+    min_date = Column(Date, nullable=False)
+    max_date = Column(Date, nullable=False)
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False)
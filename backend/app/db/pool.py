@@ -0,0 +1,210 @@
+# app/db/pool.py
+"""
+Connection pool sizing and live pool metrics.
+
+`engine_options(url)` turns the DB_POOL_* settings into create_engine
+keyword arguments; `instrument(engine, name)` attaches a PoolMetrics that
+the /api/v1/health/db-pool endpoint reports (and later exporters can read
+via `pool_metrics`).
+
+Pre-ping strategies (DB_POOL_PRE_PING):
+  - "always": SQLAlchemy's pool_pre_ping -- one extra round trip on every
+    checkout
+  - "idle" (default): ping only connections that sat in the pool for more
+    than DB_POOL_PING_IDLE_SECONDS; a busy pool never pays for it, a stale
+    one (server restart, wait_timeout) is still caught before use
+  - "none": rely on DB_POOL_RECYCLE alone
+
+Checkout waits are timed inside the pool itself (InstrumentedQueuePool),
+so the histogram shows how long requests queue for a connection -- the
+first symptom of an undersized pool, well before QueuePool timeouts.
+"""
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# upper bounds (seconds) of the checkout wait histogram buckets; +Inf is implicit
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# connection_record.info key: monotonic time of the last checkin
+_LAST_CHECKIN = "pool_last_checkin"
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.wait_counts: List[int] = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_sum = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.pings = 0
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_counts[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self.wait_sum += seconds
+            if timed_out:
+                self.timeouts += 1
+
+    def _count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def snapshot(self) -> Dict:
+        pool = self.pool
+        gauges = {}
+        if isinstance(pool, QueuePool):
+            gauges = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+            }
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(WAIT_BUCKETS + (float("inf"),), self.wait_counts):
+                cumulative += count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            return {
+                "name": self.name,
+                "pool": type(pool).__name__ if pool is not None else None,
+                **gauges,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_wait_seconds": {"count": cumulative, "sum": round(self.wait_sum, 6), "buckets": buckets},
+                "connections_opened": self.connects,
+                "connections_closed": self.closes,
+                "connections_invalidated": self.invalidations,
+                "idle_pings": self.pings,
+            }
+
+
+class _TimedGet:
+    """Mixin timing QueuePool._do_get, i.e. the wait for a free connection."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_wait(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        new = super().recreate()
+        new.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = new
+        return new
+
+
+class InstrumentedQueuePool(_TimedGet, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedGet, AsyncAdaptedQueuePool):
+    pass
+
+
+# name -> metrics of every instrumented engine ("primary", "async", ...)
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, is_async: bool = False) -> Dict:
+    """create_engine kwargs from the DB_POOL_* settings."""
+    options: Dict = {"pool_pre_ping": settings.DB_POOL_PRE_PING == "always"}
+    if _is_memory_sqlite(make_url(url)):
+        return options  # single shared connection; sizing does not apply
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def _ping(dbapi_connection) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+
+
+def instrument(engine, name: str) -> PoolMetrics:
+    """Attach metrics (and the idle pre-ping) to engine's pool; returns the PoolMetrics."""
+    pool = engine.pool
+    metrics = PoolMetrics(name)
+    metrics.pool = pool
+    if isinstance(pool, _TimedGet):
+        pool.metrics = metrics
+    pool_metrics[name] = metrics
+    idle_ping = settings.DB_POOL_PRE_PING == "idle"
+    idle_seconds = settings.DB_POOL_PING_IDLE_SECONDS
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, record):
+        metrics._count("connects")
+
+    @event.listens_for(pool, "close")
+    def _on_close(dbapi_connection, record):
+        metrics._count("closes")
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, record, exception):
+        metrics._count("invalidations")
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, record):
+        if record is not None:
+            record.info[_LAST_CHECKIN] = time.monotonic()
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, record, proxy):
+        metrics._count("checkouts")
+        if not idle_ping:
+            return
+        last = record.info.get(_LAST_CHECKIN)
+        if last is None or time.monotonic() - last < idle_seconds:
+            return
+        metrics._count("pings")
+        try:
+            _ping(dbapi_connection)
+        except Exception as e:
+            # the pool discards this connection and retries the checkout with a fresh one
+            logger.warning("pool %s: idle connection failed its ping (%s); reconnecting", name, e)
+            raise exc.DisconnectionError() from e
+
+    return metrics
+
+
+__all__ = ["PoolMetrics", "InstrumentedQueuePool", "InstrumentedAsyncQueuePool", "pool_metrics", "engine_options", "instrument", "WAIT_BUCKETS"]
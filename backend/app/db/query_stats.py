@@ -0,0 +1,200 @@
+# app/db/query_stats.py
+"""
+Per-request SQL instrumentation.
+
+Cursor events on every Engine (primary, replicas, the async engine's sync
+core) add each statement's count and time to the current request's
+RequestQueries, found through a ContextVar that SqlStatsMiddleware sets --
+contextvars follow the request into Starlette's threadpool and into
+AsyncSession.run_sync, so sync and async handlers are both covered.
+
+Per request this gives:
+  - a `Server-Timing: db;dur=<ms>;desc="<n> queries"` response header
+    (shown by browser dev tools next to the request)
+  - a warning naming the route when one statement fingerprint (literals and
+    IN-lists collapsed) repeats SQL_REPEAT_THRESHOLD times or more -- the
+    usual shape of an N+1
+  - a slow-query log line for any statement over SQL_SLOW_QUERY_MS
+
+Query budgets: `@query_budget(n)` on an endpoint (or SQL_QUERY_BUDGET for
+all) logs routes that issue more than n statements; with
+SQL_QUERY_BUDGET_STRICT=true -- meant for tests -- the response is replaced
+by a 500 naming the offending statements instead. Statements run inside
+`unbudgeted()` -- the shared auth and ETag dependencies, whose lookups
+depend on cache state (a cold principal cache, a due FX check) rather than
+on the endpoint -- are timed but not counted against the budget, so a
+budget is the same on the first request of a process as on later ones.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("app.sql.slow")
+
+_current: ContextVar[Optional["RequestQueries"]] = ContextVar("request_queries", default=None)
+_unbudgeted: ContextVar[bool] = ContextVar("query_unbudgeted", default=False)
+
+# conn.info key: start times of the statements in flight on that connection
+_STARTED = "query_stats_started"
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+|'[^']*'|-?\d+(?:\.\d+)?)"
+_IN_LIST = re.compile(r"\(\s*" + _PLACEHOLDER + r"(?:\s*,\s*" + _PLACEHOLDER + r")*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape: value lists and numeric literals collapsed, whitespace normalized."""
+    return _SPACE.sub(" ", _NUMBER.sub("?", _IN_LIST.sub("(?)", statement))).strip()
+
+
+class RequestQueries:
+    __slots__ = ("path", "count", "unbudgeted", "seconds", "fingerprints")
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.count = 0
+        self.unbudgeted = 0
+        self.seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def add(self, statement: str, seconds: float, budgeted: bool = True) -> None:
+        self.count += 1
+        if not budgeted:
+            self.unbudgeted += 1
+        self.seconds += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    @property
+    def budgeted(self) -> int:
+        return self.count - self.unbudgeted
+
+    def repeated(self, threshold: int) -> List:
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries"'
+
+
+def current_queries() -> Optional[RequestQueries]:
+    return _current.get()
+
+
+def query_budget(max_queries: int) -> Callable:
+    """Endpoint decorator: at most max_queries statements per request (see module docstring)."""
+    def mark(endpoint: Callable) -> Callable:
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return mark
+
+
+@contextmanager
+def unbudgeted() -> Iterator[None]:
+    """Statements run in this block are not counted against the route's query budget."""
+    token = _unbudgeted.set(True)
+    try:
+        yield
+    finally:
+        _unbudgeted.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get(_STARTED)
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, elapsed, budgeted=not _unbudgeted.get())
+    if settings.SQL_SLOW_QUERY_MS and elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        slow_logger.warning(
+            "slow query %.1fms%s: %s", elapsed * 1000,
+            f" on {stats.path}" if stats is not None else "", _SPACE.sub(" ", statement)[:500],
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_STARTED):
+        conn.info[_STARTED].pop()
+
+
+def _route_path(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+
+class SqlStatsMiddleware:
+    """Pure ASGI middleware collecting RequestQueries for each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueries(scope.get("path", ""))
+        token = _current.set(stats)
+        replaced = False
+
+        async def send_with_timing(message):
+            nonlocal replaced
+            if replaced:
+                return  # body of a response swapped out by the strict budget check
+            if message["type"] == "http.response.start":
+                stats.path = _route_path(scope)
+                budget = getattr(scope.get("endpoint"), "__query_budget__", None) or settings.SQL_QUERY_BUDGET
+                if budget and stats.budgeted > budget:
+                    top = [f"{n}x {fp[:200]}" for fp, n in stats.fingerprints.most_common(5)]
+                    logger.warning("%s issued %s queries (budget %s): %s", stats.path, stats.budgeted, budget, top)
+                    if settings.SQL_QUERY_BUDGET_STRICT:
+                        replaced = True
+                        await self._over_budget(send, stats, budget, top)
+                        return
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", stats.server_timing().encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            for fp, n in stats.repeated(settings.SQL_REPEAT_THRESHOLD):
+                logger.warning("possible N+1 on %s: %s runs of %s", stats.path, n, fp[:300])
+
+    @staticmethod
+    async def _over_budget(send, stats: RequestQueries, budget: int, top: List[str]) -> None:
+        body = json.dumps({
+            "detail": f"query budget exceeded on {stats.path}: {stats.budgeted} > {budget}",
+            "top_statements": top,
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 500,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+__all__ = ["RequestQueries", "SqlStatsMiddleware", "current_queries", "fingerprint", "query_budget", "unbudgeted"]
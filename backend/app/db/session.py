@@ -1,8 +1,20 @@
 # app/db/session.py
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker, scoped_session
+import itertools
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
+from app.core.config import settings
+from app.db.pool import engine_options, instrument
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -10,10 +22,117 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not set in environment (.env)")
 
-# create engine and session factory
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, future=True)
+# create engine and session factory (pool sizing / pre-ping from DB_POOL_* settings)
+engine = create_engine(DATABASE_URL, future=True, **engine_options(DATABASE_URL))
+instrument(engine, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
+class ReplicaRouter:
+    """
+    Picks the engine for read-only sessions: replicas in round-robin order,
+    skipping ones that failed recently, and the primary for a user who wrote
+    within the last `sticky_seconds` (read-your-writes) or when no replica is
+    configured or healthy.
+
+    A replica is marked down when connecting to it fails and is retried --
+    with a `SELECT 1` -- once `retry_seconds` have passed. Stickiness is per
+    process; other workers may briefly serve that user from a replica.
+    """
+
+    def __init__(self, primary, replicas: List, sticky_seconds: float = 5.0, retry_seconds: float = 10.0, max_users: int = 100000):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self.max_users = max_users
+        self._down_until: Dict[int, float] = {}
+        self._recent_writes: "OrderedDict[int, float]" = OrderedDict()
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def mark_write(self, user_id: int) -> None:
+        if not self.replicas or self.sticky_seconds <= 0:
+            return
+        with self._lock:
+            self._recent_writes[user_id] = time.monotonic() + self.sticky_seconds
+            self._recent_writes.move_to_end(user_id)
+            while len(self._recent_writes) > self.max_users:
+                self._recent_writes.popitem(last=False)
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._recent_writes.get(user_id)
+            if until is not None and until <= time.monotonic():
+                del self._recent_writes[user_id]
+                until = None
+        return until is not None
+
+    def mark_down(self, engine) -> None:
+        i = self.replicas.index(engine)
+        self._down_until[i] = time.monotonic() + self.retry_seconds
+        logger.warning("read replica %s marked down for %ss", i + 1, self.retry_seconds)
+
+    def _available(self, i: int) -> bool:
+        until = self._down_until.get(i)
+        if until is None:
+            return True
+        if until > time.monotonic():
+            return False
+        try:
+            with self.replicas[i].connect() as conn:
+                conn.exec_driver_sql("SELECT 1")
+        except Exception:
+            self._down_until[i] = time.monotonic() + self.retry_seconds
+            return False
+        self._down_until.pop(i, None)
+        logger.info("read replica %s is back", i + 1)
+        return True
+
+    def engine_for(self, user_id: Optional[int] = None):
+        if not self.replicas or self.is_sticky(user_id):
+            return self.primary
+        for _ in range(len(self.replicas)):
+            i = next(self._next) % len(self.replicas)
+            if self._available(i):
+                return self.replicas[i]
+        return self.primary
+
+    def status(self) -> List[Dict]:
+        now = time.monotonic()
+        return [
+            {"replica": i + 1, "healthy": self._down_until.get(i, 0) <= now}
+            for i in range(len(self.replicas))
+        ]
+
+
+# read-only traffic (lists, analytics) may go to DATABASE_REPLICA_URLS (comma separated)
+REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+replica_engines = []
+for _i, _url in enumerate(REPLICA_URLS, start=1):
+    replica_engines.append(create_engine(_url, future=True, **engine_options(_url)))
+    instrument(replica_engines[-1], f"replica-{_i}")
+replicas = ReplicaRouter(engine, replica_engines, settings.REPLICA_STICKY_SECONDS, settings.REPLICA_RETRY_SECONDS)
+
+def read_session(user_id: Optional[int] = None) -> Session:
+    """
+    A Session for read-only work on the engine `replicas` picks for user_id.
+    Connects eagerly so an unreachable replica falls back to the primary
+    before any query runs.
+    """
+    bind = replicas.engine_for(user_id)
+    db = SessionLocal(bind=bind)
+    if bind is engine:
+        return db
+    try:
+        db.connection()
+    except OperationalError:
+        db.close()
+        replicas.mark_down(bind)
+        return SessionLocal()
+    return db
+
 def get_db():
     """
     FastAPI dependency that yields a SQLAlchemy Session.
@@ -25,3 +144,46 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# async drivers used when ASYNC_DATABASE_URL is not given explicitly
+ASYNC_DRIVERS = {
+    "mysql": "mysql+asyncmy",
+    "mariadb": "mariadb+asyncmy",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+_async_sessions = None
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its sync driver swapped for the async one (mysql+pymysql -> mysql+asyncmy)."""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if drivername is None:
+        raise RuntimeError(f"no async driver known for {parsed.drivername}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+def async_session_factory():
+    """
+    The AsyncSession factory, created on first use so the async driver is
+    only imported when DB_ASYNC routes are actually served.
+    """
+    global _async_sessions
+    if _async_sessions is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        url = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+        async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+        instrument(async_engine.sync_engine, "async")
+        # handlers read attributes after commit outside the greenlet, so no expiry
+        _async_sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessions
+
+async def get_async_db():
+    """
+    Async counterpart of get_db, yielding a SQLAlchemy AsyncSession.
+    Usage:
+        db = Depends(get_async_db)
+    """
+    async with async_session_factory()() as db:
+        yield db
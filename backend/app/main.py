@@ -1,21 +1,30 @@
 # app/main.py
 from fastapi import FastAPI
 from app.api.v1 import health, auth, transactions, categories, receipts
-from fastapi.staticfiles import StaticFiles
-import os
 from app.api.v1 import analytics
+from app.api.v1 import budgets
 # app/main.py (add)
 from app.api.v1 import transactions_pdf
 
 app = FastAPI(title="Finance API", version="0.1.0")
 from fastapi.middleware.cors import CORSMiddleware
 
-# ensure absolute uploads path — same as receipts service uses
-UPLOAD_ROOT = os.path.abspath(os.path.join(os.getcwd(), "uploads"))
-os.makedirs(UPLOAD_ROOT, exist_ok=True)
+# serve stored uploads under /uploads so browser can GET /uploads/<key> (app/services/storage.py;
+# streamed from the configured backend, with Range support)
+from app.api.v1 import files
+app.include_router(files.router)
 
-# serve files under /uploads so browser can GET /uploads/<user>/<file>
-app.mount("/uploads", StaticFiles(directory=UPLOAD_ROOT), name="uploads")
+# per-request query count / SQL time (Server-Timing), N+1 and slow-query logging
+from app.db.query_stats import SqlStatsMiddleware
+app.add_middleware(SqlStatsMiddleware)
+
+# throttle credential endpoints before any routing/DB/hashing work (inside metrics, so 429s are counted)
+from app.services.rate_limit import RateLimitMiddleware, auth_limiter
+app.add_middleware(RateLimitMiddleware, limiter=auth_limiter, paths=["/api/v1/auth/login", "/api/v1/auth/register"])
+
+# request count / latency per route template and status, scraped at GET /metrics (CORS stays outermost)
+from app.core.metrics import MetricsMiddleware
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
   CORSMiddleware,
@@ -25,13 +34,33 @@ app.add_middleware(
   allow_headers=["*"],
 )
 
-app.include_router(transactions_pdf.router, prefix="/api/v1/transactions", tags=["transactions_pdf"])
-app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
-app.include_router(categories.router, prefix="/api/v1/categories", tags=["categories"])
+from app.core.config import settings
+if settings.DB_ASYNC:
+    # same routes, async handlers on an AsyncSession (upload routes stay sync)
+    from app.api.v1.async_routes import asyncify
+    transactions_pdf_routes, analytics_routes, category_routes, transaction_routes, receipt_routes = (
+        asyncify(r.router) for r in (transactions_pdf, analytics, categories, transactions, receipts)
+    )
+else:
+    transactions_pdf_routes, analytics_routes, category_routes, transaction_routes, receipt_routes = (
+        r.router for r in (transactions_pdf, analytics, categories, transactions, receipts)
+    )
+
+app.include_router(transactions_pdf_routes, prefix="/api/v1/transactions", tags=["transactions_pdf"])
+app.include_router(analytics_routes, prefix="/api/v1/analytics", tags=["analytics"])
+app.include_router(category_routes, prefix="/api/v1/categories", tags=["categories"])
 app.include_router(health.router, prefix="/api/v1")
+from app.api.v1 import metrics as metrics_routes
+app.include_router(metrics_routes.router)
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
-app.include_router(transactions.router, prefix="/api/v1/transactions", tags=["transactions"])
-app.include_router(receipts.router, prefix="/api/v1/receipts", tags=["receipts"])
+app.include_router(transaction_routes, prefix="/api/v1/transactions", tags=["transactions"])
+app.include_router(receipt_routes, prefix="/api/v1/receipts", tags=["receipts"])
+app.include_router(budgets.router, prefix="/api/v1/budgets", tags=["budgets"])
+
+@app.on_event("shutdown")
+def stop_password_hashing():
+    from app.services.security import hash_executor
+    hash_executor.shutdown()
 
 @app.get("/")
 def root():
@@ -0,0 +1,78 @@
+# app/schemas/analytics.py
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+class CategoryTotal(BaseModel):
+    category: str
+    total: float
+
+class DateTotal(BaseModel):
+    date: date  # bucket start
+    total: float  # same as expense; kept for older clients
+    income: float = 0
+    expense: float = 0
+    net: float = 0
+
+class BalancePoint(BaseModel):
+    date: date  # bucket start
+    income: float
+    expense: float
+    net: float
+    cumulative_income: float  # since the start of the requested window
+    cumulative_expense: float
+    balance: float  # opening_balance + cumulative net
+
+class BalanceSeries(BaseModel):
+    opening_balance: float
+    currency: Optional[str]  # reporting currency of all amounts
+    points: List[BalancePoint]
+
+class SummaryTotals(BaseModel):
+    income: float
+    expense: float
+    net: float
+    count: int
+
+class SummaryCategory(BaseModel):
+    category_id: Optional[int]  # None = uncategorized
+    category: str
+    total: float
+    count: int
+
+class PeriodTotal(BaseModel):
+    date: date
+    income: float
+    expense: float
+    net: float
+
+class MerchantTotal(BaseModel):
+    merchant: str
+    total: float
+    count: int
+
+class DashboardSummary(BaseModel):
+    start_date: Optional[date]
+    end_date: Optional[date]
+    granularity: str
+    currency: Optional[str]  # reporting currency of all amounts
+    totals: SummaryTotals
+    by_category: List[SummaryCategory]
+    by_period: List[PeriodTotal]
+    top_merchants: List[MerchantTotal]
+
+class RecurringSeriesOut(BaseModel):
+    id: int
+    merchant: Optional[str]
+    merchant_key: str
+    type: str
+    currency: str
+    category_id: Optional[int]
+    cadence: str  # weekly | biweekly | monthly | quarterly | yearly
+    interval_days: int
+    amount: float  # median amount
+    occurrences: int
+    first_date: date
+    last_date: date
+    next_date: date  # predicted
+    confidence: float
@@ -0,0 +1,51 @@
+# app/schemas/budget.py
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Optional
+from decimal import Decimal
+from enum import Enum
+
+class BudgetPeriod(str, Enum):
+    weekly = "weekly"
+    monthly = "monthly"
+    quarterly = "quarterly"
+    yearly = "yearly"
+
+class BudgetCreate(BaseModel):
+    category_id: Optional[int] = None  # None = all expenses
+    period: BudgetPeriod = BudgetPeriod.monthly
+    limit: Decimal = Field(..., gt=0)
+    currency: str = "INR"
+    alert_threshold: int = Field(80, ge=1, le=100)
+
+class BudgetUpdate(BaseModel):
+    limit: Optional[Decimal] = Field(None, gt=0)
+    alert_threshold: Optional[int] = Field(None, ge=1, le=100)
+
+class BudgetOut(BaseModel):
+    id: int
+    user_id: int
+    category_id: Optional[int]
+    period: BudgetPeriod
+    limit: str
+    currency: str
+    alert_threshold: int
+    period_start: date
+    period_end: date
+    spent: str
+    remaining: str
+    percent_used: Optional[float]
+    status: str  # ok | warning | exceeded
+
+class BudgetAlertOut(BaseModel):
+    id: int
+    budget_id: int
+    period_start: date
+    level: str
+    spent: str
+    limit_amount: str
+    created_at: datetime
+    acknowledged: bool
+
+    class Config:
+        orm_mode = True
@@ -1,19 +1,46 @@
 # app/schemas/receipt.py
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import date, datetime
 
 class ReceiptOut(BaseModel):
     id: int
     user_id: int
     file_path: str
+    # WebP derivatives (GET /derivatives/...); None for non-image uploads
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     uploaded_at: datetime
+    status: str = Field("pending", description="OCR state: pending | done | failed")
+    total: Optional[str] = Field(None, description="parsed total as a decimal string")
+    merchant: Optional[str] = None
+    receipt_date: Optional[date] = None
     raw_text: Optional[str] = None
     parsed_json: Optional[str] = None
 
     class Config:
         orm_mode = True
 
+class ReceiptListItem(BaseModel):
+    # any subset of ReceiptOut, picked with GET /receipts?fields=
+    id: Optional[int] = None
+    user_id: Optional[int] = None
+    file_path: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
+    uploaded_at: Optional[datetime] = None
+    status: Optional[str] = None
+    total: Optional[str] = None
+    merchant: Optional[str] = None
+    receipt_date: Optional[date] = None
+    raw_text: Optional[str] = None
+    parsed_json: Optional[str] = None
+
+class ReceiptPage(BaseModel):
+    items: List[ReceiptListItem]
+    next_cursor: Optional[int] = Field(None, description="pass as ?cursor= for the next page; null on the last one")
+    limit: int
+
 class ReceiptCreate(BaseModel):
     # no body fields needed for simple upload; kept for future metadata
     pass
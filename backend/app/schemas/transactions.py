@@ -1,7 +1,7 @@
 ﻿# app/schemas/transactions.py
-from pydantic import BaseModel, condecimal
-from typing import Optional
-from datetime import date
+from pydantic import BaseModel, Field, condecimal
+from typing import Optional, List
+from datetime import date, datetime
 
 class TransactionBase(BaseModel):
     type: str  # "income" or "expense"
@@ -31,3 +31,29 @@ class TransactionList(BaseModel):
     total: int
     page: int
     page_size: int
+
+# --- response shapes used by app/api/v1/transactions.py ---
+# Handlers build plain dicts matching these models and render them with
+# FastJSONResponse; the models document the contract in OpenAPI.
+
+class CategoryRef(BaseModel):
+    id: int
+    name: str
+
+class TransactionOut(BaseModel):
+    id: int
+    user_id: int
+    type: Optional[str] = None
+    amount: str = Field(..., description="decimal amount as a string, e.g. '250.50'")
+    currency: Optional[str] = None
+    date: Optional[date]  # no default: it would shadow the type
+    description: Optional[str] = None
+    category_id: Optional[int] = None
+    category: Optional[CategoryRef] = None
+    created_at: Optional[datetime] = None
+
+class TransactionPage(BaseModel):
+    total: int
+    page: int
+    per_page: int
+    items: List[TransactionOut]
@@ -0,0 +1,310 @@
+# app/services/archive.py
+"""
+Cold storage for closed years of transactions.
+
+`archive_user` moves a user's transactions dated in closed years out of the
+transactions table into one zstd-compressed Parquet file per (user, year)
+under settings.ARCHIVE_DIR, and records each file in transaction_archives
+(the manifest). Rows are moved, not deleted through app/services/ledger.py:
+rollups and budget spend are aggregates that already count them and stay as
+they are, so the rollup-based analytics (by_category, by_date, balance)
+need nothing else. Everything that reads raw rows unions the hot table with
+the partitions:
+
+  - list/get transactions (app/api/v1/transactions.py)
+  - the dashboard summary (app/services/summary.py)
+  - the NumPy frames behind /analytics/stats (app/services/columnar.py)
+  - rollups.rebuild
+
+Partitions are immutable. Archiving more rows into a year that already has
+a file (e.g. an old statement imported later) writes a new file and swaps
+the manifest row in the same DB transaction that deletes the hot rows; the
+superseded file is removed by a later run once older than
+ARCHIVE_GRACE_SECONDS, since a lagging replica may still point at it.
+Archived rows are read-only.
+
+Decoded partitions are kept in a small LRU keyed by file path. Nothing here
+touches pyarrow unless the user has partitions, so the app runs without it
+until something is archived.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.lazy import available, lazy_import
+from app.db import models
+from app.services.data_version import bump_data_version
+
+# optional columnar stack, imported on first use (app/core/lazy.py)
+PYARROW_AVAILABLE = available("pyarrow")
+pa = lazy_import("pyarrow")
+pc = lazy_import("pyarrow.compute")
+pq = lazy_import("pyarrow.parquet")
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("id", "user_id", "type", "amount", "currency", "date", "description", "category_id", "created_at")
+_DELETE_CHUNK = 1000
+
+
+def _ensure_pyarrow() -> None:
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow not available. pip install pyarrow")
+
+
+def _schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("type", pa.string()),
+        ("amount", pa.decimal128(12, 2)),
+        ("currency", pa.string()),
+        ("date", pa.date32()),
+        ("description", pa.string()),
+        ("category_id", pa.int64()),
+        ("created_at", pa.timestamp("us")),
+    ])
+
+
+def closed_through_year(today: Optional[date] = None) -> int:
+    """Last year that may be archived: everything before the ARCHIVE_HOT_YEARS most recent ones."""
+    return (today or date.today()).year - max(settings.ARCHIVE_HOT_YEARS, 1)
+
+
+# --- reading ---
+
+class PartitionCache:
+    """LRU of decoded partitions; paths are never rewritten, so entries never go stale."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._tables: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str):
+        with self._lock:
+            table = self._tables.get(path)
+            if table is not None:
+                self._tables.move_to_end(path)
+                return table
+        table = pq.read_table(os.path.join(settings.ARCHIVE_DIR, path))
+        with self._lock:
+            self._tables[path] = table
+            while len(self._tables) > self.max_entries:
+                self._tables.popitem(last=False)
+        return table
+
+
+partitions_cache = PartitionCache(settings.ARCHIVE_CACHE_PARTITIONS)
+
+
+def partitions(db: Session, user_id: int, start_date: Optional[date] = None,
+               end_date: Optional[date] = None) -> List[models.TransactionArchive]:
+    """Manifest rows of the user's partitions overlapping [start_date, end_date]."""
+    A = models.TransactionArchive
+    q = db.query(A).filter(A.user_id == user_id)
+    if start_date:
+        q = q.filter(A.max_date >= start_date)
+    if end_date:
+        q = q.filter(A.min_date <= end_date)
+    return q.order_by(A.year).all()
+
+
+def category_names(db: Session, user_id: int) -> Dict[int, str]:
+    rows = db.query(models.Category.id, models.Category.name).filter(models.Category.user_id == user_id).all()
+    return {cid: name for cid, name in rows}
+
+
+def read_rows(parts: Sequence[models.TransactionArchive], known_categories, start_date: Optional[date] = None,
+              end_date: Optional[date] = None, ttype: Optional[str] = None,
+              columns: Sequence[str] = COLUMNS):
+    """
+    Archived rows of `parts` in range as one pyarrow Table. Category ids no
+    longer in known_categories become null, as the hot rows' did (ON DELETE
+    SET NULL) when the category was deleted.
+    """
+    _ensure_pyarrow()
+    tables = [partitions_cache.get(p.path) for p in parts]
+    table = pa.concat_tables(tables) if tables else _schema().empty_table()
+    mask = None
+    for cond in (
+        pc.greater_equal(table["date"], pa.scalar(start_date, pa.date32())) if start_date else None,
+        pc.less_equal(table["date"], pa.scalar(end_date, pa.date32())) if end_date else None,
+        pc.equal(table["type"], ttype) if ttype else None,
+    ):
+        if cond is not None:
+            mask = cond if mask is None else pc.and_(mask, cond)
+    if mask is not None:
+        table = table.filter(mask)
+    if "category_id" in columns:
+        cats = table["category_id"]
+        live = pc.is_in(cats, value_set=pa.array(sorted(known_categories), pa.int64()))
+        table = table.set_column(
+            table.schema.get_field_index("category_id"), "category_id",
+            pc.if_else(live, cats, pa.scalar(None, pa.int64())),
+        )
+    return table.select(list(columns))
+
+
+def find(db: Session, user_id: int, txn_id: int) -> Optional[Dict]:
+    """
+    An archived transaction by id, or None (partitions are pruned by their id
+    range). category_id is as archived; check it against the live categories.
+    """
+    A = models.TransactionArchive
+    parts = db.query(A).filter(A.user_id == user_id, A.min_id <= txn_id, A.max_id >= txn_id).all()
+    if not parts:
+        return None
+    _ensure_pyarrow()
+    for p in parts:
+        table = partitions_cache.get(p.path)
+        hit = table.filter(pc.equal(table["id"], txn_id))
+        if hit.num_rows:
+            return hit.to_pylist()[0]
+    return None
+
+
+def daily_totals(db: Session, user_id: int) -> List[tuple]:
+    """(day, type, category_id or None, currency, sum(amount), count) over all of the user's partitions."""
+    parts = partitions(db, user_id)
+    if not parts:
+        return []
+    table = read_rows(parts, category_names(db, user_id), columns=("date", "type", "category_id", "currency", "amount"))
+    grouped = table.group_by(["date", "type", "category_id", "currency"]).aggregate([("amount", "sum"), ("amount", "count")])
+    return [
+        (r["date"], models.TransactionType(r["type"]), r["category_id"], r["currency"], r["amount_sum"], r["amount_count"])
+        for r in grouped.to_pylist()
+    ]
+
+
+# --- writing ---
+
+def _abs(path: str) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, path)
+
+
+def _write(table, path: str) -> None:
+    """Write atomically: temp file in the same directory, fsync, rename."""
+    final = _abs(path)
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+    tmp = os.path.join(os.path.dirname(final), f".tmp-{uuid.uuid4().hex}.parquet")
+    try:
+        pq.write_table(table, tmp, compression="zstd")
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, final)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _rows_to_table(rows) -> "pa.Table":
+    schema = _schema()
+    data = {name: [] for name in COLUMNS}
+    for r in rows:
+        data["id"].append(r.id)
+        data["user_id"].append(r.user_id)
+        data["type"].append(r.type.value)
+        data["amount"].append(r.amount)
+        data["currency"].append(r.currency)
+        data["date"].append(r.date)
+        data["description"].append(r.description)
+        data["category_id"].append(r.category_id)
+        data["created_at"].append(r.created_at)
+    return pa.table(data, schema=schema)
+
+
+def sweep(db: Session, user_id: int) -> int:
+    """Delete the user's partition files no manifest row points at, once past the grace period."""
+    user_dir = _abs(f"user={user_id}")
+    if not os.path.isdir(user_dir):
+        return 0
+    A = models.TransactionArchive
+    live = {os.path.basename(p) for (p,) in db.query(A.path).filter(A.user_id == user_id)}
+    cutoff = time.time() - settings.ARCHIVE_GRACE_SECONDS
+    removed = 0
+    for name in os.listdir(user_dir):
+        path = os.path.join(user_dir, name)
+        if name.endswith(".parquet") and name not in live and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def archive_user(db: Session, user_id: int, through_year: Optional[int] = None) -> Dict[int, int]:
+    """
+    Move the user's transactions dated up to the end of through_year (default:
+    closed_through_year()) into partitions, committing once per year.
+    Returns {year: rows moved}.
+    """
+    _ensure_pyarrow()
+    through_year = closed_through_year() if through_year is None else through_year
+    T, A = models.Transaction, models.TransactionArchive
+    sweep(db, user_id)
+    oldest = db.query(T.date).filter(T.user_id == user_id, T.date <= date(through_year, 12, 31)) \
+        .order_by(T.date).limit(1).scalar()
+    moved: Dict[int, int] = {}
+    if oldest is None:
+        return moved
+    for year in range(oldest.year, through_year + 1):
+        rows = (
+            db.query(T.id, T.user_id, T.type, T.amount, T.currency, T.date, T.description, T.category_id, T.created_at)
+            .filter(T.user_id == user_id, T.date >= date(year, 1, 1), T.date <= date(year, 12, 31))
+            .order_by(T.id)
+            .with_for_update()  # an edit racing the move would be lost otherwise
+            .all()
+        )
+        if not rows:
+            db.rollback()
+            continue
+        table = _rows_to_table(rows)
+        manifest = db.query(A).filter(A.user_id == user_id, A.year == year).with_for_update().first()
+        if manifest is not None:
+            table = pa.concat_tables([partitions_cache.get(manifest.path).cast(table.schema), table]) \
+                .sort_by([("id", "ascending")])
+        path = f"user={user_id}/year={year}-{int(time.time() * 1000)}.parquet"
+        _write(table, path)
+        try:
+            if manifest is None:
+                manifest = A(user_id=user_id, year=year)
+                db.add(manifest)
+            ids = pc.min_max(table["id"]).as_py()
+            days = pc.min_max(table["date"]).as_py()
+            manifest.path = path
+            manifest.row_count = table.num_rows
+            manifest.min_id, manifest.max_id = ids["min"], ids["max"]
+            manifest.min_date, manifest.max_date = days["min"], days["max"]
+            hot_ids = [r.id for r in rows]
+            for i in range(0, len(hot_ids), _DELETE_CHUNK):
+                db.query(T).filter(T.id.in_(hot_ids[i:i + _DELETE_CHUNK])).delete(synchronize_session=False)
+            bump_data_version(db, user_id)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            os.remove(_abs(path))
+            raise
+        moved[year] = len(rows)
+        logger.info("archived %s transactions of user %s for %s into %s", len(rows), user_id, year, path)
+    return moved
+
+
+def archive_users(db: Session, user_ids: Optional[Sequence[int]] = None, through_year: Optional[int] = None) -> int:
+    """archive_user for each user (default: all). Returns the number of rows moved."""
+    if user_ids is None:
+        user_ids = [uid for (uid,) in db.query(models.User.id).order_by(models.User.id).all()]
+    return sum(sum(archive_user(db, uid, through_year).values()) for uid in user_ids)
+
+
+__all__ = [
+    "PYARROW_AVAILABLE", "COLUMNS", "closed_through_year", "partitions", "category_names", "read_rows", "find",
+    "daily_totals", "sweep", "archive_user", "archive_users", "partitions_cache",
+]
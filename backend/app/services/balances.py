@@ -0,0 +1,123 @@
+# app/services/balances.py
+"""
+Running balance / cumulative series over the rollup tables.
+
+The window's buckets are summed with SQL window functions
+(SUM(...) OVER (ORDER BY bucket)) and offset by an opening balance computed
+from the buckets before start_date, so only the requested window is read and
+transferred. Engines without window functions (MySQL < 8, SQLite < 3.25)
+get the same result from a running sum in Python.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.services import fx, rollups, time_buckets
+
+
+def supports_window_functions(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    version = dialect.server_version_info or ()
+    if dialect.name == "sqlite":
+        import sqlite3
+        return sqlite3.sqlite_version_info >= (3, 25)
+    if dialect.name == "mysql":
+        if getattr(dialect, "is_mariadb", False):
+            return tuple(version[:2]) >= (10, 2)
+        return tuple(version[:1]) >= (8,)
+    return dialect.name in ("postgresql", "mssql", "oracle")
+
+
+def _net(R, amount=None):
+    amount = R.total if amount is None else amount
+    return func.sum(case((R.type == models.TransactionType.income, amount), else_=-amount))
+
+
+def opening_balance(
+    db: Session, user_id: int, start_date: Optional[date], reporting_currency: Optional[str] = None,
+) -> Decimal:
+    """
+    income - expense strictly before start_date: whole months from
+    rollup_monthly, the rest from rollup_daily. When amounts need converting
+    to reporting_currency, everything comes from rollup_daily (rates are daily).
+    """
+    if start_date is None:
+        return Decimal("0")
+    M, D = models.MonthlyRollup, models.DailyRollup
+    if reporting_currency is not None and fx.needs_conversion(db, user_id, reporting_currency):
+        amount = fx.converted(D.total, D.currency, D.day, reporting_currency)
+        net = db.query(_net(D, amount)).filter(D.user_id == user_id, D.day < start_date).scalar()
+        return Decimal(str(net or 0))
+    first_of_month = rollups.month_start(start_date)
+    months = db.query(_net(M)).filter(M.user_id == user_id, M.month < first_of_month).scalar()
+    days = db.query(_net(D)).filter(D.user_id == user_id, D.day >= first_of_month, D.day < start_date).scalar()
+    return Decimal(str(months or 0)) + Decimal(str(days or 0))
+
+
+def balance_series(
+    db: Session,
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    granularity: str = "month",
+    reporting_currency: Optional[str] = None,
+) -> Dict:
+    """
+    {"opening_balance": float, "points": [...]} where each point has the
+    bucket's income/expense/net, cumulative income/expense since the start
+    of the window and the running balance (opening + cumulative net).
+    """
+    q, sql_bucketed = rollups.bucketed_query(db, user_id, start_date, end_date, granularity, reporting_currency)
+    opening = opening_balance(db, user_id, start_date, reporting_currency)
+
+    per_bucket: Dict[date, List[Decimal]] = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    if sql_bucketed and supports_window_functions(db):
+        sub = q.subquery()
+        order = sub.c.bucket
+        windowed = db.query(
+            sub.c.bucket, sub.c.income, sub.c.expense,
+            func.sum(sub.c.income).over(order_by=order).label("cum_income"),
+            func.sum(sub.c.expense).over(order_by=order).label("cum_expense"),
+        ).order_by(order)
+        cumulative = {}
+        for b, inc, exp, cum_inc, cum_exp in windowed.all():
+            per_bucket[b] = [Decimal(str(inc or 0)), Decimal(str(exp or 0))]
+            cumulative[b] = (Decimal(str(cum_inc or 0)), Decimal(str(cum_exp or 0)))
+    else:
+        for b, inc, exp in q.all():
+            acc = per_bucket[time_buckets.floor(b, granularity)]
+            acc[0] += Decimal(str(inc or 0))
+            acc[1] += Decimal(str(exp or 0))
+        cumulative = {}
+        cum_inc = cum_exp = Decimal("0")
+        for b in sorted(per_bucket):
+            cum_inc += per_bucket[b][0]
+            cum_exp += per_bucket[b][1]
+            cumulative[b] = (cum_inc, cum_exp)
+
+    points = []
+    if per_bucket or (start_date is not None and end_date is not None):
+        first = start_date or min(per_bucket)
+        last = end_date or max(per_bucket)
+        carry = (Decimal("0"), Decimal("0"))
+        for b in time_buckets.iter_buckets(first, last, granularity):
+            inc, exp = per_bucket.get(b, (Decimal("0"), Decimal("0")))
+            carry = cumulative.get(b, carry)  # empty buckets carry the previous totals
+            points.append({
+                "date": b,
+                "income": float(inc),
+                "expense": float(exp),
+                "net": float(inc - exp),
+                "cumulative_income": float(carry[0]),
+                "cumulative_expense": float(carry[1]),
+                "balance": float(opening + carry[0] - carry[1]),
+            })
+    return {"opening_balance": float(opening), "points": points}
+
+
+__all__ = ["balance_series", "opening_balance", "supports_window_functions"]
@@ -0,0 +1,202 @@
+# app/services/budgets.py
+"""
+Budgets with incrementally tracked spend.
+
+budget_spend keeps one running total per (budget, period). ledger.py calls
+`apply_changes` inside every transaction write, so reading "spent vs limit"
+is a lookup per budget instead of a GROUP BY over the period. Threshold
+crossings are detected right there, at write time, and recorded as
+BudgetAlert rows.
+
+A spend row that does not exist yet (new period, or a back-dated transaction
+into a period nobody wrote to since the budget was created) is seeded from
+the daily rollups, so it always matches the full period.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.services import time_buckets
+
+PERIODS = {"weekly": "week", "monthly": "month", "quarterly": "quarter", "yearly": "year"}
+
+LEVEL_OK, LEVEL_WARNING, LEVEL_EXCEEDED = 0, 1, 2
+LEVEL_NAMES = {LEVEL_WARNING: "warning", LEVEL_EXCEEDED: "exceeded"}
+
+CENT = Decimal("0.01")
+
+
+def money(value) -> str:
+    """Amount as the API shows it: a string with two decimals ("0.00", not "0")."""
+    return str(Decimal(str(value or 0)).quantize(CENT))
+
+
+def period_bounds(period: str, d: date) -> Tuple[date, date]:
+    granularity = PERIODS[period]
+    start = time_buckets.floor(d, granularity)
+    return start, time_buckets.next_bucket(start, granularity) - timedelta(days=1)
+
+
+def alert_level(budget: models.Budget, spent: Decimal) -> int:
+    limit = Decimal(str(budget.limit_amount))
+    if limit <= 0:
+        return LEVEL_EXCEEDED if spent > 0 else LEVEL_OK
+    if spent >= limit:
+        return LEVEL_EXCEEDED
+    if spent * 100 >= limit * budget.alert_threshold:
+        return LEVEL_WARNING
+    return LEVEL_OK
+
+
+def _matches(budget: models.Budget, txn) -> bool:
+    if txn.type != models.TransactionType.expense:
+        return False
+    if (txn.currency or "INR") != budget.currency:
+        return False
+    return budget.category_id is None or budget.category_id == txn.category_id
+
+
+def seed_spent(db: Session, budget: models.Budget, period_start: date) -> Decimal:
+    """Spend for a whole period from rollup_daily (O(days in period))."""
+    _, period_end = period_bounds(budget.period, period_start)
+    R = models.DailyRollup
+    q = db.query(func.sum(R.total)).filter(
+        R.user_id == budget.user_id,
+        R.type == models.TransactionType.expense,
+        R.currency == budget.currency,
+        R.day >= period_start,
+        R.day <= period_end,
+    )
+    if budget.category_id is not None:
+        q = q.filter(R.category_id == budget.category_id)
+    return Decimal(str(q.scalar() or 0))
+
+
+def _spend_row(db: Session, budget: models.Budget, period_start: date) -> models.BudgetSpend:
+    row = (
+        db.query(models.BudgetSpend)
+        .filter(models.BudgetSpend.budget_id == budget.id, models.BudgetSpend.period_start == period_start)
+        .with_for_update()
+        .first()
+    )
+    if row is None:
+        spent = seed_spent(db, budget, period_start)
+        row = models.BudgetSpend(
+            budget_id=budget.id, period_start=period_start, spent=spent, alert_level=alert_level(budget, spent),
+        )
+        db.add(row)
+    return row
+
+
+def _set_spent(db: Session, budget: models.Budget, row: models.BudgetSpend, spent: Decimal) -> None:
+    """Store the new total; raise an alert when it climbs into a higher level."""
+    level = alert_level(budget, spent)
+    if level > (row.alert_level or LEVEL_OK):
+        db.add(models.BudgetAlert(
+            user_id=budget.user_id,
+            budget_id=budget.id,
+            period_start=row.period_start,
+            level=LEVEL_NAMES[level],
+            spent=spent,
+            limit_amount=budget.limit_amount,
+        ))
+    row.spent = spent
+    row.alert_level = level
+
+
+def apply_changes(db: Session, changes: Iterable[Tuple[object, int]]) -> None:
+    """
+    Apply (transaction_or_snapshot, sign) pairs to budget spend. Must run
+    before rollups.apply_changes for the same write, so seeding a missing
+    spend row does not count the change twice.
+    """
+    changes = [(t, sign) for t, sign in changes if t.type == models.TransactionType.expense]
+    if not changes:
+        return
+    user_ids = {t.user_id for t, _ in changes}
+    budgets = db.query(models.Budget).filter(models.Budget.user_id.in_(user_ids)).all()
+    if not budgets:
+        return
+
+    deltas: Dict[Tuple[int, date], Decimal] = defaultdict(Decimal)
+    by_id = {b.id: b for b in budgets}
+    for txn, sign in changes:
+        for b in budgets:
+            if b.user_id == txn.user_id and _matches(b, txn):
+                start, _ = period_bounds(b.period, txn.date)
+                deltas[(b.id, start)] += Decimal(str(txn.amount)) * sign
+
+    for (budget_id, start), delta in deltas.items():
+        if delta == 0:
+            continue
+        budget = by_id[budget_id]
+        row = _spend_row(db, budget, start)
+        _set_spent(db, budget, row, Decimal(str(row.spent or 0)) + delta)
+
+
+def current_status(db: Session, budgets: List[models.Budget], today: Optional[date] = None) -> List[Dict]:
+    """Spent / remaining for each budget's current period: one spend lookup for all budgets."""
+    today = today or date.today()
+    bounds = {b.id: period_bounds(b.period, today) for b in budgets}
+    rows = {}
+    if budgets:
+        S = models.BudgetSpend
+        for r in db.query(S).filter(S.budget_id.in_(list(bounds))).filter(
+            S.period_start.in_({start for start, _ in bounds.values()})
+        ).all():
+            rows[(r.budget_id, r.period_start)] = r
+
+    out = []
+    for b in budgets:
+        start, end = bounds[b.id]
+        row = rows.get((b.id, start))
+        if row is None:
+            # no expense written this period yet (or budget just created): seed lazily
+            spent = seed_spent(db, b, start)
+            level = alert_level(b, spent)
+        else:
+            spent = Decimal(str(row.spent or 0))
+            level = row.alert_level or LEVEL_OK
+        limit = Decimal(str(b.limit_amount))
+        out.append({
+            "id": b.id,
+            "user_id": b.user_id,
+            "category_id": b.category_id,
+            "period": b.period,
+            "limit": money(limit),
+            "currency": b.currency,
+            "alert_threshold": b.alert_threshold,
+            "period_start": start,
+            "period_end": end,
+            "spent": money(spent),
+            "remaining": money(limit - spent),
+            "percent_used": float(spent * 100 / limit) if limit > 0 else None,
+            "status": LEVEL_NAMES.get(level, "ok"),
+        })
+    return out
+
+
+def reevaluate(db: Session, budget: models.Budget) -> None:
+    """After a limit/threshold change: recompute the current period's level (may raise an alert)."""
+    start, _ = period_bounds(budget.period, date.today())
+    row = _spend_row(db, budget, start)
+    _set_spent(db, budget, row, Decimal(str(row.spent or 0)))
+
+
+def drop_category(db: Session, user_id: int, category_id: int) -> None:
+    """Budgets of a deleted category go with it."""
+    ids = [bid for (bid,) in db.query(models.Budget.id).filter(
+        models.Budget.user_id == user_id, models.Budget.category_id == category_id).all()]
+    if not ids:
+        return
+    for model in (models.BudgetAlert, models.BudgetSpend):
+        db.query(model).filter(model.budget_id.in_(ids)).delete(synchronize_session=False)
+    db.query(models.Budget).filter(models.Budget.id.in_(ids)).delete(synchronize_session=False)
+
+
+__all__ = ["PERIODS", "period_bounds", "alert_level", "apply_changes", "current_status", "money", "reevaluate", "drop_category"]
@@ -0,0 +1,171 @@
+# app/services/cache.py
+"""
+Per-user result cache for analytics endpoints.
+
+Keys are (user, data version, endpoint, params). The data version is the
+per-user counter every transaction/category write bumps in its own DB
+transaction (app/services/data_version.py); routes read it through the
+request's session, the same read the ETag uses (app/api/v1/etag.py). A
+write made by any worker or process therefore changes the key for every
+cache at once, without broadcasting anything; stale entries are never read
+again and simply age out.
+
+Backends:
+  - MemoryBackend: in-process LRU with TTL (default)
+  - RedisBackend: shared across workers; works with any redis-py compatible
+    client (get / set(ex=)), e.g. a local redis-server or fakeredis
+
+Concurrent identical misses are coalesced (single flight): one thread runs
+the query, the others wait for its result.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.concurrency import wait_event
+from app.core.config import settings
+from app.core.json_response import dumps
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """Thread-safe LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: int = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Shared cache; values are stored as JSON so every worker can read them."""
+
+    def __init__(self, client, ttl_seconds: int = 300, prefix: str = "analytics"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(f"{self.prefix}:{key}")
+        if raw is None:
+            return _MISSING
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(f"{self.prefix}:{key}", dumps(value), ex=self.ttl_seconds)
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    def __init__(self, backend=None, flight_timeout: float = 30.0):
+        self.backend = backend  # None disables caching (single flight still applies)
+        self.flight_timeout = flight_timeout
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+
+    def _key(self, user_id: int, version: int, endpoint: str, params: Dict[str, Any]) -> str:
+        # params may hold dates / None; str() keeps the key stable and readable
+        parts = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{user_id}:{version}:{endpoint}?{parts}"
+
+    def get_or_compute(
+        self, user_id: int, version: int, endpoint: str, params: Dict[str, Any], compute: Callable[[], Any]
+    ) -> Any:
+        """
+        Cached result of compute() at the user's data `version`, which the
+        caller reads through the session compute() queries.
+        """
+        key = self._key(user_id, version, endpoint, params)
+        if self.backend is not None:
+            try:
+                hit = self.backend.get(key)
+            except Exception:
+                logger.exception("analytics cache get failed; computing directly")
+                hit = _MISSING
+            if hit is not _MISSING:
+                return hit
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if wait_event(flight.done, self.flight_timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            return compute()  # leader is stuck; don't hang the request
+
+        try:
+            flight.value = compute()
+            if self.backend is not None:
+                try:
+                    self.backend.set(key, flight.value)
+                except Exception:
+                    logger.exception("analytics cache set failed")
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            flight.done.set()
+            with self._flights_lock:
+                self._flights.pop(key, None)
+
+
+def build_backend(kind: str):
+    if kind == "none":
+        return None
+    if kind == "redis":
+        try:
+            import redis  # type: ignore
+        except Exception:
+            logger.warning("ANALYTICS_CACHE_BACKEND=redis but the redis package is missing; using memory")
+        else:
+            return RedisBackend(redis.Redis.from_url(settings.REDIS_URL), ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS)
+    return MemoryBackend(settings.ANALYTICS_CACHE_MAX_ENTRIES, settings.ANALYTICS_CACHE_TTL_SECONDS)
+
+
+analytics_cache = ResultCache(build_backend(settings.ANALYTICS_CACHE_BACKEND))
+
+__all__ = ["MemoryBackend", "RedisBackend", "ResultCache", "analytics_cache", "build_backend"]
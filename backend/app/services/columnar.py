@@ -0,0 +1,353 @@
+# app/services/columnar.py
+"""
+Per-user columnar (NumPy) copy of the transactions table for heavy analytics.
+
+A user's id/date/amount/type/category columns are loaded once into compact
+arrays (UserFrame) and kept in a bounded LRU. Writes made through
+app/services/ledger.py are queued on the session and patched into a cached
+frame after the commit, so the frame stays current without a reload. Each
+frame carries the data version it reflects; if the DB version moved on
+without us (another worker wrote), the frame is reloaded on next use.
+
+Statistics (percentiles, moving averages, z-score outliers, category share
+over time) are computed vectorized on the arrays.
+"""
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.lazy import available, lazy_import
+from app.db import models
+from app.services import archive
+from app.services.data_version import get_data_version
+
+# optional numeric stack, imported on first use (app/core/lazy.py)
+NUMPY_AVAILABLE = available("numpy")
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# session.info key holding queued frame patches for the current DB transaction
+_PENDING_KEY = "columnar_pending_patches"
+
+INCOME, EXPENSE = 1, 0
+UNCATEGORIZED = 0
+_EPOCH = date(1970, 1, 1)
+
+
+def _ensure_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy not available. pip install numpy")
+
+
+def to_day(d: date) -> int:
+    return (d - _EPOCH).days
+
+
+def from_day(n: int) -> date:
+    return date.fromordinal(_EPOCH.toordinal() + int(n))
+
+
+class UserFrame:
+    """Columns sorted by transaction id."""
+
+    __slots__ = ("version", "ids", "days", "amounts", "types", "categories")
+
+    def __init__(self, version: int, ids, days, amounts, types, categories):
+        self.version = version
+        self.ids = ids              # int64
+        self.days = days            # int32, days since 1970-01-01
+        self.amounts = amounts      # float64
+        self.types = types          # int8, INCOME / EXPENSE
+        self.categories = categories  # int32, 0 = uncategorized
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.ids, self.days, self.amounts, self.types, self.categories))
+
+    # --- incremental patches (called with the store lock held) ---
+
+    def upsert(self, snap) -> None:
+        row = (snap.id, to_day(snap.date), float(snap.amount),
+               INCOME if snap.type == models.TransactionType.income else EXPENSE,
+               snap.category_id or UNCATEGORIZED)
+        i = int(np.searchsorted(self.ids, snap.id))
+        if i < len(self) and self.ids[i] == snap.id:
+            _, self.days[i], self.amounts[i], self.types[i], self.categories[i] = row
+            return
+        self.ids = np.insert(self.ids, i, row[0])
+        self.days = np.insert(self.days, i, row[1])
+        self.amounts = np.insert(self.amounts, i, row[2])
+        self.types = np.insert(self.types, i, row[3])
+        self.categories = np.insert(self.categories, i, row[4])
+
+    def delete(self, txn_id: int) -> None:
+        i = int(np.searchsorted(self.ids, txn_id))
+        if i < len(self) and self.ids[i] == txn_id:
+            self.ids = np.delete(self.ids, i)
+            self.days = np.delete(self.days, i)
+            self.amounts = np.delete(self.amounts, i)
+            self.types = np.delete(self.types, i)
+            self.categories = np.delete(self.categories, i)
+
+    def drop_category(self, category_id: int) -> None:
+        self.categories[self.categories == category_id] = UNCATEGORIZED
+
+
+def load_frame(db: Session, user_id: int, version: int) -> UserFrame:
+    _ensure_numpy()
+    T = models.Transaction
+    rows = db.execute(
+        select(T.id, T.date, T.amount, T.type, T.category_id)
+        .where(T.user_id == user_id)
+        .order_by(T.id)
+    ).all()
+    n = len(rows)
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+    days = np.fromiter((to_day(r[1]) for r in rows), dtype=np.int32, count=n)
+    amounts = np.fromiter((float(r[2]) for r in rows), dtype=np.float64, count=n)
+    types = np.fromiter((INCOME if r[3] == models.TransactionType.income else EXPENSE for r in rows), dtype=np.int8, count=n)
+    categories = np.fromiter((r[4] or UNCATEGORIZED for r in rows), dtype=np.int32, count=n)
+    parts = archive.partitions(db, user_id)
+    if parts:
+        # closed years in cold storage: append their columns and restore id order
+        cold = archive.read_rows(parts, archive.category_names(db, user_id),
+                                 columns=("id", "date", "amount", "type", "category_id"))
+        pc = archive.pc
+        ids = np.concatenate([ids, cold["id"].to_numpy().astype(np.int64)])
+        days = np.concatenate([days, pc.cast(cold["date"], "int32").to_numpy().astype(np.int32)])
+        amounts = np.concatenate([amounts, pc.cast(cold["amount"], "float64").to_numpy()])
+        types = np.concatenate([types, pc.equal(cold["type"], "income").to_numpy().astype(np.int8)])
+        categories = np.concatenate([categories, pc.fill_null(cold["category_id"], UNCATEGORIZED).to_numpy().astype(np.int32)])
+        order = np.argsort(ids, kind="stable")
+        ids, days, amounts, types, categories = (a[order] for a in (ids, days, amounts, types, categories))
+    return UserFrame(version, ids, days, amounts, types, categories)
+
+
+class FrameStore:
+    """Bounded LRU of UserFrames keyed by user id."""
+
+    def __init__(self, max_users: int = 64):
+        self.max_users = max_users
+        self._frames: "OrderedDict[int, UserFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> UserFrame:
+        version = get_data_version(db, user_id)
+        with self._lock:
+            frame = self._frames.get(user_id)
+            if frame is not None and frame.version == version:
+                self._frames.move_to_end(user_id)
+                return frame
+        frame = load_frame(db, user_id, version)
+        with self._lock:
+            self._frames[user_id] = frame
+            self._frames.move_to_end(user_id)
+            while len(self._frames) > self.max_users:
+                self._frames.popitem(last=False)
+        return frame
+
+    def apply(self, user_id: int, patches: List[Tuple[str, object]]) -> None:
+        with self._lock:
+            frame = self._frames.get(user_id)
+            if frame is None:
+                return
+            try:
+                for op, arg in patches:
+                    if op == "upsert":
+                        frame.upsert(arg)
+                    elif op == "delete":
+                        frame.delete(arg)
+                    elif op == "drop_category":
+                        frame.drop_category(arg)
+                # one committed write == one data version bump
+                frame.version += 1
+            except Exception:
+                logger.exception("columnar patch failed for user %s; dropping frame", user_id)
+                self._frames.pop(user_id, None)
+
+    def discard(self, user_id: int) -> None:
+        with self._lock:
+            self._frames.pop(user_id, None)
+
+
+frames = FrameStore(settings.COLUMNAR_MAX_USERS)
+
+
+def queue_patch(db: Session, user_id: int, op: str, arg) -> None:
+    """Queue a frame patch; applied only if the surrounding DB transaction commits."""
+    pending: Dict[int, List] = db.info.setdefault(_PENDING_KEY, defaultdict(list))
+    pending[user_id].append((op, arg))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for user_id, patches in pending.items():
+        frames.apply(user_id, patches)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# --- vectorized statistics ---
+
+def _mask(frame: UserFrame, ttype: Optional[str], start_date: Optional[date], end_date: Optional[date]):
+    m = np.ones(len(frame), dtype=bool)
+    if ttype is not None:
+        m &= frame.types == (INCOME if ttype == "income" else EXPENSE)
+    if start_date is not None:
+        m &= frame.days >= to_day(start_date)
+    if end_date is not None:
+        m &= frame.days <= to_day(end_date)
+    return m
+
+
+def percentiles(frame: UserFrame, qs: List[float], ttype: Optional[str] = "expense",
+                start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict:
+    amounts = frame.amounts[_mask(frame, ttype, start_date, end_date)]
+    if amounts.size == 0:
+        return {"count": 0, "mean": None, "percentiles": {str(q): None for q in qs}}
+    values = np.percentile(amounts, qs)
+    return {
+        "count": int(amounts.size),
+        "mean": float(amounts.mean()),
+        "percentiles": {str(q): float(v) for q, v in zip(qs, values)},
+    }
+
+
+def moving_average(frame: UserFrame, window: int, ttype: Optional[str] = "expense",
+                   start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict]:
+    """Daily totals (zero-filled) with a trailing `window`-day mean."""
+    m = _mask(frame, ttype, start_date, end_date)
+    days, amounts = frame.days[m], frame.amounts[m]
+    if days.size == 0 and (start_date is None or end_date is None):
+        return []
+    first = to_day(start_date) if start_date else int(days.min())
+    last = to_day(end_date) if end_date else int(days.max())
+    daily = np.bincount(days - first, weights=amounts, minlength=last - first + 1)
+    csum = np.concatenate(([0.0], np.cumsum(daily)))
+    idx = np.arange(1, daily.size + 1)
+    lo = np.maximum(idx - window, 0)
+    ma = (csum[idx] - csum[lo]) / (idx - lo)
+    return [{"date": from_day(first + i), "total": float(daily[i]), "moving_average": float(ma[i])}
+            for i in range(daily.size)]
+
+
+def zscore_outliers(frame: UserFrame, threshold: float = 3.0, ttype: Optional[str] = "expense",
+                    start_date: Optional[date] = None, end_date: Optional[date] = None,
+                    limit: int = 50) -> List[Dict]:
+    """Transactions whose amount is >= threshold std devs from their category's mean."""
+    m = _mask(frame, ttype, start_date, end_date)
+    ids, days, amounts, cats = frame.ids[m], frame.days[m], frame.amounts[m], frame.categories[m]
+    if amounts.size == 0:
+        return []
+    # category ids are small non-negative ints: bincount over them directly (no sort)
+    counts = np.bincount(cats)
+    safe = np.maximum(counts, 1)
+    mean = np.bincount(cats, weights=amounts) / safe
+    var = np.bincount(cats, weights=amounts * amounts) / safe - mean * mean
+    std = np.sqrt(np.maximum(var, 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(std[cats] > 0, (amounts - mean[cats]) / std[cats], 0.0)
+    hits = np.nonzero(np.abs(z) >= threshold)[0]
+    hits = hits[np.argsort(-np.abs(z[hits]))][:limit]
+    return [{
+        "id": int(ids[i]),
+        "date": from_day(days[i]),
+        "amount": float(amounts[i]),
+        "category_id": int(cats[i]) or None,
+        "category_mean": float(mean[cats[i]]),
+        "zscore": float(z[i]),
+    } for i in hits]
+
+
+def _calendar_starts(days, granularity: str):
+    d64 = days.astype("datetime64[D]")
+    if granularity == "month":
+        starts = d64.astype("datetime64[M]")
+    elif granularity == "quarter":
+        months = d64.astype("datetime64[M]").astype(np.int64)
+        starts = (months - months % 3).astype("datetime64[M]")
+    elif granularity == "year":
+        starts = d64.astype("datetime64[Y]")
+    else:
+        raise ValueError(f"unknown granularity: {granularity}")
+    return starts.astype("datetime64[D]").astype(np.int64)
+
+
+def _bucket_index(days, granularity: str):
+    """Map day numbers to bucket-start day numbers (weeks start on Monday)."""
+    if granularity == "day":
+        return days
+    if granularity == "week":
+        return days - ((days + 3) % 7)  # 1970-01-01 was a Thursday
+    if days.size == 0:
+        return days.astype(np.int64)
+    lo = int(days.min())
+    span = int(days.max()) - lo + 1
+    if span * 4 < days.size:
+        # calendar maths once per distinct day in range, then a gather
+        lut = _calendar_starts(np.arange(lo, lo + span, dtype=np.int64), granularity)
+        return lut[days - lo]
+    return _calendar_starts(days, granularity)
+
+
+def _factorize(values):
+    """(sorted distinct values, index of each value) -- np.unique without the O(n log n) sort for small ranges."""
+    lo = int(values.min())
+    span = int(values.max()) - lo + 1
+    if span > 4 * values.size + 1024:
+        return np.unique(values, return_inverse=True)
+    offs = values - lo
+    present = np.bincount(offs, minlength=span) > 0
+    codes = np.nonzero(present)[0]
+    lut = np.zeros(span, dtype=np.int64)
+    lut[codes] = np.arange(codes.size)
+    return codes + lo, lut[offs]
+
+
+def category_share(frame: UserFrame, granularity: str = "month", ttype: Optional[str] = "expense",
+                   start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict]:
+    """Per bucket: each category's total and share of that bucket's total."""
+    m = _mask(frame, ttype, start_date, end_date)
+    if not m.any():
+        return []
+    buckets = _bucket_index(frame.days[m], granularity)
+    b_codes, b_inv = _factorize(buckets)
+    c_codes, c_inv = _factorize(frame.categories[m])
+    flat = b_inv * c_codes.size + c_inv
+    grid = np.bincount(flat, weights=frame.amounts[m], minlength=b_codes.size * c_codes.size) \
+        .reshape(b_codes.size, c_codes.size)
+    totals = grid.sum(axis=1)
+    out = []
+    for bi, b in enumerate(b_codes):
+        shares = []
+        for ci in np.nonzero(grid[bi])[0]:
+            shares.append({
+                "category_id": int(c_codes[ci]) or None,
+                "total": float(grid[bi, ci]),
+                "share": float(grid[bi, ci] / totals[bi]) if totals[bi] else 0.0,
+            })
+        shares.sort(key=lambda s: s["total"], reverse=True)
+        out.append({"date": from_day(b), "total": float(totals[bi]), "categories": shares})
+    return out
+
+
+__all__ = [
+    "NUMPY_AVAILABLE", "UserFrame", "FrameStore", "frames", "load_frame", "queue_patch",
+    "percentiles", "moving_average", "zscore_outliers", "category_share",
+]
@@ -0,0 +1,98 @@
+# app/services/data_version.py
+"""Per-user data version counter.
+
+Every write to a user's transactions, categories or receipts calls
+`bump_data_version` inside the same DB transaction. Readers use the version
+to build ETags (see app/api/v1/etag.py) and in-process caches can subscribe
+with `on_data_change` to hear about committed writes.
+"""
+import logging
+from typing import Callable, List, Set
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+# session.info key holding user ids bumped in the current DB transaction
+_PENDING_KEY = "data_version_pending_users"
+
+_listeners: List[Callable[[int], None]] = []
+
+
+def get_data_version(db: Session, user_id: int) -> int:
+    """Return the current data version for user_id (0 if the user never wrote)."""
+    version = (
+        db.query(models.UserDataVersion.version)
+        .filter(models.UserDataVersion.user_id == user_id)
+        .scalar()
+    )
+    return int(version or 0)
+
+
+def create_data_version(db: Session, user_id: int) -> None:
+    """Add the version row for a new user (in the caller's transaction), so later bumps are plain updates."""
+    db.add(models.UserDataVersion(user_id=user_id, version=0))
+
+
+def bump_data_version(db: Session, user_id: int) -> None:
+    """
+    Increment the user's data version as part of the caller's transaction.
+    The caller still owns the commit; listeners fire only after it succeeds.
+
+    A single upsert, so two concurrent first writes of a user without a row
+    (registered before rows were created at sign-up) cannot both insert.
+    """
+    V = models.UserDataVersion
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(V).values(user_id=user_id, version=1)
+        db.execute(stmt.on_duplicate_key_update(version=V.version + 1))
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(V).values(user_id=user_id, version=1)
+        db.execute(stmt.on_conflict_do_update(index_elements=["user_id"], set_={"version": V.version + 1}))
+    else:
+        # generic fallback: update, insert when the row does not exist yet
+        updated = (
+            db.query(V)
+            .filter(V.user_id == user_id)
+            .update({V.version: V.version + 1}, synchronize_session=False)
+        )
+        if not updated:
+            db.execute(insert(V), [{"user_id": user_id, "version": 1}])
+    pending: Set[int] = db.info.setdefault(_PENDING_KEY, set())
+    pending.add(user_id)
+
+
+def on_data_change(callback: Callable[[int], None]) -> Callable[[int], None]:
+    """Register callback(user_id), called after a commit that bumped that user's version."""
+    _listeners.append(callback)
+    return callback
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for user_id in pending:
+        for cb in _listeners:
+            try:
+                cb(user_id)
+            except Exception:
+                logger.exception("data change listener %r failed for user %s", cb, user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+__all__ = ["get_data_version", "create_data_version", "bump_data_version", "on_data_change"]
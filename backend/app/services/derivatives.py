@@ -0,0 +1,192 @@
+# app/services/derivatives.py
+"""
+WebP thumbnails and previews of receipt images.
+
+The background job after an upload (app/api/v1/receipts.py) writes one
+WebP per variant next to the original in storage, under
+"derived/<kind>-<px>/<key>.webp". Each variant is scaled to fit a box
+whose longest edge is RECEIPT_THUMB_PX or RECEIPT_PREVIEW_PX. Lists then
+load a few KB per receipt instead of the full-size original.
+GET /derivatives/<kind>-<px>/<key> (app/api/v1/files.py) serves them with
+immutable cache headers: the pixel size is part of the URL, so changing the
+settings changes the URLs instead of leaving stale copies in browser
+caches. A missing derivative (older upload, lost file, new size) is made
+from the original on first request, but only for the original of an
+existing receipt.
+
+With RECEIPT_RECOMPRESS_ORIGINALS, PNG originals are re-encoded with
+zlib optimisation and kept only if smaller. The pixels stay identical.
+Pillow has no lossless JPEG re-encode, so JPEGs are left as they are.
+"""
+import io
+import logging
+import os
+import posixpath
+import time
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.lazy import available, lazy_import
+from app.db import models
+from app.services.storage import file_path_for, storage
+
+# optional image lib, imported on first use (app/core/lazy.py)
+PIL_AVAILABLE = available("PIL")
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("thumb", "preview")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tif", ".tiff")
+IMMUTABLE = "public, max-age=31536000, immutable"
+DERIVED_PREFIX = "derived/"
+
+
+def _px(kind: str) -> int:
+    return {"thumb": settings.RECEIPT_THUMB_PX, "preview": settings.RECEIPT_PREVIEW_PX}[kind]
+
+
+def variant(kind: str) -> str:
+    return f"{kind}-{_px(kind)}"
+
+
+def is_image(key: str) -> bool:
+    return os.path.splitext(key)[1].lower() in IMAGE_EXTENSIONS
+
+
+def derivative_key(key: str, variant_name: str) -> str:
+    return f"{DERIVED_PREFIX}{variant_name}/{key}.webp"
+
+
+def url(key: str, kind: str) -> Optional[str]:
+    """Path (relative, like receipts.file_path) of the current `kind` derivative, None for non-images."""
+    return f"derivatives/{variant(kind)}/{key}" if is_image(key) else None
+
+
+def _kind_of(variant_name: str) -> str:
+    """'thumb-240' -> 'thumb' when that is the configured size; ValueError otherwise."""
+    for kind in KINDS:
+        if variant(kind) == variant_name:
+            return kind
+    raise ValueError(f"unknown derivative: {variant_name}")
+
+
+def _open(path: str, max_px: int):
+    if not PIL_AVAILABLE:
+        raise RuntimeError("Pillow not available. pip install pillow")
+    with Image.open(path) as src:
+        # JPEGs decode at 1/2..1/8 scale straight away when that still covers the largest box
+        src.draft("RGB", (max_px, max_px))
+        img = ImageOps.exif_transpose(src)
+        has_alpha = "A" in img.getbands() or "transparency" in img.info
+        return img.convert("RGBA" if has_alpha else "RGB")
+
+
+def make(key: str, path: str, kinds=KINDS, trigger: str = "upload") -> List[str]:
+    """
+    Write the `kinds` derivatives of the image at `path` (the local copy of
+    `key`). Returns the derivative keys. Raises ValueError if it is not an
+    image Pillow can read.
+    """
+    started = time.perf_counter()
+    kinds = sorted(kinds, key=_px, reverse=True)
+    try:
+        img = _open(path, _px(kinds[0]))
+    except (OSError, SyntaxError) as exc:  # UnidentifiedImageError is an OSError
+        raise ValueError(f"not a readable image: {key}") from exc
+    written = []
+    # largest first, each smaller one scaled down from the previous
+    for kind in kinds:
+        img = img.copy()
+        img.thumbnail((_px(kind), _px(kind)), Image.Resampling.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, "WEBP", quality=settings.RECEIPT_WEBP_QUALITY, method=4)
+        buf.seek(0)
+        dkey = derivative_key(key, variant(kind))
+        storage().save(dkey, buf)
+        written.append(dkey)
+    metrics.DERIVATIVE_SECONDS.observe(time.perf_counter() - started, trigger)
+    return written
+
+
+def recompress_original(key: str, path: str) -> bool:
+    """Losslessly re-encode a PNG original in place if that makes it smaller. Returns whether it did."""
+    if os.path.splitext(key)[1].lower() != ".png" or not PIL_AVAILABLE:
+        return False
+    with Image.open(path) as img:
+        img.load()
+        params = {k: img.info[k] for k in ("icc_profile", "exif", "dpi", "transparency") if k in img.info}
+        buf = io.BytesIO()
+        img.save(buf, "PNG", optimize=True, **params)
+    before, after = os.path.getsize(path), buf.tell()
+    if after >= before:
+        return False
+    buf.seek(0)
+    storage().save(key, buf)
+    logger.info("recompressed %s: %s -> %s bytes", key, before, after)
+    return True
+
+
+def process_upload(key: str, path: str) -> None:
+    """Background step after a receipt upload: derivatives, then optional recompression. Never raises."""
+    if not is_image(key):
+        return
+    try:
+        make(key, path)
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", key)
+    if settings.RECEIPT_RECOMPRESS_ORIGINALS:
+        try:
+            recompress_original(key, path)
+        except Exception:
+            logger.exception("Recompressing original failed for %s", key)
+
+
+def ensure(db: Session, key: str, variant_name: str) -> str:
+    """
+    Storage key of the derivative, generating it from the original if it
+    is missing. Only originals of existing receipts are rendered, so the
+    public route cannot be used to write derivatives of derivatives or of
+    arbitrary keys. ValueError for unknown variants, non-image originals
+    and keys no receipt points at; FileNotFoundError if the original is
+    gone too.
+    """
+    kind = _kind_of(variant_name)
+    key = posixpath.normpath(key.replace("\\", "/")).lstrip("/")
+    if key.startswith(DERIVED_PREFIX) or not is_image(key):
+        raise ValueError(f"not an uploaded image: {key}")
+    dkey = derivative_key(key, variant_name)
+    try:
+        storage().size(dkey)
+        return dkey
+    except FileNotFoundError:
+        pass
+    file_path = file_path_for(key)
+    owned = db.query(models.Receipt.id).filter(
+        models.Receipt.file_path.in_((file_path, file_path.replace("/", "\\")))
+    ).first()
+    if owned is None:
+        raise ValueError(f"not a receipt upload: {key}")
+    storage().size(key)  # FileNotFoundError before any work if the original is gone
+    with storage().local_path(key) as path:
+        make(key, path, kinds=(kind,), trigger="miss")
+    return dkey
+
+
+def delete_all(key: str) -> None:
+    """Remove the current-size derivatives of `key` (best effort)."""
+    for kind in KINDS:
+        try:
+            storage().delete(derivative_key(key, variant(kind)))
+        except Exception:
+            logger.exception("Failed to delete %s derivative of %s", kind, key)
+
+
+__all__ = [
+    "PIL_AVAILABLE", "KINDS", "IMMUTABLE", "variant", "is_image", "derivative_key", "url", "make",
+    "recompress_original", "process_upload", "ensure", "delete_all",
+]
@@ -0,0 +1,207 @@
+# app/services/fx.py
+"""
+Currency conversion for analytics.
+
+fx_rates stores, per currency and day, the value of one unit in
+settings.FX_BASE_CURRENCY. Rates are sparse (no weekends/holidays needed):
+a day uses the latest rate on or before it, or the earliest rate when it
+predates the table.
+
+Conversion happens inside the aggregation queries: `converted` wraps an
+amount column as
+
+    CASE WHEN currency = :reporting THEN amount
+         ELSE amount * rate(currency, day) / rate(:reporting, day) END
+
+with rate() an indexed correlated lookup on (currency, day), so rows
+already in the reporting currency cost nothing extra and nothing is
+converted row by row in Python. Rollup buckets keep currency and day, so the
+rollup path converts exactly (monthly rollups are only used when no
+conversion is needed).
+
+`rates` is an in-memory, date-indexed copy of the table (per currency:
+sorted day ordinals + rates, bisect lookups). It answers "which currencies
+can be converted" before a query runs, converts single amounts, and its
+version goes into the cache keys / ETags of the converting analytics
+endpoints. An import is visible at once in the process that ran it; other
+processes notice the changed table on their next check, at most
+FX_CACHE_TTL_SECONDS later.
+"""
+import bisect
+import csv
+import logging
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.orm import Session, aliased
+
+from app.core.concurrency import LoopSafeLock
+from app.core.config import settings
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+
+class FxRateCache:
+    """Date-indexed rates per currency, reloaded when the table changed (checked at most every ttl seconds)."""
+
+    EMPTY = "0:0"
+
+    def __init__(self, base: str, ttl_seconds: int = 300):
+        self.base = base
+        self.ttl_seconds = ttl_seconds
+        self.version = self.EMPTY  # what an empty table reports, so no reload until rates exist
+        self._days: Dict[str, List[int]] = {}
+        self._rates: Dict[str, List[Decimal]] = {}
+        self._checked = 0.0
+        self._lock = LoopSafeLock()  # held across the reload queries
+
+    def _table_version(self, db: Session) -> str:
+        count, max_id = db.query(func.count(models.FxRate.id), func.max(models.FxRate.id)).one()
+        return f"{count}:{max_id or 0}"
+
+    def refresh(self, db: Session, force: bool = False) -> "FxRateCache":
+        now = time.monotonic()
+        if not force and now - self._checked < self.ttl_seconds:
+            return self
+        with self._lock:
+            if not force and now - self._checked < self.ttl_seconds:
+                return self
+            version = self._table_version(db)
+            if force or version != self.version:
+                days: Dict[str, List[int]] = {}
+                rates: Dict[str, List[Decimal]] = {}
+                F = models.FxRate
+                for cur, day, rate in db.query(F.currency, F.day, F.rate).order_by(F.currency, F.day):
+                    days.setdefault(cur, []).append(day.toordinal())
+                    rates.setdefault(cur, []).append(Decimal(str(rate)))
+                self._days, self._rates, self.version = days, rates, version
+                logger.debug("fx cache loaded %s currencies (version %s)", len(days), version)
+            self._checked = now
+        return self
+
+    def invalidate(self) -> None:
+        self._checked = 0.0
+
+    def currencies(self) -> Set[str]:
+        return set(self._days) | {self.base}
+
+    def rate(self, currency: str, day: date) -> Decimal:
+        """Value of 1 `currency` in the base currency on `day` (as of the latest earlier rate)."""
+        if currency == self.base:
+            return Decimal("1")
+        days = self._days.get(currency)
+        if not days:
+            raise ValueError(f"no FX rates for {currency}")
+        i = bisect.bisect_right(days, day.toordinal()) - 1
+        return self._rates[currency][max(i, 0)]
+
+    def convert(self, amount, from_currency: str, to_currency: str, day: date) -> Decimal:
+        amount = Decimal(str(amount))
+        if from_currency == to_currency:
+            return amount
+        return amount * self.rate(from_currency, day) / self.rate(to_currency, day)
+
+
+rates = FxRateCache(settings.FX_BASE_CURRENCY, settings.FX_CACHE_TTL_SECONDS)
+
+
+def _rate_at(currency_expr, day_col):
+    """Correlated scalar lookup: latest rate on or before day_col, else the earliest one."""
+    before = aliased(models.FxRate)
+    after = aliased(models.FxRate)
+    on_or_before = (
+        select(before.rate)
+        .where(before.currency == currency_expr, before.day <= day_col)
+        .order_by(before.day.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    earliest = (
+        select(after.rate)
+        .where(after.currency == currency_expr, after.day > day_col)
+        .order_by(after.day.asc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return func.coalesce(on_or_before, earliest)
+
+
+def converted(amount_col, currency_col, day_col, reporting: str):
+    """SQL expression: amount_col in `reporting` currency (see module docstring)."""
+    currency = func.coalesce(currency_col, "INR")
+    base = settings.FX_BASE_CURRENCY
+    to_base = case((currency == base, literal(1)), else_=_rate_at(currency, day_col))
+    factor = to_base if reporting == base else to_base / _rate_at(literal(reporting), day_col)
+    return case((currency == reporting, amount_col), else_=amount_col * factor)
+
+
+def needs_conversion(db: Session, user_id: int, reporting: str) -> bool:
+    """
+    Whether the user has amounts in currencies other than `reporting`.
+    Raises ValueError when one of them (or `reporting`) has no rates at all.
+    """
+    R = models.DailyRollup
+    used = {c for (c,) in db.query(R.currency).filter(R.user_id == user_id, R.txn_count > 0).distinct()}
+    if not used - {reporting}:
+        return False
+    known = rates.refresh(db).currencies()
+    missing = sorted((used | {reporting}) - known)
+    if missing:
+        raise ValueError("no FX rates for " + ", ".join(missing) + "; import them with import_fx_rates.py")
+    return True
+
+
+def reporting_currency(value: Optional[str]) -> str:
+    return (value or settings.REPORTING_CURRENCY).strip().upper()
+
+
+# --- import ---
+
+def parse_rates_file(path: str) -> List[Tuple[str, date, Decimal]]:
+    """
+    CSV with a header row and columns date,currency,rate (ISO dates; rate =
+    value of 1 unit of currency in FX_BASE_CURRENCY). Extra columns are ignored.
+    """
+    out = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for lineno, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                day = datetime.strptime(row["date"].strip(), "%Y-%m-%d").date()
+                out.append((row["currency"].strip().upper(), day, Decimal(row["rate"].strip())))
+            except (KeyError, ValueError, InvalidOperation, AttributeError) as e:
+                raise ValueError(f"{path}:{lineno}: bad FX row {row!r} ({e})")
+    return out
+
+
+def import_rates(db: Session, rows: Iterable[Tuple[str, date, Decimal]], chunk_size: int = 1000) -> int:
+    """
+    Bulk upsert (currency, day, rate) rows: existing days are replaced.
+    Caller commits. Returns the number of rows written.
+    """
+    latest: Dict[Tuple[str, date], Decimal] = {}
+    for currency, day, rate in rows:
+        if rate <= 0:
+            raise ValueError(f"FX rate for {currency} on {day} must be positive")
+        latest[(currency.upper(), day)] = rate
+    F = models.FxRate
+    by_currency: Dict[str, List[date]] = {}
+    for currency, day in latest:
+        by_currency.setdefault(currency, []).append(day)
+    for currency, days in by_currency.items():
+        for i in range(0, len(days), chunk_size):
+            db.query(F).filter(F.currency == currency, F.day.in_(days[i:i + chunk_size])).delete(synchronize_session=False)
+    mappings = [{"currency": c, "day": d, "rate": r} for (c, d), r in latest.items()]
+    for i in range(0, len(mappings), chunk_size):
+        db.bulk_insert_mappings(F, mappings[i:i + chunk_size])
+    rates.invalidate()
+    return len(mappings)
+
+
+__all__ = [
+    "FxRateCache", "rates", "converted", "needs_conversion", "reporting_currency",
+    "parse_rates_file", "import_rates",
+]
@@ -0,0 +1,71 @@
+# app/services/ledger.py
+"""
+Side effects of transaction writes.
+
+Every route that creates, updates or deletes Transaction rows calls one of
+the record_* helpers before committing, so derived state (analytics rollups,
+budget spend) changes in the same DB transaction as the rows themselves, and in-memory
+derived state (NumPy frames) is patched once that transaction commits:
+
+    t = models.Transaction(...)
+    db.add(t)
+    ledger.record_created(db, [t])
+    db.commit()
+
+For updates, take a `snapshot` before mutating the row. Writes that bump the
+data version without going through here (category/receipt edits) just make
+cached NumPy frames reload on next use.
+"""
+from collections import namedtuple
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.services import budgets, columnar, rollups
+
+# immutable copy of the fields derived state depends on
+TxnSnapshot = namedtuple(
+    "TxnSnapshot", ["id", "user_id", "type", "amount", "currency", "date", "category_id", "description"]
+)
+
+
+def snapshot(txn: models.Transaction) -> TxnSnapshot:
+    return TxnSnapshot(
+        txn.id, txn.user_id, txn.type, txn.amount, txn.currency, txn.date, txn.category_id, txn.description,
+    )
+
+
+def record_created(db: Session, txns: Iterable[models.Transaction]) -> None:
+    txns = list(txns)
+    if any(t.id is None for t in txns):
+        db.flush()  # assign ids so the column store can be patched by id
+    # budgets first: a missing spend row is seeded from rollups that don't include this write yet
+    budgets.apply_changes(db, [(t, +1) for t in txns])
+    rollups.apply_changes(db, ((t, +1) for t in txns))
+    for t in txns:
+        columnar.queue_patch(db, t.user_id, "upsert", snapshot(t))
+
+
+def record_updated(db: Session, before: TxnSnapshot, txn: models.Transaction) -> None:
+    budgets.apply_changes(db, [(before, -1), (txn, +1)])
+    rollups.apply_changes(db, [(before, -1), (txn, +1)])
+    columnar.queue_patch(db, txn.user_id, "upsert", snapshot(txn))
+
+
+def record_deleted(db: Session, befores: Iterable[TxnSnapshot]) -> None:
+    befores = list(befores)
+    budgets.apply_changes(db, [(b, -1) for b in befores])
+    rollups.apply_changes(db, ((b, -1) for b in befores))
+    for b in befores:
+        columnar.queue_patch(db, b.user_id, "delete", b.id)
+
+
+def record_category_deleted(db: Session, user_id: int, category_id: int) -> None:
+    """The category's transactions fall back to category_id NULL; its budgets are removed."""
+    budgets.drop_category(db, user_id, category_id)
+    rollups.reassign_category(db, user_id, category_id)
+    columnar.queue_patch(db, user_id, "drop_category", category_id)
+
+
+__all__ = ["TxnSnapshot", "snapshot", "record_created", "record_updated", "record_deleted", "record_category_deleted"]
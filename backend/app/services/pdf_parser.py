@@ -1,10 +1,15 @@
 # app/services/pdf_parser.py
-import pdfplumber
 from typing import List, Dict, Any
 import logging
+import time
 from decimal import Decimal
 from datetime import datetime
 
+from app.core import metrics
+from app.core.lazy import lazy_import
+
+pdfplumber = lazy_import("pdfplumber")  # imported by the first parse, not by web worker startup
+
 logger = logging.getLogger(__name__)
 
 def parse_transactions_from_pdf(path: str) -> List[Dict[str,Any]]:
@@ -14,9 +19,11 @@ def parse_transactions_from_pdf(path: str) -> List[Dict[str,Any]]:
     This is heuristic — depends on the vendor PDF layout.
     """
     results = []
+    started = time.perf_counter()
     try:
         with pdfplumber.open(path) as pdf:
             for page in pdf.pages:
+                metrics.PDF_PAGES.inc()
                 try:
                     tables = page.extract_tables()
                 except Exception:
@@ -69,4 +76,6 @@ def parse_transactions_from_pdf(path: str) -> List[Dict[str,Any]]:
                             results.append(rec)
     except Exception as exc:
         logger.exception("pdf parse failed: %s", exc)
+    metrics.PDF_SECONDS.observe(time.perf_counter() - started)
+    metrics.PDF_ROWS.inc(amount=len(results))
     return results
@@ -0,0 +1,136 @@
+# app/services/principals.py
+"""
+Authenticated principal cache.
+
+`get_current_user` (app/api/v1/deps.py) runs on every authenticated request.
+Verifying the JWT and loading the user row each time is pure overhead for
+handlers that only need the user's id, so a verified token is mapped to a
+small immutable Principal (id, email, username) in a bounded LRU. An entry
+lives for AUTH_CACHE_TTL_SECONDS at most and never beyond the token's own
+expiry.
+
+Entries are dropped explicitly when a user row is deleted or its password
+hash changes -- any ORM write does, caught by the flush/commit listeners at
+the bottom. Other processes (reset_password.py, other workers) only notice
+after the TTL, so keep it short.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+
+# session.info key holding user ids whose principals must go after commit
+_PENDING_KEY = "principal_pending_invalidations"
+
+
+class Principal(NamedTuple):
+    """What handlers get as `current_user`: enough for authorization, no ORM row."""
+    id: int
+    email: str
+    username: Optional[str]
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Principal]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            item = self._data.get(token)
+            if item is None:
+                return None
+            expires, principal = item
+            if expires < time.time():
+                self._drop(token)
+                return None
+            self._data.move_to_end(token)
+            return principal
+
+    def put(self, token: str, principal: Principal, token_exp: Optional[float] = None) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        expires = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires = min(expires, float(token_exp))
+        with self._lock:
+            self._data[token] = (expires, principal)
+            self._data.move_to_end(token)
+            self._by_user.setdefault(principal.id, set()).add(token)
+            while len(self._data) > self.max_entries:
+                self._drop(next(iter(self._data)))
+
+    def _drop(self, token: str) -> None:
+        item = self._data.pop(token, None)
+        if item is None:
+            return
+        tokens = self._by_user.get(item[1].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[item[1].id]
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._drop(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """One narrow lookup (no password hash) for a cache miss."""
+    row = (
+        db.query(models.User.id, models.User.email, models.User.username)
+        .filter(models.User.id == user_id)
+        .first()
+    )
+    return Principal(row.id, row.email, row.username) if row is not None else None
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_user_changes(session: Session, flush_context, instances) -> None:
+    pending: Set[int] = set()
+    for obj in session.deleted:
+        if isinstance(obj, models.User) and obj.id is not None:
+            pending.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, models.User) and obj.id is not None:
+            if inspect(obj).attrs.hashed_password.history.has_changes():
+                pending.add(obj.id)
+    if pending:
+        session.info.setdefault(_PENDING_KEY, set()).update(pending)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+__all__ = ["Principal", "PrincipalCache", "principal_cache", "load_principal"]
@@ -0,0 +1,249 @@
+# app/services/rate_limit.py
+"""
+Token-bucket rate limiting for the credential endpoints.
+
+Every login/register costs a full PBKDF2 hash, so `RateLimitMiddleware`
+(registered in app/main.py) answers 429 + Retry-After for POSTs to those
+paths *before* routing -- no dependency, DB session or hash is created for a
+rejected request. Two buckets apply: one per client IP and one per email in
+the JSON body (credential stuffing spreads over IPs, password spraying over
+emails).
+
+Backends:
+  - MemoryBuckets: in-process dict with LRU bound (default); a check is a
+    lock, a dict lookup and some float math -- a few microseconds
+  - RedisBuckets: shared across workers; one atomic Lua script per check,
+    works with any redis-py compatible client
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import ROUTE_PATH_KEY
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBuckets:
+    """Thread-safe token buckets kept in an LRU of at most max_keys entries."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._state: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, per_second: float) -> float:
+        """Consume one token. Returns 0.0 when allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, state[0] + (now - state[1]) * per_second)
+                self._state.move_to_end(key)
+            if tokens >= 1:
+                self._state[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._state[key] = (tokens, now)
+                wait = (1 - tokens) / per_second
+            if len(self._state) > self.max_keys:
+                self._state.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state.clear()
+
+
+_REDIS_TAKE = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local s = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(s[1])
+if tokens == nil then
+  tokens = capacity
+else
+  tokens = math.min(capacity, tokens + (now - tonumber(s[2])) * rate)
+end
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Buckets shared by all workers; the refill clock is Redis' own TIME."""
+
+    def __init__(self, client, prefix: str = "ratelimit"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_REDIS_TAKE)
+
+    def take(self, key: str, capacity: float, per_second: float) -> float:
+        return float(self._script(keys=[f"{self.prefix}:{key}"], args=[capacity, per_second]))
+
+
+class Rule:
+    __slots__ = ("name", "capacity", "per_second")
+
+    def __init__(self, name: str, burst: int, per_minute: int):
+        self.name = name
+        self.capacity = float(max(1, burst))
+        self.per_second = max(per_minute, 1) / 60.0
+
+
+class RateLimiter:
+    def __init__(self, backend, ip_rule: Rule, email_rule: Rule):
+        self.backend = backend
+        self.ip_rule = ip_rule
+        self.email_rule = email_rule
+
+    def check(self, ip: Optional[str], email: Optional[str]) -> float:
+        """0.0 if the request may proceed, else the Retry-After in seconds."""
+        checks: List[Tuple[Rule, str]] = []
+        if ip:
+            checks.append((self.ip_rule, ip))
+        if email:
+            checks.append((self.email_rule, email.strip().lower()))
+        for rule, value in checks:
+            try:
+                wait = self.backend.take(f"{rule.name}:{value}", rule.capacity, rule.per_second)
+            except Exception:
+                logger.exception("rate limit backend failed; letting the request through")
+                return 0.0
+            if wait > 0:
+                return wait
+        return 0.0
+
+
+def build_limiter(kind: str) -> Optional[RateLimiter]:
+    if kind == "none":
+        return None
+    backend = None
+    if kind == "redis":
+        try:
+            import redis  # type: ignore
+        except Exception:
+            logger.warning("RATE_LIMIT_BACKEND=redis but the redis package is missing; using memory")
+        else:
+            backend = RedisBuckets(redis.Redis.from_url(settings.REDIS_URL))
+    if backend is None:
+        backend = MemoryBuckets(settings.RATE_LIMIT_MAX_KEYS)
+    return RateLimiter(
+        backend,
+        Rule("ip", settings.RATE_LIMIT_IP_BURST, settings.RATE_LIMIT_IP_PER_MINUTE),
+        Rule("email", settings.RATE_LIMIT_EMAIL_BURST, settings.RATE_LIMIT_EMAIL_PER_MINUTE),
+    )
+
+
+# bodies larger than this are not parsed for the email (auth payloads are tiny)
+_MAX_BODY = 4096
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware: for POSTs to `paths`, buffer the (small) body to
+    read the email, consult the limiter and either answer 429 or replay the
+    body to the app. Buffering stops past _MAX_BODY: such a request is
+    limited by IP only and the rest of its body streams through unread.
+    Everything else passes through untouched.
+
+    Registered inside MetricsMiddleware so 429s are counted; `paths` are
+    literal route paths, and a rejected request is labelled with its path
+    (it never reaches the router, which is what normally sets the label).
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None, paths: Iterable[str] = ()):
+        self.app = app
+        self.limiter = limiter
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            self.limiter is None
+            or scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        chunks, more = [], True
+        size = 0
+        while more and size <= _MAX_BODY:
+            message = await receive()
+            if message["type"] != "http.request":
+                more = False
+                break
+            chunk = message.get("body", b"")
+            chunks.append(chunk)
+            size += len(chunk)
+            more = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        wait = self.limiter.check(self._client_ip(scope), self._email(body) if size <= _MAX_BODY else None)
+        if wait > 0:
+            scope[ROUTE_PATH_KEY] = scope["path"]
+            await self._reject(send, wait)
+            return
+
+        replayed = False
+
+        async def replay():
+            # what was buffered, then the rest of the body straight from the client
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": more}
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    @staticmethod
+    def _client_ip(scope) -> Optional[str]:
+        if settings.RATE_LIMIT_TRUST_FORWARDED:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip() or None
+        client = scope.get("client")
+        return client[0] if client else None
+
+    @staticmethod
+    def _email(body: bytes) -> Optional[str]:
+        try:
+            email = json.loads(body).get("email")
+        except Exception:
+            return None
+        return email if isinstance(email, str) and email else None
+
+    @staticmethod
+    async def _reject(send, wait: float) -> None:
+        retry_after = str(max(1, math.ceil(wait)))
+        body = b'{"detail":"Too many requests, retry later"}'
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", retry_after.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+auth_limiter = build_limiter(settings.RATE_LIMIT_BACKEND)
+
+
+__all__ = ["MemoryBuckets", "RedisBuckets", "Rule", "RateLimiter", "RateLimitMiddleware", "auth_limiter", "build_limiter"]
@@ -3,38 +3,31 @@ import os
 import re
 import json
 import logging
+from datetime import date as date_type
+from decimal import Decimal, InvalidOperation
 from typing import Dict, Optional, List
 
+from app.core import metrics
+from app.core.lazy import available, lazy_import
+
 logger = logging.getLogger(__name__)
 
 # optionally configure a default Tesseract path here (Windows example).
 # You can also set env var TESSERACT_CMD to override at runtime.
 _DEFAULT_TESSERACT = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
-# optional image / OCR libs (don't fail import if missing)
-try:
-    from PIL import Image, ImageOps, ImageFilter  # type: ignore
-    PIL_AVAILABLE = True
-except Exception:
-    Image = None  # type: ignore
-    ImageOps = None  # type: ignore
-    ImageFilter = None  # type: ignore
-    PIL_AVAILABLE = False
-
-try:
-    import pytesseract  # type: ignore
-    PYTESS_AVAILABLE = True
-except Exception:
-    pytesseract = None  # type: ignore
-    PYTESS_AVAILABLE = False
+# optional image / OCR libs, imported on first use so web workers that never OCR don't load them
+PIL_AVAILABLE = available("PIL")
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+ImageFilter = lazy_import("PIL.ImageFilter")
+
+PYTESS_AVAILABLE = available("pytesseract")
+pytesseract = lazy_import("pytesseract")
 
 # optional smart date parser
-try:
-    from dateutil import parser as dateparser  # type: ignore
-    DATEPARSER_AVAILABLE = True
-except Exception:
-    dateparser = None  # type: ignore
-    DATEPARSER_AVAILABLE = False
+DATEPARSER_AVAILABLE = available("dateutil")
+dateparser = lazy_import("dateutil.parser")
 
 
 def _maybe_configure_tesseract_from_env() -> None:
@@ -129,7 +122,8 @@ def ocr_image_to_text(path: str) -> Optional[str]:
     try:
         with Image.open(path) as img:
             img = img.copy()  # ensure image is usable after context close
-        processed = preprocess_image_for_ocr(img)
+        with metrics.OCR_PREPROCESS_SECONDS.time():
+            processed = preprocess_image_for_ocr(img)
         # run tesseract (language 'eng' by default)
         raw = pytesseract.image_to_string(processed, lang="eng")
         if raw is None:
@@ -296,5 +290,29 @@ def parse_receipt_text(text: str) -> Dict:
     return parsed
 
 
+def summary_fields(parsed: Dict) -> Dict:
+    """
+    Columns kept next to parsed_json for receipt lists: total (Decimal with
+    2 places), merchant (<= 255 chars) and receipt_date; None when missing
+    or out of range for the column.
+    """
+    total = None
+    try:
+        if parsed.get("total") is not None:
+            total = Decimal(str(parsed["total"])).quantize(Decimal("0.01"))
+            if abs(total) >= Decimal("1e10"):  # Numeric(12,2)
+                total = None
+    except (InvalidOperation, ValueError, TypeError):
+        total = None
+    receipt_date = None
+    try:
+        if parsed.get("date"):
+            receipt_date = date_type.fromisoformat(str(parsed["date"]))
+    except ValueError:
+        receipt_date = None
+    merchant = parsed.get("merchant")
+    return {"total": total, "merchant": merchant[:255] if merchant else None, "receipt_date": receipt_date}
+
+
 # export-friendly names for router imports
-__all__ = ["ocr_image_to_text", "parse_receipt_text", "extract_total", "extract_date"]
+__all__ = ["ocr_image_to_text", "parse_receipt_text", "summary_fields", "extract_total", "extract_date"]
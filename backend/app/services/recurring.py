@@ -0,0 +1,236 @@
+# app/services/recurring.py
+"""
+Recurring transaction / subscription detection.
+
+Descriptions are normalized to a merchant key ("NETFLIX.COM 8841" ->
+"netflix"), transactions are grouped by (user, type, currency, merchant) and
+each group's gaps and amounts are analysed with NumPy in one pass over all
+groups -- sort once, diff, per-group medians via a second sort, regularity
+via bincount -- so the cost is O(n log n) in the number of transactions
+instead of comparing pairs.
+
+A group is a series when its median gap matches a cadence (weekly ...
+yearly), most gaps are within that cadence's tolerance of the median and it
+has enough occurrences. Amount stability scales the confidence (utility
+bills vary, subscriptions don't).
+
+Results are a cache in recurring_series, rebuilt per user by `run` (see
+detect_recurring.py for the batch job over all users).
+"""
+import calendar
+import logging
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.lazy import available, lazy_import
+from app.db import models
+
+# optional numeric stack, imported on first use (app/core/lazy.py)
+NUMPY_AVAILABLE = available("numpy")
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# name, nominal gap (days), accepted median gap range, per-gap tolerance, minimum occurrences, months to add
+CADENCES = (
+    ("weekly", 7, 6, 8, 1, 4, 0),
+    ("biweekly", 14, 13, 15, 2, 4, 0),
+    ("monthly", 30, 27, 33, 3, 3, 1),
+    ("quarterly", 91, 86, 96, 5, 3, 3),
+    ("yearly", 365, 355, 375, 10, 2, 12),
+)
+
+MIN_INTERVAL_REGULARITY = 0.6  # share of gaps within tolerance of the median gap
+MIN_CONFIDENCE = 0.5
+AMOUNT_TOLERANCE = 0.10  # relative distance from the median amount that still counts as "same amount"
+
+_NON_ALPHA_RE = re.compile(r"[^a-z]+")
+_NOISE_WORDS = frozenset({
+    "pos", "ach", "debit", "credit", "card", "purchase", "payment", "pmt", "txn", "ref", "upi", "neft",
+    "imps", "autopay", "recurring", "online", "www", "com", "net", "inc", "ltd", "pvt", "the", "to", "from",
+})
+
+
+def merchant_key(description: Optional[str]) -> Optional[str]:
+    """Lowercase, drop digits/punctuation/bank noise, keep the first three words."""
+    if not description:
+        return None
+    words = [w for w in _NON_ALPHA_RE.sub(" ", description.lower()).split() if len(w) > 1 and w not in _NOISE_WORDS]
+    return " ".join(words[:3]) or None
+
+
+def _group_medians(groups, values, n_groups: int):
+    """Median of `values` per group (lower median for even counts); NaN for empty groups."""
+    order = np.lexsort((values, groups))
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    out = np.full(n_groups, np.nan)
+    has = counts > 0
+    out[has] = values[order][starts[has] + (counts[has] - 1) // 2]
+    return out, counts
+
+
+def detect_series(gids, days, amounts, n_groups: int, as_of_day: Optional[int] = None) -> Dict[str, "np.ndarray"]:
+    """
+    Vectorized core. gids: group code per transaction (0..n_groups-1), days:
+    date ordinals, amounts: floats. Returns parallel arrays for the detected
+    series: gid, cadence (index into CADENCES), interval, amount, count,
+    first_day, last_day, last_row (index of the latest transaction in the
+    input) and confidence. With as_of_day, series whose next occurrence is
+    overdue by more than one interval (cancelled) are dropped.
+    """
+    gids = np.asarray(gids, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+
+    order = np.lexsort((days, gids))
+    g, d, a = gids[order], days[order], amounts[order]
+    # several charges on one day count once
+    keep = np.ones(len(g), dtype=bool)
+    keep[1:] = (g[1:] != g[:-1]) | (d[1:] != d[:-1])
+    g, d, a, rows = g[keep], d[keep], a[keep], order[keep]
+
+    counts = np.bincount(g, minlength=n_groups)
+    ends = np.cumsum(counts) - 1
+    starts = ends - counts + 1
+
+    same = g[1:] == g[:-1]
+    gaps = (d[1:] - d[:-1])[same]
+    gap_gid = g[1:][same]
+    med_gap, gap_counts = _group_medians(gap_gid, gaps, n_groups)
+
+    cadence = np.full(n_groups, -1)
+    tol = np.zeros(n_groups)
+    for i, (_, _, lo, hi, tolerance, min_occ, _) in enumerate(CADENCES):
+        m = (med_gap >= lo) & (med_gap <= hi) & (counts >= min_occ)
+        cadence[m] = i
+        tol[m] = tolerance
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gap_ok = np.abs(gaps - med_gap[gap_gid]) <= tol[gap_gid]
+        interval_reg = np.bincount(gap_gid, weights=gap_ok, minlength=n_groups) / gap_counts
+
+        med_amount, _ = _group_medians(g, a, n_groups)
+        amount_ok = np.abs(a - med_amount[g]) <= AMOUNT_TOLERANCE * np.abs(med_amount[g]) + 0.01
+        amount_reg = np.bincount(g, weights=amount_ok, minlength=n_groups) / counts
+
+    confidence = np.nan_to_num(interval_reg * (0.5 + 0.5 * amount_reg))
+    found = (cadence >= 0) & (np.nan_to_num(interval_reg) >= MIN_INTERVAL_REGULARITY) & (confidence >= MIN_CONFIDENCE)
+    if as_of_day is not None:
+        nominal = np.array([c[1] for c in CADENCES])[np.maximum(cadence, 0)]
+        found &= d[np.maximum(ends, 0)] + 2 * nominal + tol >= as_of_day
+
+    sel = np.nonzero(found)[0]
+    return {
+        "gid": sel,
+        "cadence": cadence[sel],
+        "interval": med_gap[sel].astype(np.int64),
+        "amount": med_amount[sel],
+        "count": counts[sel],
+        "first_day": d[starts[sel]],
+        "last_day": d[ends[sel]],
+        "last_row": rows[ends[sel]],
+        "confidence": confidence[sel],
+    }
+
+
+def _add_months(d: date, months: int) -> date:
+    m = d.month - 1 + months
+    year, month = d.year + m // 12, m % 12 + 1
+    return d.replace(year=year, month=month, day=min(d.day, calendar.monthrange(year, month)[1]))
+
+
+def predict_next(last: date, cadence: str) -> date:
+    """Calendar-aware next occurrence: same day of month for monthly and longer cadences."""
+    for name, nominal, _, _, _, _, months in CADENCES:
+        if name == cadence:
+            return _add_months(last, months) if months else last + timedelta(days=nominal)
+    raise ValueError(f"unknown cadence: {cadence}")
+
+
+def detect_for_users(db: Session, user_ids: Sequence[int], as_of: Optional[date] = None) -> List[Dict]:
+    """Load the users' transactions and return detected series as dicts (recurring_series columns)."""
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("recurring detection needs numpy")
+    T = models.Transaction
+    rows = (
+        db.query(T.user_id, T.type, T.currency, T.description, T.date, T.amount, T.category_id)
+        .filter(T.user_id.in_(list(user_ids)), T.description.isnot(None), T.date.isnot(None))
+        .all()
+    )
+    keys: Dict[tuple, int] = {}
+    meta: List[tuple] = []
+    key_cache: Dict[str, Optional[str]] = {}
+    gids, days, amounts, kept = [], [], [], []
+    for i, (uid, typ, cur, desc, d, amount, _) in enumerate(rows):
+        mk = key_cache.get(desc)
+        if mk is None and desc not in key_cache:
+            mk = key_cache[desc] = merchant_key(desc)
+        if mk is None:
+            continue
+        k = (uid, typ, cur or "INR", mk)
+        gid = keys.get(k)
+        if gid is None:
+            gid = keys[k] = len(meta)
+            meta.append(k)
+        gids.append(gid)
+        days.append(d.toordinal())
+        amounts.append(float(amount))
+        kept.append(i)
+    if not meta:
+        return []
+
+    found = detect_series(gids, days, amounts, len(meta), as_of.toordinal() if as_of else None)
+    out = []
+    for j, gid in enumerate(found["gid"].tolist()):
+        uid, typ, cur, mk = meta[gid]
+        last_txn = rows[kept[int(found["last_row"][j])]]
+        cadence = CADENCES[int(found["cadence"][j])][0]
+        last = date.fromordinal(int(found["last_day"][j]))
+        out.append({
+            "user_id": uid,
+            "merchant_key": mk[:255],
+            "label": (last_txn.description or "")[:255] or None,
+            "type": typ,
+            "currency": cur,
+            "category_id": last_txn.category_id,
+            "cadence": cadence,
+            "interval_days": int(found["interval"][j]),
+            "amount": Decimal(str(round(float(found["amount"][j]), 2))),
+            "occurrences": int(found["count"][j]),
+            "first_date": date.fromordinal(int(found["first_day"][j])),
+            "last_date": last,
+            "next_date": predict_next(last, cadence),
+            "confidence": Decimal(str(round(float(found["confidence"][j]), 3))),
+        })
+    return out
+
+
+def run(db: Session, user_ids: Optional[Sequence[int]] = None, batch_users: int = 500, as_of: Optional[date] = None) -> int:
+    """
+    Rebuild recurring_series for the given users (default: all), batch_users
+    users per query, committing after each batch. Returns the number of
+    series written.
+    """
+    if user_ids is None:
+        user_ids = [uid for (uid,) in db.query(models.User.id).order_by(models.User.id).all()]
+    user_ids = list(user_ids)
+    as_of = as_of or date.today()
+    written = 0
+    for i in range(0, len(user_ids), batch_users):
+        batch = user_ids[i:i + batch_users]
+        series = detect_for_users(db, batch, as_of)
+        db.query(models.RecurringSeries).filter(models.RecurringSeries.user_id.in_(batch)).delete(synchronize_session=False)
+        if series:
+            db.bulk_insert_mappings(models.RecurringSeries, series)
+        db.commit()
+        written += len(series)
+        logger.info("recurring: users %s..%s -> %s series", batch[0], batch[-1], len(series))
+    return written
+
+
+__all__ = ["CADENCES", "NUMPY_AVAILABLE", "merchant_key", "detect_series", "predict_next", "detect_for_users", "run"]
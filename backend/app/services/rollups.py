@@ -0,0 +1,331 @@
+# app/services/rollups.py
+"""
+Daily / monthly analytics rollups.
+
+rollup_daily and rollup_monthly hold SUM(amount) and COUNT(*) per
+(user, period, type, category, currency). They are kept in step with the
+transactions table by app/services/ledger.py, inside the same DB transaction
+as the write, so analytics read a handful of buckets instead of scanning the
+user's whole history. `rebuild` recomputes them from scratch
+(see rebuild_rollups.py).
+"""
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.services import archive, fx, time_buckets
+
+logger = logging.getLogger(__name__)
+
+UNCATEGORIZED = 0
+DEFAULT_CURRENCY = "INR"
+
+# (user_id, period_start, type, category_id, currency)
+BucketKey = Tuple[int, date, models.TransactionType, int, str]
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def month_end(d: date) -> date:
+    nxt = (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return nxt - timedelta(days=1)
+
+
+def bucket_fields(txn) -> Tuple[int, date, models.TransactionType, int, str]:
+    """Rollup key fields for a Transaction (or a ledger snapshot)."""
+    return (
+        txn.user_id,
+        txn.date,
+        txn.type,
+        txn.category_id or UNCATEGORIZED,
+        txn.currency or DEFAULT_CURRENCY,
+    )
+
+
+def period_column(model):
+    return model.day if model is models.DailyRollup else model.month
+
+
+def _upsert(db: Session, model, rows: List[Dict]) -> None:
+    """Add rows' total/txn_count onto existing buckets, inserting missing ones."""
+    if not rows:
+        return
+    period = "day" if model is models.DailyRollup else "month"
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(model).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            total=model.total + stmt.inserted.total,
+            txn_count=model.txn_count + stmt.inserted.txn_count,
+        )
+        db.execute(stmt)
+        return
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", period, "type", "category_id", "currency"],
+            set_={
+                "total": model.total + stmt.excluded.total,
+                "txn_count": model.txn_count + stmt.excluded.txn_count,
+            },
+        )
+        db.execute(stmt)
+        return
+
+    # generic fallback: update, insert when the bucket does not exist yet
+    period_col = period_column(model)
+    for row in rows:
+        updated = (
+            db.query(model)
+            .filter(
+                model.user_id == row["user_id"],
+                period_col == row[period],
+                model.type == row["type"],
+                model.category_id == row["category_id"],
+                model.currency == row["currency"],
+            )
+            .update(
+                {model.total: model.total + row["total"], model.txn_count: model.txn_count + row["txn_count"]},
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            db.execute(insert(model), [row])
+
+
+def apply_changes(db: Session, changes: Iterable[Tuple[object, int]]) -> None:
+    """
+    Apply (transaction_or_snapshot, sign) pairs to both rollup tables;
+    sign is +1 for an added row and -1 for a removed one. Changes hitting the
+    same bucket are folded together first, so a bulk import issues one
+    statement per table regardless of its row count.
+    """
+    daily: Dict[BucketKey, List] = defaultdict(lambda: [Decimal("0"), 0])
+    for txn, sign in changes:
+        user_id, day, ttype, category_id, currency = bucket_fields(txn)
+        acc = daily[(user_id, day, ttype, category_id, currency)]
+        acc[0] += Decimal(str(txn.amount)) * sign
+        acc[1] += sign
+
+    monthly: Dict[BucketKey, List] = defaultdict(lambda: [Decimal("0"), 0])
+    for (user_id, day, ttype, category_id, currency), (amount, count) in daily.items():
+        acc = monthly[(user_id, month_start(day), ttype, category_id, currency)]
+        acc[0] += amount
+        acc[1] += count
+
+    _upsert(db, models.DailyRollup, _to_rows(daily, "day"))
+    _upsert(db, models.MonthlyRollup, _to_rows(monthly, "month"))
+
+
+def _to_rows(buckets: Dict[BucketKey, List], period: str) -> List[Dict]:
+    rows = []
+    for (user_id, start, ttype, category_id, currency), (amount, count) in buckets.items():
+        if amount == 0 and count == 0:
+            continue  # e.g. an update that did not touch any bucketed field
+        rows.append({
+            "user_id": user_id,
+            period: start,
+            "type": ttype,
+            "category_id": category_id,
+            "currency": currency,
+            "total": amount,
+            "txn_count": count,
+        })
+    return rows
+
+
+def reassign_category(db: Session, user_id: int, category_id: int) -> None:
+    """Fold a deleted category's buckets into UNCATEGORIZED (its transactions get category_id NULL)."""
+    for model in (models.DailyRollup, models.MonthlyRollup):
+        period = "day" if model is models.DailyRollup else "month"
+        src = (
+            db.query(model)
+            .filter(model.user_id == user_id, model.category_id == category_id)
+            .all()
+        )
+        if not src:
+            continue
+        moved = [{
+            "user_id": r.user_id,
+            period: getattr(r, period),
+            "type": r.type,
+            "category_id": UNCATEGORIZED,
+            "currency": r.currency,
+            "total": r.total,
+            "txn_count": r.txn_count,
+        } for r in src]
+        db.query(model).filter(model.user_id == user_id, model.category_id == category_id) \
+            .delete(synchronize_session=False)
+        _upsert(db, model, moved)
+        logger.debug("moved %d %s buckets of category %s to uncategorized", len(moved), period, category_id)
+
+
+def pick_rollup(start_date: Optional[date], end_date: Optional[date]):
+    """
+    Return the coarsest rollup model that answers [start_date, end_date]
+    exactly: monthly when both bounds are open or fall on month edges,
+    daily otherwise.
+    """
+    start_ok = start_date is None or start_date.day == 1
+    end_ok = end_date is None or end_date == month_end(end_date)
+    if start_ok and end_ok:
+        return models.MonthlyRollup
+    return models.DailyRollup
+
+
+def filter_range(q, model, start_date: Optional[date], end_date: Optional[date]):
+    col = period_column(model)
+    if model is models.MonthlyRollup:
+        # bounds are month-aligned here (pick_rollup), compare on month starts
+        start_date = month_start(start_date) if start_date else None
+        end_date = month_start(end_date) if end_date else None
+    if start_date:
+        q = q.filter(col >= start_date)
+    if end_date:
+        q = q.filter(col <= end_date)
+    return q
+
+
+def bucketed_query(
+    db: Session,
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    granularity: str,
+    reporting_currency: Optional[str] = None,
+):
+    """
+    Query of (bucket, income, expense) rows for the range, using the
+    coarsest rollup that fits. Returns (query, sql_bucketed); when
+    sql_bucketed is False the dialect had no bucket expression and rows are
+    per source period, to be folded with time_buckets.floor.
+
+    With reporting_currency, amounts in other currencies are converted in
+    the query at each day's rate (daily rollups then, see app/services/fx.py);
+    raises ValueError if a currency has no rates.
+    """
+    convert = reporting_currency is not None and fx.needs_conversion(db, user_id, reporting_currency)
+    if granularity in ("day", "week") or convert:
+        R = models.DailyRollup
+    else:
+        R = pick_rollup(start_date, end_date)
+    period = period_column(R)
+    bucket = time_buckets.bucket_expr(db.get_bind().dialect.name, period, granularity)
+    group_col = bucket if bucket is not None else period
+
+    amount = fx.converted(R.total, R.currency, R.day, reporting_currency) if convert else R.total
+    income = func.sum(case((R.type == models.TransactionType.income, amount), else_=0))
+    expense = func.sum(case((R.type == models.TransactionType.expense, amount), else_=0))
+    q = db.query(group_col.label("bucket"), income.label("income"), expense.label("expense")) \
+        .filter(R.user_id == user_id)
+    q = filter_range(q, R, start_date, end_date)
+    q = q.group_by(group_col).having(func.sum(R.txn_count) > 0)
+    return q, bucket is not None
+
+
+def bucket_series(
+    db: Session,
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    granularity: str = "day",
+    reporting_currency: Optional[str] = None,
+    zero_fill: bool = True,
+) -> List[Dict]:
+    """
+    Income, expense and net per calendar bucket, zero-filled between the
+    range bounds (or the first/last bucket with data when a bound is open).
+    With zero_fill=False only buckets holding transactions are returned, so
+    the output grows with the data rather than with the span of the range.
+    One conditional-aggregation query over the rollups; grouping into
+    week/month/quarter/year happens in SQL where the dialect allows.
+    """
+    q, _ = bucketed_query(db, user_id, start_date, end_date, granularity, reporting_currency)
+
+    # fold in Python too: a no-op when SQL already bucketed, the fallback otherwise
+    sums: Dict[date, List[Decimal]] = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    for b, inc, exp in q.all():
+        acc = sums[time_buckets.floor(b, granularity)]
+        acc[0] += Decimal(str(inc or 0))
+        acc[1] += Decimal(str(exp or 0))
+
+    if not zero_fill:
+        return [
+            {"date": b, "income": float(inc), "expense": float(exp), "net": float(inc - exp)}
+            for b, (inc, exp) in sorted(sums.items())
+        ]
+    if not sums and (start_date is None or end_date is None):
+        return []
+    first = start_date or min(sums)
+    last = end_date or max(sums)
+    out = []
+    for b in time_buckets.iter_buckets(first, last, granularity):
+        inc, exp = sums.get(b, (Decimal("0"), Decimal("0")))
+        out.append({"date": b, "income": float(inc), "expense": float(exp), "net": float(inc - exp)})
+    return out
+
+
+def rebuild(db: Session, user_id: Optional[int] = None, chunk_size: int = 5000) -> int:
+    """
+    Recompute rollups from the transactions table plus the users' archived
+    partitions (all users, or one). Works one user at a time so memory stays
+    bounded by that user's bucket count. Returns the number of daily buckets
+    written. Caller commits.
+    """
+    T = models.Transaction
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        user_ids = sorted({uid for (uid,) in db.query(T.user_id).distinct()}
+                          | {uid for (uid,) in db.query(models.TransactionArchive.user_id).distinct()})
+    for model in (models.DailyRollup, models.MonthlyRollup):
+        dq = db.query(model)
+        if user_id is not None:
+            dq = dq.filter(model.user_id == user_id)
+        dq.delete(synchronize_session=False)
+
+    category = func.coalesce(T.category_id, UNCATEGORIZED)
+    currency = func.coalesce(T.currency, DEFAULT_CURRENCY)
+    written = 0
+    for uid in user_ids:
+        rows = (
+            db.query(T.date, T.type, category, currency, func.sum(T.amount), func.count(T.id))
+            .filter(T.user_id == uid)
+            .group_by(T.date, T.type, category, currency)
+            .all()
+        )
+        daily: Dict[BucketKey, List] = defaultdict(lambda: [Decimal("0"), 0])
+        for day, ttype, cat, cur, total, count in rows + archive.daily_totals(db, uid):
+            acc = daily[(uid, day, ttype, cat if cat is not None else UNCATEGORIZED, cur or DEFAULT_CURRENCY)]
+            acc[0] += Decimal(str(total or 0))
+            acc[1] += count
+        monthly: Dict[BucketKey, List] = defaultdict(lambda: [Decimal("0"), 0])
+        for (_, day, ttype, cat, cur), (total, count) in daily.items():
+            acc = monthly[(uid, month_start(day), ttype, cat, cur)]
+            acc[0] += total
+            acc[1] += count
+        for model, buckets, period in ((models.DailyRollup, daily, "day"), (models.MonthlyRollup, monthly, "month")):
+            out = _to_rows(buckets, period)
+            for i in range(0, len(out), chunk_size):
+                db.execute(insert(model), out[i:i + chunk_size])
+        written += len(daily)
+    return written
+
+
+__all__ = [
+    "apply_changes", "reassign_category", "pick_rollup", "period_column", "filter_range",
+    "bucketed_query", "bucket_series",
+    "rebuild", "month_start", "month_end",
+]
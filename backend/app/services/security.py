@@ -3,15 +3,41 @@
 
 We use passlib pbkdf2_sha256 (pure-python) to avoid Windows bcrypt issues.
 JWT encode/decode uses python-jose for consistency with other modules.
+
+Request handlers hash through the *_async helpers: PBKDF2 runs on a small
+dedicated executor (PASSWORD_HASH_EXECUTOR / PASSWORD_HASH_WORKERS) instead
+of the threadpool shared by every sync endpoint, and at most
+PASSWORD_HASH_MAX_PENDING hashes may wait -- beyond that HashingBusy is
+raised so a login flood gets fast 503s instead of queueing forever.
+Rounds come from PASSWORD_HASH_ROUNDS; hashes made with fewer rounds are
+reported by verify_and_update_async so login can store a fresh one.
 """
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Dict, Any
+from typing import Optional, Tuple, Union, Dict, Any
 from passlib.context import CryptContext
 from jose import jwt, JWTError
+from fastapi.concurrency import run_in_threadpool
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def _make_ctx(rounds: int) -> CryptContext:
+    # min_rounds = rounds: stored hashes with fewer rounds "need update"
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+    )
+
+
 # Use pbkdf2_sha256 to avoid bcrypt backend problems on some Windows setups.
-pwd_ctx = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_ctx = _make_ctx(settings.PASSWORD_HASH_ROUNDS)
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(getattr(settings, "ACCESS_TOKEN_EXPIRE_MINUTES", 60))
@@ -71,3 +97,98 @@ def decode_access_token(token: str) -> Dict[str, Any]:
     except JWTError:
         # re-raise so caller/deps can convert to HTTPException
         raise
+
+
+# --- off-threadpool hashing ---
+
+class HashingBusy(RuntimeError):
+    """Too many password hashes already queued; callers answer 503."""
+
+
+_worker_ctxs: Dict[int, CryptContext] = {}
+
+
+def _worker_ctx(rounds: int) -> CryptContext:
+    # runs inside executor workers (possibly another process): build once per rounds value
+    ctx = _worker_ctxs.get(rounds)
+    if ctx is None:
+        ctx = _worker_ctxs[rounds] = _make_ctx(rounds)
+    return ctx
+
+
+def _hash_job(password: str, rounds: int) -> str:
+    return _worker_ctx(rounds).hash(password)
+
+
+def _verify_job(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    try:
+        return _worker_ctx(rounds).verify_and_update(password, hashed)
+    except Exception:
+        return False, None
+
+
+class _HashExecutor:
+    """Lazily created executor plus a cap on submitted-but-unfinished jobs."""
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> Optional[Executor]:
+        if self.kind == "shared":
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        try:
+                            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                        except Exception:  # e.g. no multiprocessing support in the sandbox
+                            logger.warning("password hashing: process pool unavailable, using threads", exc_info=True)
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+        return self._executor
+
+    async def run(self, fn, *args):
+        executor = self._get()
+        if executor is None:
+            return await run_in_threadpool(fn, *args)  # "shared": the request threadpool, as before
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy("password hashing queue is full")
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+hash_executor = _HashExecutor(
+    settings.PASSWORD_HASH_EXECUTOR, settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    if password is None:
+        raise ValueError("password cannot be None")
+    return await hash_executor.run(_hash_job, password, settings.PASSWORD_HASH_ROUNDS)
+
+
+async def verify_and_update_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    (valid, new_hash). new_hash is set when the password is valid but the
+    stored hash uses outdated parameters; the caller should store it.
+    """
+    if plain is None or hashed is None:
+        return False, None
+    return await hash_executor.run(_verify_job, plain, hashed, settings.PASSWORD_HASH_ROUNDS)
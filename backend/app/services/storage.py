@@ -0,0 +1,230 @@
+# app/services/storage.py
+"""
+Upload storage for receipt images and statement PDFs.
+
+One backend, picked by STORAGE_BACKEND:
+  - "local": files under UPLOAD_DIR
+  - "s3": an S3-compatible bucket (S3_BUCKET, S3_PREFIX; S3_ENDPOINT_URL
+    points at MinIO or a local stand-in such as `moto_server`), via boto3
+
+Keys are hash-sharded as "<uu>/<user_id>/<ff>/<name>" (uu from the user id,
+ff from the file name): the top level stays at 256 entries and a user's
+uploads spread over 256 subdirectories, while all of one user's files still
+share a prefix. receipts.file_path keeps storing "uploads/<key>", the URL
+the frontend opens (served by app/api/v1/files.py); rows written before
+sharding ("uploads/<user_id>/<name>") resolve to the same files as before.
+
+Reads and writes stream in CHUNK_SIZE pieces and never hold a whole file in
+memory; `iter_range` serves HTTP Range requests. Code that needs a real
+file (Tesseract, pdfplumber) goes through `local_path`, which downloads to
+a temporary file for remote backends.
+"""
+import hashlib
+import logging
+import os
+import posixpath
+import shutil
+import tempfile
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import BinaryIO, ContextManager, Iterator, Optional
+
+from app.core.config import settings
+from app.core.lazy import available, lazy_import
+
+# optional object-store client, imported on first use (app/core/lazy.py)
+BOTO3_AVAILABLE = available("boto3")
+boto3 = lazy_import("boto3")
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+URL_PREFIX = "uploads/"
+
+
+def new_key(user_id: int, filename: str) -> str:
+    """Unique, sharded key for a new upload of `filename` (already stripped of any directory part)."""
+    name = f"{int(time.time())}_{str(uuid.uuid4())[:8]}_{filename}"
+    user_shard = hashlib.sha1(str(user_id).encode()).hexdigest()[:2]
+    file_shard = hashlib.sha1(name.encode("utf-8")).hexdigest()[:2]
+    return f"{user_shard}/{user_id}/{file_shard}/{name}"
+
+
+def file_path_for(key: str) -> str:
+    """Value stored in receipts.file_path (and the public URL path) for a key."""
+    return URL_PREFIX + key
+
+
+def key_from_file_path(file_path: str) -> str:
+    """Inverse of file_path_for; also accepts legacy Windows-style relative paths."""
+    path = file_path.replace("\\", "/")
+    return path[len(URL_PREFIX):] if path.startswith(URL_PREFIX) else path
+
+
+def _clean_key(key: str) -> str:
+    key = posixpath.normpath(key.replace("\\", "/")).lstrip("/")
+    if key in ("", ".") or key == ".." or key.startswith("../"):
+        raise ValueError(f"invalid storage key: {key!r}")
+    return key
+
+
+class Storage(ABC):
+    """Interface of the storage backends; keys are relative, '/'-separated paths."""
+
+    @abstractmethod
+    def save(self, key: str, fileobj: BinaryIO) -> None:
+        ...
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """Size in bytes; FileNotFoundError if the key does not exist."""
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Bytes start..end (inclusive; end=None means to the end) in CHUNK_SIZE pieces."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the object; a missing key is not an error."""
+
+    @abstractmethod
+    def local_path(self, key: str) -> ContextManager[str]:
+        """A filesystem path holding the object's bytes for the duration of the block (a @contextmanager)."""
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def path(self, key: str) -> str:
+        path = os.path.join(self.root, *_clean_key(key).split("/"))
+        if os.path.commonpath([self.root, os.path.abspath(path)]) != self.root:
+            raise ValueError(f"invalid storage key: {key!r}")
+        return path
+
+    def save(self, key: str, fileobj: BinaryIO) -> None:
+        dest = self.path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(fileobj, out, CHUNK_SIZE)
+            os.replace(tmp, dest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        with open(self.path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        path = self.path(key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        yield path
+
+
+class S3Storage(Storage):
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None, region: Optional[str] = None):
+        if not BOTO3_AVAILABLE:
+            raise RuntimeError("boto3 not available. pip install boto3")
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs S3_BUCKET")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+
+    def _object(self, key: str) -> str:
+        return self.prefix + _clean_key(key)
+
+    def _missing(self, exc) -> bool:
+        code = str(getattr(exc, "response", {}).get("Error", {}).get("Code", ""))
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def save(self, key: str, fileobj: BinaryIO) -> None:
+        # multipart upload in parts; the file is never read into memory as a whole
+        self.client.upload_fileobj(fileobj, self.bucket, self._object(key))
+
+    def size(self, key: str) -> int:
+        try:
+            return int(self.client.head_object(Bucket=self.bucket, Key=self._object(key))["ContentLength"])
+        except Exception as exc:
+            if self._missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._object(key), Range=byte_range)["Body"]
+        except Exception as exc:
+            if self._missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+        try:
+            yield from body.iter_chunks(CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object(key))
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        fd, tmp = tempfile.mkstemp(suffix=os.path.splitext(key)[1], prefix="upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in self.iter_range(key):
+                    out.write(chunk)
+            yield tmp
+        finally:
+            os.remove(tmp)
+
+
+_backend: Optional[Storage] = None
+
+
+def make_storage(kind: Optional[str] = None) -> Storage:
+    kind = (kind or settings.STORAGE_BACKEND).lower()
+    if kind == "local":
+        return LocalStorage(settings.UPLOAD_DIR)
+    if kind == "s3":
+        return S3Storage(settings.S3_BUCKET, settings.S3_PREFIX, settings.S3_ENDPOINT_URL, settings.S3_REGION)
+    raise RuntimeError(f"unknown STORAGE_BACKEND: {kind}")
+
+
+def storage() -> Storage:
+    """The configured backend, created on first use (keeps boto3 out of worker startup)."""
+    global _backend
+    if _backend is None:
+        _backend = make_storage()
+        logger.info("upload storage: %s", type(_backend).__name__)
+    return _backend
+
+
+__all__ = [
+    "BOTO3_AVAILABLE", "CHUNK_SIZE", "Storage", "LocalStorage", "S3Storage", "make_storage", "storage",
+    "new_key", "file_path_for", "key_from_file_path",
+]
@@ -0,0 +1,147 @@
+# app/services/summary.py
+"""
+Dashboard summary in one table pass.
+
+A single grouped query over the user's transactions in the range --
+GROUP BY (type, category, period bucket, description) -- is fanned out in
+Python into overall totals, a per-category breakdown, a per-period series
+and the top merchants. Portable across MySQL/SQLite (no GROUPING SETS
+needed) and the grouped row count is bounded by the number of transactions.
+Years moved to cold storage (app/services/archive.py) are grouped the same
+way from their Parquet partitions and fed into the same fan-out.
+"""
+import re
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.services import archive, fx, time_buckets
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def merchant_label(description: Optional[str]) -> Optional[str]:
+    """Collapse whitespace/case so 'NETFLIX  ' and 'Netflix' count as one merchant."""
+    if not description:
+        return None
+    label = _SPACES_RE.sub(" ", description).strip()
+    return label.title() if label else None
+
+
+def _archived_groups(db: Session, user_id: int, start_date: Optional[date], end_date: Optional[date],
+                     reporting_currency: Optional[str]) -> List[tuple]:
+    """Archived rows in range grouped like the SQL query (per day; the caller buckets)."""
+    parts = archive.partitions(db, user_id, start_date, end_date)
+    if not parts:
+        return []
+    names = archive.category_names(db, user_id)
+    table = archive.read_rows(parts, names, start_date, end_date,
+                              columns=("type", "category_id", "date", "description", "currency", "amount"))
+    grouped = table.group_by(["type", "category_id", "date", "description", "currency"]) \
+        .aggregate([("amount", "sum"), ("amount", "count")])
+    out = []
+    for r in grouped.to_pylist():
+        amount = r["amount_sum"]
+        if reporting_currency is not None:
+            amount = fx.rates.convert(amount, r["currency"] or "INR", reporting_currency, r["date"])
+        out.append((models.TransactionType(r["type"]), r["category_id"], names.get(r["category_id"]),
+                    r["date"], r["description"], amount, r["amount_count"]))
+    return out
+
+
+def dashboard_summary(
+    db: Session,
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    granularity: str = "month",
+    top_merchants: int = 5,
+    reporting_currency: Optional[str] = None,
+) -> Dict:
+    T = models.Transaction
+    amount = T.amount
+    convert = reporting_currency is not None and fx.needs_conversion(db, user_id, reporting_currency)
+    if convert:
+        amount = fx.converted(T.amount, T.currency, T.date, reporting_currency)
+    bucket = time_buckets.bucket_expr(db.get_bind().dialect.name, T.date, granularity)
+    group_col = bucket if bucket is not None else T.date
+
+    q = db.query(
+        T.type, T.category_id, models.Category.name, group_col.label("bucket"), T.description,
+        func.sum(amount), func.count(T.id),
+    ).outerjoin(models.Category, models.Category.id == T.category_id) \
+        .filter(T.user_id == user_id)
+    if start_date:
+        q = q.filter(T.date >= start_date)
+    if end_date:
+        q = q.filter(T.date <= end_date)
+    q = q.group_by(T.type, T.category_id, models.Category.name, group_col, T.description)
+
+    zero = Decimal("0")
+    totals = {"income": zero, "expense": zero, "count": 0}
+    categories: Dict[Optional[int], Dict] = {}
+    periods: Dict[date, List[Decimal]] = defaultdict(lambda: [zero, zero])
+    merchants: Dict[str, List] = defaultdict(lambda: [zero, 0])
+
+    rows = q.all() + _archived_groups(db, user_id, start_date, end_date, reporting_currency if convert else None)
+    for ttype, category_id, category_name, b, description, amount, count in rows:
+        amount = Decimal(str(amount or 0))
+        is_income = ttype == models.TransactionType.income
+        totals["income" if is_income else "expense"] += amount
+        totals["count"] += count
+
+        period = periods[time_buckets.floor(b, granularity)]
+        period[0 if is_income else 1] += amount
+
+        if is_income:
+            continue
+        cat = categories.setdefault(category_id, {
+            "category_id": category_id,
+            "category": category_name or "Uncategorized",
+            "total": zero,
+            "count": 0,
+        })
+        cat["total"] += amount
+        cat["count"] += count
+
+        label = merchant_label(description)
+        if label:
+            merchants[label][0] += amount
+            merchants[label][1] += count
+
+    by_period = []
+    if periods or (start_date is not None and end_date is not None):
+        first = start_date or min(periods)
+        last = end_date or max(periods)
+        for b in time_buckets.iter_buckets(first, last, granularity):
+            inc, exp = periods.get(b, (zero, zero))
+            by_period.append({"date": b, "income": float(inc), "expense": float(exp), "net": float(inc - exp)})
+
+    by_category = sorted(categories.values(), key=lambda c: c["total"], reverse=True)
+    for c in by_category:
+        c["total"] = float(c["total"])
+    top = sorted(merchants.items(), key=lambda kv: kv[1][0], reverse=True)[:top_merchants]
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "granularity": granularity,
+        "currency": reporting_currency,
+        "totals": {
+            "income": float(totals["income"]),
+            "expense": float(totals["expense"]),
+            "net": float(totals["income"] - totals["expense"]),
+            "count": totals["count"],
+        },
+        "by_category": by_category,
+        "by_period": by_period,
+        "top_merchants": [{"merchant": m, "total": float(v[0]), "count": v[1]} for m, v in top],
+    }
+
+
+__all__ = ["dashboard_summary", "merchant_label"]
@@ -0,0 +1,97 @@
+# app/services/time_buckets.py
+"""
+Calendar bucketing for analytics: day | week | month | quarter | year.
+
+`bucket_expr` renders "start of bucket" as SQL for the current dialect so
+grouping happens in the database; `floor` / `iter_buckets` are the Python
+equivalents used for zero-filling gaps. Weeks start on Monday.
+"""
+from datetime import date, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import Date, literal_column, type_coerce
+
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+
+# refuse to zero-fill absurd ranges (e.g. 200 years by day)
+MAX_BUCKETS = 10000
+
+
+def _add_months(d: date, months: int) -> date:
+    m = d.month - 1 + months
+    return d.replace(year=d.year + m // 12, month=m % 12 + 1, day=1)
+
+
+def floor(d: date, granularity: str) -> date:
+    if granularity == "day":
+        return d
+    if granularity == "week":
+        return d - timedelta(days=d.weekday())
+    if granularity == "month":
+        return d.replace(day=1)
+    if granularity == "quarter":
+        return d.replace(month=((d.month - 1) // 3) * 3 + 1, day=1)
+    if granularity == "year":
+        return d.replace(month=1, day=1)
+    raise ValueError(f"unknown granularity: {granularity}")
+
+
+def next_bucket(start: date, granularity: str) -> date:
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return _add_months(start, 1)
+    if granularity == "quarter":
+        return _add_months(start, 3)
+    if granularity == "year":
+        return start.replace(year=start.year + 1, month=1, day=1)
+    raise ValueError(f"unknown granularity: {granularity}")
+
+
+def iter_buckets(first: date, last: date, granularity: str) -> Iterator[date]:
+    """Bucket starts covering [first, last]."""
+    cur = floor(first, granularity)
+    end = floor(last, granularity)
+    n = 0
+    while cur <= end:
+        n += 1
+        if n > MAX_BUCKETS:
+            raise ValueError(f"range spans more than {MAX_BUCKETS} {granularity} buckets")
+        yield cur
+        cur = next_bucket(cur, granularity)
+
+
+def bucket_expr(dialect: str, column, granularity: str):
+    """
+    SQL expression for the start of the bucket containing `column` (a Date
+    column), or None when the dialect is not supported -- callers then group
+    by the column itself and fold with `floor` in Python.
+    """
+    if granularity == "day":
+        return column
+    c = f"{column.table.name}.{column.name}"
+    sql: Optional[str] = None
+    if dialect == "mysql":
+        sql = {
+            "week": f"DATE_SUB({c}, INTERVAL WEEKDAY({c}) DAY)",
+            "month": f"DATE_SUB({c}, INTERVAL DAYOFMONTH({c}) - 1 DAY)",
+            "quarter": f"MAKEDATE(YEAR({c}), 1) + INTERVAL (QUARTER({c}) - 1) QUARTER",
+            "year": f"MAKEDATE(YEAR({c}), 1)",
+        }[granularity]
+    elif dialect == "sqlite":
+        sql = {
+            "week": f"date({c}, '-' || ((CAST(strftime('%w', {c}) AS INTEGER) + 6) % 7) || ' days')",
+            "month": f"date({c}, 'start of month')",
+            "quarter": f"date({c}, 'start of month', '-' || ((CAST(strftime('%m', {c}) AS INTEGER) - 1) % 3) || ' months')",
+            "year": f"date({c}, 'start of year')",
+        }[granularity]
+    elif dialect == "postgresql":
+        sql = f"CAST(date_trunc('{granularity}', {c}) AS DATE)"
+    if sql is None:
+        return None
+    return type_coerce(literal_column(sql), Date)
+
+
+__all__ = ["GRANULARITIES", "MAX_BUCKETS", "floor", "next_bucket", "iter_buckets", "bucket_expr"]
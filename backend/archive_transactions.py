@@ -0,0 +1,29 @@
+# archive_transactions.py — batch job: move closed years of transactions to Parquet cold storage
+import sys
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.db.session import SessionLocal
+from app.services import archive
+
+def archive_transactions(user_id=None, through_year=None):
+    db = SessionLocal()
+    try:
+        through_year = through_year if through_year is not None else archive.closed_through_year()
+        moved = archive.archive_users(db, [user_id] if user_id is not None else None, through_year)
+        scope = f"user {user_id}" if user_id is not None else "all users"
+        print(f"Archived {moved} transactions up to {through_year} for {scope}")
+        return 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        print("Usage: python archive_transactions.py [user_id|all] [through_year]")
+        sys.exit(2)
+    uid = int(sys.argv[1]) if len(sys.argv) >= 2 and sys.argv[1] != "all" else None
+    year = int(sys.argv[2]) if len(sys.argv) == 3 else None
+    sys.exit(archive_transactions(uid, year))
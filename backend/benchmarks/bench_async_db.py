@@ -0,0 +1,172 @@
+# benchmarks/bench_async_db.py
+"""
+Benchmark: sync (threadpool) vs async (DB_ASYNC) route handlers at high concurrency.
+
+Builds both variants of the transactions/categories/analytics/receipts
+routers in-process on one throwaway SQLite database and drives each with
+--concurrency client loops for --seconds over a mix of GET endpoints,
+reporting req/s and p50/p95/p99 latency.
+
+SQLite answers in microseconds, which hides what async is for, so every
+statement is delayed by --latency-ms inside the driver's own thread (the
+request thread for pysqlite, the connection thread for aiosqlite) -- the
+same place a network round trip to MySQL would block. Both variants get
+the same --pool connections; the sync one is additionally capped by
+Starlette's 40 threadpool threads. On a single core both sides are soon
+CPU bound, so raise --latency-ms to see the effect of waiting alone.
+
+Run from the backend folder (needs aiosqlite and greenlet):
+    python -m benchmarks.bench_async_db [--concurrency 200] [--seconds 10] [--latency-ms 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+_db_file = os.path.join(tempfile.mkdtemp(prefix="bench_async_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("ANALYTICS_CACHE_BACKEND", "none")  # every analytics call hits the DB
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.util import await_only  # noqa: E402
+
+from app.api.v1 import analytics, categories, receipts, transactions  # noqa: E402
+from app.api.v1.async_routes import asyncify  # noqa: E402
+from app.db import models, session  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.services import ledger  # noqa: E402
+from app.services.security import create_access_token  # noqa: E402
+
+ROUTERS = [
+    (transactions.router, "/api/v1/transactions"),
+    (categories.router, "/api/v1/categories"),
+    (analytics.router, "/api/v1/analytics"),
+    (receipts.router, "/api/v1/receipts"),
+]
+ENDPOINTS = [
+    "/api/v1/transactions?per_page=20",
+    "/api/v1/transactions/1",
+    "/api/v1/categories",
+    "/api/v1/analytics/by_category",
+    "/api/v1/receipts",
+]
+
+
+def pct(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def configure_engines(pool: int, latency_ms: float) -> None:
+    delay = latency_ms / 1000.0
+
+    def slow(_statement):
+        time.sleep(delay)
+
+    sync_engine = create_engine(session.DATABASE_URL, pool_size=pool, max_overflow=0, future=True)
+    async_engine = create_async_engine(session.async_database_url(session.DATABASE_URL), pool_size=pool, max_overflow=0)
+    if delay > 0:
+        event.listen(sync_engine, "connect", lambda conn, rec: conn.set_trace_callback(slow))
+        event.listen(
+            async_engine.sync_engine, "connect",
+            lambda conn, rec: await_only(conn.driver_connection.set_trace_callback(slow)),
+        )
+    session.SessionLocal.configure(bind=sync_engine)
+    session._async_sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def seed(rows: int) -> str:
+    Base.metadata.create_all(bind=session.engine)
+    db = session.SessionLocal()
+    user = models.User(email="bench@example.com", username="bench", hashed_password="x")
+    db.add(user)
+    db.flush()
+    cats = [models.Category(user_id=user.id, name=f"cat{i}") for i in range(8)]
+    db.add_all(cats)
+    db.flush()
+    start = date(2024, 1, 1)
+    txns = [
+        models.Transaction(
+            user_id=user.id, type=models.TransactionType.expense, amount=Decimal(10 + i % 90),
+            currency="INR", date=start + timedelta(days=i % 365), description=f"row {i}",
+            category_id=cats[i % len(cats)].id,
+        )
+        for i in range(rows)
+    ]
+    db.add_all(txns)
+    ledger.record_created(db, txns)
+    db.commit()
+    token = create_access_token(str(user.id))
+    db.close()
+    return token
+
+
+def build_app(use_async: bool) -> FastAPI:
+    app = FastAPI()
+    for router, prefix in ROUTERS:
+        app.include_router(asyncify(router) if use_async else router, prefix=prefix)
+    return app
+
+
+async def run(app: FastAPI, token: str, concurrency: int, seconds: float):
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies, errors = [], 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for path in ENDPOINTS:  # warm principal cache, fx cache, imports
+            r = await client.get(path, headers=headers)
+            assert r.status_code == 200, (path, r.status_code, r.text)
+        stop = time.perf_counter() + seconds
+
+        async def loop(i: int):
+            nonlocal errors
+            n = i
+            while time.perf_counter() < stop:
+                path = ENDPOINTS[n % len(ENDPOINTS)]
+                n += 1
+                t = time.perf_counter()
+                r = await client.get(path, headers=headers)
+                latencies.append((time.perf_counter() - t) * 1000)
+                if r.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(loop(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated DB round trip per statement")
+    parser.add_argument("--pool", type=int, default=0, help="connections per engine (default 2 x concurrency)")
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    # sync requests hold a checked-out connection while queued for the next threadpool hop,
+    # so a pool smaller than the number of in-flight requests stalls them (pool timeouts)
+    args.pool = args.pool or 2 * args.concurrency
+    token = seed(args.rows)
+    configure_engines(args.pool, args.latency_ms)
+    print(f"{args.concurrency} concurrent clients for {args.seconds:.0f}s, {args.latency_ms}ms per statement, "
+          f"pool={args.pool}, {args.rows} rows, cpus={os.cpu_count()}")
+    print(f"{'mode':6} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    for mode in ("sync", "async"):
+        rps, lat, errors = asyncio.run(run(build_app(mode == "async"), token, args.concurrency, args.seconds))
+        print(f"{mode:6} {rps:8.1f} {pct(lat, 50):7.1f}ms {pct(lat, 95):7.1f}ms {pct(lat, 99):7.1f}ms {errors:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_login_flood.py
+"""
+Benchmark: latency of normal endpoints while a login flood is running.
+
+Starts the app in-process on a throwaway SQLite database, then for each
+hashing mode (PASSWORD_HASH_EXECUTOR values: shared, thread, process) runs
+--logins concurrent login loops for --seconds while one client keeps
+calling GET /api/v1/categories, and reports that probe's p50/p95/p99 plus
+login throughput and 503s.
+
+"shared" is the old behaviour (PBKDF2 on the request threadpool).
+
+Run from the backend folder:
+    python -m benchmarks.bench_login_flood [--logins 64] [--seconds 10]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+_db_file = os.path.join(tempfile.mkdtemp(prefix="bench_login_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("AUTH_CACHE_TTL_SECONDS", "0")  # probe pays the normal auth lookup
+os.environ.setdefault("RATE_LIMIT_BACKEND", "none")  # measure hashing, not the login rate limiter
+
+import httpx  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import security  # noqa: E402
+
+CREDENTIALS = {"email": "flood@example.com", "password": "correct horse"}
+
+
+def pct(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def run_mode(mode: str, logins: int, seconds: float):
+    security.hash_executor.shutdown()
+    security.hash_executor = security._HashExecutor(mode, settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        token = (await client.post("/api/v1/auth/login", json=CREDENTIALS)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        stop = time.perf_counter() + seconds
+        counts = {"ok": 0, "busy": 0}
+        probe = []
+
+        async def flood():
+            while time.perf_counter() < stop:
+                r = await client.post("/api/v1/auth/login", json=CREDENTIALS)
+                counts["ok" if r.status_code == 200 else "busy"] += 1
+                if r.status_code == 503:
+                    await asyncio.sleep(float(r.headers.get("Retry-After", "1")) / 10)
+
+        async def probe_loop():
+            await asyncio.sleep(0.2)  # let the flood build up
+            while time.perf_counter() < stop:
+                t = time.perf_counter()
+                r = await client.get("/api/v1/categories", headers=headers)
+                assert r.status_code == 200, r.status_code
+                probe.append((time.perf_counter() - t) * 1000)
+
+        await asyncio.gather(probe_loop(), *(flood() for _ in range(logins)))
+    return probe, counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64, help="concurrent login loops")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--modes", default="shared,thread,process")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    from fastapi.testclient import TestClient
+    with TestClient(app) as c:
+        c.post("/api/v1/auth/register", json=CREDENTIALS)
+
+    print(f"{args.logins} concurrent logins for {args.seconds:.0f}s, pbkdf2 rounds={settings.PASSWORD_HASH_ROUNDS}, "
+          f"workers={settings.PASSWORD_HASH_WORKERS}, cpus={os.cpu_count()}")
+    print(f"{'mode':8} {'probe p50':>10} {'p95':>8} {'p99':>8} {'probes':>7} {'logins/s':>9} {'503s':>6}")
+    for mode in args.modes.split(","):
+        probe, counts = asyncio.run(run_mode(mode, args.logins, args.seconds))
+        print(f"{mode:8} {pct(probe, 50):8.1f}ms {pct(probe, 95):6.1f}ms {pct(probe, 99):6.1f}ms "
+              f"{len(probe):7d} {counts['ok'] / args.seconds:9.1f} {counts['busy']:6d}")
+    security.hash_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
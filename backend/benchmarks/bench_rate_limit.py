@@ -0,0 +1,67 @@
+# benchmarks/bench_rate_limit.py
+"""
+Micro-benchmark: per-request cost of the login rate limiter.
+
+Times RateLimiter.check (IP bucket + email bucket, in-memory backend) over
+--keys distinct clients, and one full pass of a login POST through
+RateLimitMiddleware in front of a no-op ASGI app.
+
+Run from the backend folder:
+    python -m benchmarks.bench_rate_limit [--calls 200000] [--keys 10000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # nothing is queried; session.py just needs a URL
+
+from app.services.rate_limit import MemoryBuckets, RateLimiter, RateLimitMiddleware, Rule  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    args = parser.parse_args()
+
+    limiter = RateLimiter(MemoryBuckets(), Rule("ip", 1_000_000, 1_000_000), Rule("email", 1_000_000, 1_000_000))
+    ips = [f"10.0.{i // 256}.{i % 256}" for i in range(args.keys)]
+    emails = [f"user{i}@example.com" for i in range(args.keys)]
+
+    t = time.perf_counter()
+    for i in range(args.calls):
+        limiter.check(ips[i % args.keys], emails[i % args.keys])
+    per_check = (time.perf_counter() - t) / args.calls * 1e6
+    print(f"RateLimiter.check (ip + email): {per_check:.2f} us")
+
+    async def noop_app(scope, receive, send):
+        await receive()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def run(app, n):
+        body = b'{"email": "user1@example.com", "password": "secret1"}'
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            pass
+
+        t = time.perf_counter()
+        for i in range(n):
+            scope = {"type": "http", "method": "POST", "path": "/api/v1/auth/login", "headers": [], "client": (ips[i % args.keys], 1234)}
+            await app(scope, receive, send)
+        return (time.perf_counter() - t) / n * 1e6
+
+    n = args.calls // 4
+    bare = asyncio.run(run(noop_app, n))
+    wrapped = asyncio.run(run(RateLimitMiddleware(noop_app, limiter, ["/api/v1/auth/login"]), n))
+    print(f"middleware overhead per login POST: {wrapped - bare:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
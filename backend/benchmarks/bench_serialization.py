@@ -0,0 +1,88 @@
+# benchmarks/bench_serialization.py
+"""
+Micro-benchmark: cost of serializing one 200-row transactions page.
+
+Compares the old path (dicts -> FastAPI response_model validation ->
+jsonable_encoder -> json) with pydantic orm_mode validation per row and the
+FastJSONResponse path (plain dicts -> orjson).
+
+Run from the backend folder:
+    python -m benchmarks.bench_serialization [--rows 200] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # nothing is queried; session.py just needs a URL
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.api.v1.transactions import txn_to_dict  # noqa: E402
+from app.core.json_response import ORJSON_AVAILABLE, dumps  # noqa: E402
+from app.db import models  # noqa: E402
+from app.schemas.transactions import TransactionPage  # noqa: E402
+
+
+def make_rows(n: int):
+    cat = models.Category(id=1, user_id=1, name="Groceries")
+    start = date(2025, 1, 1)
+    rows = []
+    for i in range(n):
+        rows.append(models.Transaction(
+            id=i + 1,
+            user_id=1,
+            type=models.TransactionType.expense if i % 3 else models.TransactionType.income,
+            amount=Decimal("123.45") + i,
+            currency="INR",
+            date=start + timedelta(days=i % 365),
+            description=f"Supermarket purchase #{i}",
+            category_id=1,
+            category=cat,
+            created_at=datetime(2025, 1, 1, 12, 0, 0),
+        ))
+    return rows
+
+
+def legacy_dict(txn):
+    # txn_to_dict as it was before FastJSONResponse (strings for dates)
+    d = txn_to_dict(txn)
+    d["date"] = d["date"].isoformat()
+    d["created_at"] = d["created_at"].isoformat()
+    return d
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    rows = make_rows(args.rows)
+    page = lambda items: {"total": len(items), "page": 1, "per_page": len(items), "items": items}  # noqa: E731
+
+    def jsonable_path():
+        body = page([legacy_dict(t) for t in rows])
+        return json.dumps(jsonable_encoder(body)).encode("utf-8")
+
+    def pydantic_path():
+        body = TransactionPage.parse_obj(page([txn_to_dict(t) for t in rows]))
+        return json.dumps(jsonable_encoder(body)).encode("utf-8")
+
+    def fast_path():
+        return dumps(page([txn_to_dict(t) for t in rows]))
+
+    print(f"rows per page: {args.rows}, repeats: {args.repeat}, orjson: {ORJSON_AVAILABLE}")
+    for name, fn in (("jsonable_encoder + json", jsonable_path),
+                     ("pydantic models + jsonable_encoder", pydantic_path),
+                     ("FastJSONResponse (dicts + orjson)", fast_path)):
+        best = min(timeit.repeat(fn, number=args.repeat, repeat=3)) / args.repeat
+        print(f"  {name:<36} {best * 1e3:8.3f} ms/page  ({len(fn())} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# benchmarks/generate_data.py
+"""
+Synthetic data generator for load tests.
+
+Bulk-inserts --users users, each with --categories categories,
+--transactions transactions over the last --days days and --receipts
+receipt rows, using Core executemany inserts in --batch sized chunks (no
+ORM objects, no per-row flush). Transactions look like a real ledger: a
+monthly salary, rent and subscriptions on fixed days, and day-to-day
+spending at recurring merchants with log-normal amounts. Rollups are rebuilt
+afterwards so the analytics endpoints see the data.
+
+All users share one password (hashed once) and get emails
+<prefix><n>@example.com. A manifest with their ids is written for
+benchmarks/load_runner.py.
+
+Run from the backend folder against the DATABASE_URL in .env (or export one):
+    python -m benchmarks.generate_data --users 100 --transactions 2000 [--manifest benchmarks/loadgen_users.json]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.services import rollups  # noqa: E402
+from app.services.security import hash_password  # noqa: E402
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(__file__), "loadgen_users.json")
+
+# category -> (merchants, median amount, share of day-to-day spending)
+SPENDING = {
+    "Groceries": (["BIGBASKET", "DMART", "RELIANCE FRESH", "MORE SUPERMARKET"], 900, 0.30),
+    "Dining": (["SWIGGY", "ZOMATO", "STARBUCKS", "CAFE COFFEE DAY"], 450, 0.25),
+    "Transport": (["UBER", "OLA", "INDIAN OIL", "METRO CARD"], 300, 0.20),
+    "Shopping": (["AMAZON", "FLIPKART", "MYNTRA"], 1500, 0.12),
+    "Utilities": (["BESCOM", "AIRTEL", "JIO RECHARGE"], 800, 0.08),
+    "Health": (["APOLLO PHARMACY", "PRACTO"], 600, 0.05),
+}
+# (description, category, day of month, amount)
+MONTHLY = [
+    ("RENT TRANSFER", "Housing", 1, 25000),
+    ("NETFLIX.COM", "Subscriptions", 5, 649),
+    ("SPOTIFY", "Subscriptions", 12, 119),
+    ("GYM MEMBERSHIP", "Health", 3, 1500),
+]
+SALARY = ("SALARY CREDIT ACME CORP", "Salary", 28, 85000)
+
+
+def category_names(count: int):
+    names = list(SPENDING) + sorted(({m[1] for m in MONTHLY} | {SALARY[1]}) - set(SPENDING))
+    extra = [f"Misc {i}" for i in range(max(0, count - len(names)))]
+    return (names + extra)[:max(count, 1)]
+
+
+def user_transactions(rng: random.Random, user_id: int, cats: dict, count: int, start: date, days: int):
+    rows = []
+    day = start
+    end = start + timedelta(days=days)
+    while day < end and len(rows) < count:
+        for desc, cat, dom, amount in MONTHLY + [SALARY]:
+            if day.day == dom and cat in cats:
+                rows.append({
+                    "user_id": user_id,
+                    "type": models.TransactionType.income if desc == SALARY[0] else models.TransactionType.expense,
+                    "amount": amount, "currency": "INR", "date": day, "description": desc, "category_id": cats[cat],
+                })
+        day += timedelta(days=1)
+    spend = [c for c in SPENDING if c in cats]
+    weights = [SPENDING[c][2] for c in spend]
+    while len(rows) < count and spend:
+        cat = rng.choices(spend, weights)[0]
+        merchants, median, _ = SPENDING[cat]
+        amount = round(median * math.exp(rng.gauss(0, 0.6)), 2)
+        rows.append({
+            "user_id": user_id, "type": models.TransactionType.expense, "amount": amount, "currency": "INR",
+            "date": start + timedelta(days=rng.randrange(days)),
+            "description": f"{rng.choice(merchants)} {rng.randrange(1000, 9999)}", "category_id": cats[cat],
+        })
+    return rows[:count]
+
+
+def insert_batched(db, table, rows, batch: int) -> int:
+    for i in range(0, len(rows), batch):
+        db.execute(insert(table), rows[i:i + batch])
+    return len(rows)
+
+
+def generate(args) -> dict:
+    rng = random.Random(args.seed)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    started = time.perf_counter()
+    counts = {"users": 0, "categories": 0, "transactions": 0, "receipts": 0}
+    try:
+        hashed = hash_password(args.password)
+        emails = [f"{args.email_prefix}{n}@example.com" for n in range(args.users)]
+        taken = set(db.scalars(select(models.User.email).where(models.User.email.in_(emails))))
+        if taken:
+            raise SystemExit(f"{len(taken)} users with prefix {args.email_prefix!r} already exist; use another --email-prefix")
+        counts["users"] = insert_batched(db, models.User.__table__, [
+            {"email": e, "username": e.split("@")[0], "hashed_password": hashed} for e in emails
+        ], args.batch)
+        user_ids = dict(db.execute(select(models.User.email, models.User.id).where(models.User.email.in_(emails))).all())
+        ids = [user_ids[e] for e in emails]
+
+        names = category_names(args.categories)
+        counts["categories"] = insert_batched(db, models.Category.__table__, [
+            {"user_id": uid, "name": name} for uid in ids for name in names
+        ], args.batch)
+        cats = {}
+        for uid, name, cid in db.execute(
+            select(models.Category.user_id, models.Category.name, models.Category.id).where(models.Category.user_id.in_(ids))
+        ):
+            cats.setdefault(uid, {})[name] = cid
+
+        start = date.today() - timedelta(days=args.days)
+        pending = []
+        for uid in ids:
+            pending.extend(user_transactions(rng, uid, cats[uid], args.transactions, start, args.days))
+            if len(pending) >= args.batch:
+                counts["transactions"] += insert_batched(db, models.Transaction.__table__, pending, args.batch)
+                pending = []
+        counts["transactions"] += insert_batched(db, models.Transaction.__table__, pending, args.batch)
+
+        counts["receipts"] = insert_batched(db, models.Receipt.__table__, [
+            {
+                "user_id": uid, "file_path": f"uploads/{uid}/synthetic_{n}.jpg", "raw_text": "TOTAL 123.45",
+                "parsed_json": json.dumps({"total": 123.45, "date": None, "merchant": "SYNTHETIC", "raw_lines": []}),
+                "status": "done", "total": Decimal("123.45"), "merchant": "SYNTHETIC",
+            }
+            for uid in ids for n in range(args.receipts)
+        ], args.batch)
+        db.commit()
+        inserted = time.perf_counter()
+
+        for uid in ids:
+            rollups.rebuild(db, user_id=uid)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    done = time.perf_counter()
+    rows = sum(counts.values())
+    print(f"inserted {counts} in {inserted - started:.1f}s ({rows / max(inserted - started, 1e-9):,.0f} rows/s); "
+          f"rollups rebuilt in {done - inserted:.1f}s")
+    return {"password": args.password, "users": [{"id": user_ids[e], "email": e} for e in emails]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=1000, help="per user")
+    parser.add_argument("--categories", type=int, default=10, help="per user")
+    parser.add_argument("--receipts", type=int, default=5, help="per user")
+    parser.add_argument("--days", type=int, default=365, help="history length")
+    parser.add_argument("--batch", type=int, default=5000, help="rows per executemany")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--email-prefix", default="load")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    args = parser.parse_args()
+
+    manifest = generate(args)
+    with open(args.manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    print(f"wrote {len(manifest['users'])} users to {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
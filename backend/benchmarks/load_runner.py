@@ -0,0 +1,238 @@
+# benchmarks/load_runner.py
+"""
+Scripted load runner with per-endpoint latency baselines.
+
+Drives a weighted mix of API calls (SCENARIO) from --concurrency virtual
+users for --duration seconds, either against the ASGI app in-process
+(default) or a running server (--base-url http://127.0.0.1:8000). Every
+virtual user acts as one of the users from the generate_data.py manifest;
+tokens are minted locally with SECRET_KEY, so the server must share it and
+no login (rate limited, PBKDF2) is measured.
+
+Results -- throughput and p50/p95/p99 per endpoint -- are written as JSON
+(--out) stamped with the git commit. --compare OLD.json prints the change
+against an earlier baseline and, with --max-regression PCT, exits 1 when
+any endpoint's p95 got that much slower.
+
+Run from the backend folder:
+    python -m benchmarks.generate_data --users 50 --transactions 2000
+    python -m benchmarks.load_runner --concurrency 32 --duration 30 --out benchmarks/baselines/HEAD.json
+    python -m benchmarks.load_runner ... --compare benchmarks/baselines/main.json --max-regression 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx  # noqa: E402
+
+from app.services.security import create_access_token  # noqa: E402
+from benchmarks.generate_data import DEFAULT_MANIFEST  # noqa: E402
+
+# (name, weight, method, path template); {year} etc. are filled per request
+SCENARIO = [
+    ("transactions.list", 20, "GET", "/api/v1/transactions?page={page}&per_page=25"),
+    ("transactions.list_filtered", 8, "GET", "/api/v1/transactions?type=expense&start_date={month_start}&end_date={month_end}"),
+    ("categories.list", 10, "GET", "/api/v1/categories"),
+    ("analytics.by_category", 10, "GET", "/api/v1/analytics/by_category?start_date={year_start}&end_date={today}"),
+    ("analytics.by_date", 6, "GET", "/api/v1/analytics/by_date?start_date={month_start}&end_date={month_end}"),
+    ("analytics.summary", 10, "GET", "/api/v1/analytics/summary?start_date={year_start}&end_date={today}"),
+    ("analytics.balance", 6, "GET", "/api/v1/analytics/balance?start_date={year_start}&end_date={today}"),
+    ("analytics.percentiles", 3, "GET", "/api/v1/analytics/stats/percentiles"),
+    ("receipts.list", 5, "GET", "/api/v1/receipts"),
+    ("budgets.list", 4, "GET", "/api/v1/budgets"),
+    ("transactions.create", 4, "POST", "/api/v1/transactions"),
+]
+
+
+def pct(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def request_for(rng: random.Random, template: str, method: str):
+    today = date.today()
+    month_start = today.replace(day=1) - timedelta(days=30 * rng.randrange(12))
+    month_start = month_start.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    path = template.format(
+        page=rng.randint(1, 20), today=today, year_start=today - timedelta(days=365),
+        month_start=month_start, month_end=month_end,
+    )
+    body = None
+    if method == "POST":
+        body = {"type": "expense", "amount": round(rng.uniform(50, 2000), 2), "date": str(today), "description": "LOADTEST"}
+    return path, body
+
+
+async def virtual_user(client, token: str, stop: float, seed: int, samples: dict, errors: dict):
+    rng = random.Random(seed)
+    headers = {"Authorization": f"Bearer {token}"}
+    names = [s[0] for s in SCENARIO]
+    weights = [s[1] for s in SCENARIO]
+    by_name = {s[0]: s for s in SCENARIO}
+    while time.perf_counter() < stop:
+        name, _, method, template = by_name[rng.choices(names, weights)[0]]
+        path, body = request_for(rng, template, method)
+        t = time.perf_counter()
+        try:
+            r = await client.request(method, path, headers=headers, json=body)
+            ok = r.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        samples[name].append((time.perf_counter() - t) * 1000)
+        if not ok:
+            errors[name] += 1
+
+
+async def run(args, users):
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        from app.main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://loadtest"
+    tokens = [create_access_token(str(u["id"])) for u in users]
+    samples = {s[0]: [] for s in SCENARIO}
+    errors = {s[0]: 0 for s in SCENARIO}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60, limits=limits) as client:
+        if args.warmup > 0:
+            warm = {s[0]: [] for s in SCENARIO}
+            await asyncio.gather(*(
+                virtual_user(client, tokens[i % len(tokens)], time.perf_counter() + args.warmup, 10_000 + i, warm, dict(errors))
+                for i in range(args.concurrency)
+            ))
+        started = time.perf_counter()
+        stop = started + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, tokens[i % len(tokens)], stop, args.seed + i, samples, errors)
+            for i in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    return samples, errors, elapsed
+
+
+def summarize(args, samples, errors, elapsed) -> dict:
+    endpoints = {}
+    for name, values in samples.items():
+        if not values:
+            continue
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "rps": round(len(values) / elapsed, 2),
+            "mean_ms": round(sum(values) / len(values), 2),
+            "p50_ms": round(pct(values, 50), 2),
+            "p95_ms": round(pct(values, 95), 2),
+            "p99_ms": round(pct(values, 99), 2),
+            "max_ms": round(max(values), 2),
+        }
+    everything = [v for values in samples.values() for v in values]
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": args.base_url or "in-process",
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "total": {
+            "requests": len(everything),
+            "errors": sum(errors.values()),
+            "rps": round(len(everything) / elapsed, 2),
+            "p50_ms": round(pct(everything, 50) or 0, 2),
+            "p95_ms": round(pct(everything, 95) or 0, 2),
+            "p99_ms": round(pct(everything, 99) or 0, 2),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{'endpoint':28} {'req':>7} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, e in rows:
+        print(f"{name:28} {e['requests']:7d} {e['errors']:5d} {e['rps']:8.1f} "
+              f"{e['p50_ms']:7.1f}ms {e['p95_ms']:7.1f}ms {e['p99_ms']:7.1f}ms")
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> bool:
+    """Print per-endpoint changes; False if some p95 regressed more than max_regression percent."""
+    def change(new, old):
+        return (new - old) / old * 100 if old else 0.0
+
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('created')}):")
+    print(f"{'endpoint':28} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    ok = True
+    old_endpoints = dict(baseline["endpoints"], TOTAL=baseline["total"])
+    for name, e in list(report["endpoints"].items()) + [("TOTAL", report["total"])]:
+        old = old_endpoints.get(name)
+        if old is None:
+            print(f"{name:28} {'(new)':>9}")
+            continue
+        p95 = change(e["p95_ms"], old["p95_ms"])
+        flag = ""
+        if max_regression and name != "TOTAL" and p95 > max_regression:
+            ok, flag = False, "  <-- regression"
+        print(f"{name:28} {change(e['rps'], old['rps']):+8.1f}% {change(e['p50_ms'], old['p50_ms']):+8.1f}% "
+              f"{p95:+8.1f}% {change(e['p99_ms'], old['p99_ms']):+8.1f}%{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="users written by generate_data.py")
+    parser.add_argument("--base-url", default="", help="hit a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds first (caches, pools)")
+    parser.add_argument("--users", type=int, default=0, help="use only the first N manifest users")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="", help="write the JSON baseline here")
+    parser.add_argument("--compare", default="", help="earlier baseline JSON to diff against")
+    parser.add_argument("--max-regression", type=float, default=0.0, help="fail if an endpoint's p95 grew by more than this %%")
+    args = parser.parse_args()
+
+    with open(args.manifest, encoding="utf-8") as f:
+        users = json.load(f)["users"]
+    if args.users:
+        users = users[:args.users]
+    if not users:
+        raise SystemExit(f"no users in {args.manifest}; run python -m benchmarks.generate_data first")
+
+    samples, errors, elapsed = asyncio.run(run(args, users))
+    report = summarize(args, samples, errors, elapsed)
+    print_report(report)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"baseline written to {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
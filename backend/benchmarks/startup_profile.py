@@ -0,0 +1,120 @@
+# benchmarks/startup_profile.py
+"""
+Web worker cold start: import-time profile plus time / RSS budget check.
+
+Each run imports app.main in a fresh interpreter under `python -X importtime`
+and records wall time to import, peak RSS and which heavy optional modules
+got loaded. The report lists the slowest imports (cumulative and self time)
+of the first run and the median time / RSS over --runs.
+
+With --max-seconds / --max-rss-mb the script exits 1 when the median goes
+over budget, and it always fails if one of HEAVY_MODULES was imported --
+those must stay behind app/core/lazy.py until a request needs them. Meant
+for CI next to load_runner.py:
+
+    python -m benchmarks.startup_profile --runs 5 --max-seconds 2 --max-rss-mb 120 [--out startup.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# loaded only by OCR, PDF import, archive, statistics and S3 storage code paths
+HEAVY_MODULES = ("PIL", "pytesseract", "dateutil", "pdfplumber", "pdfminer", "numpy", "pyarrow", "boto3", "botocore")
+
+_CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {backend!r})
+t = time.perf_counter()
+import app.main  # noqa: F401
+seconds = time.perf_counter() - t
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024  # bytes there
+print(json.dumps({{"seconds": seconds, "rss_mb": rss_kb / 1024,
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_once(env, cwd: str) -> tuple:
+    code = _CHILD.format(backend=BACKEND, heavy=HEAVY_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd, env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"importing app.main failed:\n{proc.stderr[-3000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, parse_importtime(proc.stderr)
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(module, self_us, cumulative_us)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.partition(":")[2].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--max-seconds", type=float, default=0.0, help="fail if the median import time is above this")
+    parser.add_argument("--max-rss-mb", type=float, default=0.0, help="fail if the median peak RSS is above this")
+    parser.add_argument("--out", default="", help="write the results as JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "startup_profile.db"))
+    cwd = tempfile.mkdtemp()  # importing must not depend on (or write into) the working directory
+
+    results, profile = [], None
+    for _ in range(max(args.runs, 1)):
+        result, imports = run_once(env, cwd)
+        results.append(result)
+        profile = profile or imports
+
+    seconds = statistics.median(r["seconds"] for r in results)
+    rss = statistics.median(r["rss_mb"] for r in results)
+    heavy = sorted({m for r in results for m in r["heavy"]})
+
+    print(f"{'module':50} {'cumulative':>11} {'self':>9}")
+    for name, self_us, cum_us in sorted(profile, key=lambda r: -r[2])[:args.top]:
+        print(f"{name[:50]:50} {cum_us / 1000:9.1f}ms {self_us / 1000:7.1f}ms")
+    print("\nslowest by self time: " + ", ".join(
+        f"{n} {s / 1000:.1f}ms" for n, s, _ in sorted(profile, key=lambda r: -r[1])[:5]))
+    print(f"import app.main: median {seconds:.3f}s, peak RSS {rss:.1f} MB over {len(results)} runs; "
+          f"heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(), "runs": results, "median_seconds": seconds, "median_rss_mb": rss,
+                "heavy_loaded": heavy,
+                "imports": [{"module": n, "self_us": s, "cumulative_us": c} for n, s, c in profile],
+            }, f, indent=1)
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    if args.max_seconds and seconds > args.max_seconds:
+        failures.append(f"import time {seconds:.3f}s > budget {args.max_seconds}s")
+    if args.max_rss_mb and rss > args.max_rss_mb:
+        failures.append(f"peak RSS {rss:.1f} MB > budget {args.max_rss_mb} MB")
+    for f in failures:
+        print("FAIL:", f)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
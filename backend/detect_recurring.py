@@ -0,0 +1,27 @@
+# detect_recurring.py — batch job: rebuild the recurring_series cache (subscriptions / recurring bills)
+import sys
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.db.session import SessionLocal
+from app.services import recurring
+
+def detect_recurring(user_id=None):
+    db = SessionLocal()
+    try:
+        written = recurring.run(db, user_ids=[user_id] if user_id is not None else None)
+        scope = f"user {user_id}" if user_id is not None else "all users"
+        print(f"Detected recurring series for {scope}: {written} series")
+        return 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        print("Usage: python detect_recurring.py [user_id]")
+        sys.exit(2)
+    uid = int(sys.argv[1]) if len(sys.argv) == 2 else None
+    sys.exit(detect_recurring(uid))
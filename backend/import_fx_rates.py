@@ -0,0 +1,28 @@
+# import_fx_rates.py — bulk load FX rates (CSV: date,currency,rate) into fx_rates
+import sys
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import fx
+
+def import_fx_rates(path):
+    db = SessionLocal()
+    try:
+        written = fx.import_rates(db, fx.parse_rates_file(path))
+        db.commit()
+        print(f"Imported {written} FX rates from {path} (values in {settings.FX_BASE_CURRENCY})")
+        return 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python import_fx_rates.py rates.csv")
+        print("  CSV header: date,currency,rate  (rate = value of 1 unit of currency in FX_BASE_CURRENCY)")
+        sys.exit(2)
+    sys.exit(import_fx_rates(sys.argv[1]))
@@ -0,0 +1,28 @@
+# rebuild_rollups.py — recompute analytics rollup tables from transactions
+import sys
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.db.session import SessionLocal
+from app.services import rollups
+
+def rebuild_rollups(user_id=None):
+    db = SessionLocal()
+    try:
+        written = rollups.rebuild(db, user_id=user_id)
+        db.commit()
+        scope = f"user {user_id}" if user_id is not None else "all users"
+        print(f"Rebuilt rollups for {scope}: {written} daily buckets")
+        return 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        print("Usage: python rebuild_rollups.py [user_id]")
+        sys.exit(2)
+    uid = int(sys.argv[1]) if len(sys.argv) == 2 else None
+    sys.exit(rebuild_rollups(uid))
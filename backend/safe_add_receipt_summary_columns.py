@@ -0,0 +1,70 @@
+# safe_add_receipt_summary_columns.py — add receipts.status/total/merchant/receipt_date and the
+# (user_id, id) index to an existing database, then fill them from parsed_json. Safe to re-run;
+# pass --backfill to redo the fill (e.g. after an interrupted run).
+import json
+import os
+import sys
+
+import sqlalchemy
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.db import models
+from app.services.receipts import summary_fields
+
+db_url = os.getenv("DATABASE_URL")
+if not db_url:
+    raise SystemExit("DATABASE_URL not set in .env")
+
+engine = sqlalchemy.create_engine(db_url)
+print("Using database:", engine.url.database)
+
+COLUMNS = [
+    ("status", "VARCHAR(16) NOT NULL DEFAULT 'pending'"),
+    ("total", "NUMERIC(12,2) NULL"),
+    ("merchant", "VARCHAR(255) NULL"),
+    ("receipt_date", "DATE NULL"),
+]
+BATCH = 1000
+
+with engine.begin() as conn:
+    inspector = sqlalchemy.inspect(conn)
+    existing = {c["name"] for c in inspector.get_columns("receipts")}
+    added = []
+    for name, ddl in COLUMNS:
+        if name in existing:
+            print(f"Column 'receipts.{name}' already exists.")
+        else:
+            print(f"Adding column '{name}' to receipts...")
+            conn.execute(sqlalchemy.text(f"ALTER TABLE receipts ADD COLUMN {name} {ddl}"))
+            added.append(name)
+
+    if "ix_receipts_user_id_id" in {i["name"] for i in inspector.get_indexes("receipts")}:
+        print("Index 'ix_receipts_user_id_id' already exists.")
+    else:
+        print("Creating index 'ix_receipts_user_id_id'...")
+        conn.execute(sqlalchemy.text("CREATE INDEX ix_receipts_user_id_id ON receipts (user_id, id)"))
+
+# rows that existed before the columns did: their OCR already ran, so take the summary from parsed_json
+if "status" in added or "--backfill" in sys.argv[1:]:
+    receipts = models.Receipt.__table__
+    filled, last_id = 0, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(sqlalchemy.text(
+                "SELECT id, parsed_json FROM receipts WHERE id > :last AND status = 'pending' ORDER BY id LIMIT :n"
+            ), {"last": last_id, "n": BATCH}).all()
+            if not rows:
+                break
+            for rid, parsed_json in rows:
+                try:
+                    parsed = json.loads(parsed_json or "{}")
+                except ValueError:
+                    parsed = {}
+                values = summary_fields(parsed if isinstance(parsed, dict) else {})
+                conn.execute(receipts.update().where(receipts.c.id == rid).values(status="done", **values))
+            filled += len(rows)
+            last_id = rows[-1][0]
+    print(f"Filled summary columns of {filled} existing receipts.")
+
+print("Done.")
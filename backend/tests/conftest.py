@@ -0,0 +1,78 @@
+# tests/conftest.py
+"""
+Shared fixtures. The environment is set before `app` is imported: a fresh
+SQLite database and upload/archive directories under a temp dir, cheap
+password hashing on threads and rate limits out of the way.
+"""
+import os
+import sys
+import tempfile
+import uuid
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND)
+
+_TMP = tempfile.mkdtemp(prefix="finance-tests-")
+os.environ.update({
+    "DATABASE_URL": "sqlite:///" + os.path.join(_TMP, "test.db"),
+    "SECRET_KEY": "test-secret",
+    "PASSWORD_HASH_ROUNDS": "1000",
+    "PASSWORD_HASH_EXECUTOR": "thread",
+    "RATE_LIMIT_IP_BURST": "100000",
+    "RATE_LIMIT_IP_PER_MINUTE": "100000",
+    "RATE_LIMIT_EMAIL_BURST": "100000",
+    "RATE_LIMIT_EMAIL_PER_MINUTE": "100000",
+    "UPLOAD_DIR": os.path.join(_TMP, "uploads"),
+    "ARCHIVE_DIR": os.path.join(_TMP, "archive"),
+    "STORAGE_BACKEND": "local",
+    "ANALYTICS_CACHE_BACKEND": "memory",
+})
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.main import app as fastapi_app
+    Base.metadata.create_all(bind=engine)
+    return fastapi_app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    return TestClient(app)
+
+
+@pytest.fixture
+def register(client):
+    """register() -> (user_id, auth headers) of a new user."""
+    def _register():
+        r = client.post("/api/v1/auth/register", json={"email": f"{uuid.uuid4().hex[:12]}@example.com", "password": "secret1"})
+        assert r.status_code == 201, r.text
+        token = r.json()["access_token"]
+        from app.services.security import decode_access_token
+        return int(decode_access_token(token)["sub"]), {"Authorization": "Bearer " + token}
+    return _register
+
+
+@pytest.fixture
+def user(register):
+    return register()
+
+
+@pytest.fixture
+def headers(user):
+    return user[1]
+
+
+@pytest.fixture
+def db():
+    from app.db.session import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
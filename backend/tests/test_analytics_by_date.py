@@ -0,0 +1,39 @@
+# tests/test_analytics_by_date.py
+def _txn(client, headers, day, amount=10, type="expense"):
+    r = client.post("/api/v1/transactions", json={"type": type, "amount": amount, "date": day}, headers=headers)
+    assert r.status_code == 201, r.text
+
+
+def _by_date(client, headers, **params):
+    r = client.get("/api/v1/analytics/by_date", params=params, headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_default_lists_only_days_with_transactions(client, headers):
+    _txn(client, headers, "2025-01-01", 10)
+    _txn(client, headers, "2025-01-05", 5)
+    _txn(client, headers, "2025-01-05", 7)
+    series = _by_date(client, headers)
+    assert [(p["date"], p["total"]) for p in series] == [("2025-01-01", 10.0), ("2025-01-05", 12.0)]
+
+
+def test_long_history_without_params_is_not_rejected(client, headers):
+    # ~40 years of days is past time_buckets.MAX_BUCKETS, but the sparse default never enumerates them
+    _txn(client, headers, "1985-01-01", 1)
+    _txn(client, headers, "2025-01-01", 2)
+    assert [p["date"] for p in _by_date(client, headers)] == ["1985-01-01", "2025-01-01"]
+
+
+def test_explicit_granularity_zero_fills(client, headers):
+    _txn(client, headers, "2025-01-01", 10)
+    _txn(client, headers, "2025-01-04", 5)
+    series = _by_date(client, headers, granularity="day")
+    assert [p["date"] for p in series] == ["2025-01-01", "2025-01-02", "2025-01-03", "2025-01-04"]
+    assert [p["expense"] for p in series] == [10.0, 0.0, 0.0, 5.0]
+
+
+def test_explicit_range_zero_fills_to_the_bounds(client, headers):
+    _txn(client, headers, "2025-02-10", 3)
+    series = _by_date(client, headers, start_date="2025-02-09", end_date="2025-02-11")
+    assert [(p["date"], p["total"]) for p in series] == [("2025-02-09", 0.0), ("2025-02-10", 3.0), ("2025-02-11", 0.0)]
@@ -0,0 +1,27 @@
+# tests/test_analytics_stats.py
+import pytest
+
+pytest.importorskip("numpy")
+
+STATS = ["percentiles", "moving_average", "outliers", "category_share"]
+
+
+@pytest.mark.parametrize("stat", STATS)
+def test_reversed_range_is_a_400(client, headers, stat):
+    r = client.post("/api/v1/transactions", json={"type": "expense", "amount": 5, "date": "2025-03-02"}, headers=headers)
+    assert r.status_code == 201, r.text
+    r = client.get(f"/api/v1/analytics/stats/{stat}", params={"start_date": "2025-03-10", "end_date": "2025-03-01"}, headers=headers)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "start_date must be on or before end_date"
+
+
+def test_moving_average_zero_fills_the_range(client, headers):
+    for day, amount in (("2025-03-01", 6), ("2025-03-03", 3)):
+        r = client.post("/api/v1/transactions", json={"type": "expense", "amount": amount, "date": day}, headers=headers)
+        assert r.status_code == 201, r.text
+    r = client.get("/api/v1/analytics/stats/moving_average",
+                   params={"window": 2, "start_date": "2025-03-01", "end_date": "2025-03-03"}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert [(p["date"], p["total"], p["moving_average"]) for p in r.json()] == [
+        ("2025-03-01", 6.0, 6.0), ("2025-03-02", 0.0, 3.0), ("2025-03-03", 3.0, 1.5),
+    ]
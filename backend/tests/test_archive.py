@@ -0,0 +1,67 @@
+# tests/test_archive.py
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.services import archive  # noqa: E402
+
+
+def _seed(client, headers):
+    ids = []
+    for year in (2021, 2022, 2023, 2024, 2025):
+        for i, day in enumerate(("01-15", "06-01", "06-01", "11-30")):
+            r = client.post("/api/v1/transactions", json={
+                "type": "income" if i == 3 else "expense", "amount": 10 * year % 97 + i, "date": f"{year}-{day}",
+                "description": f"T {year} {i}",
+            }, headers=headers)
+            assert r.status_code == 201, r.text
+            ids.append(r.json()["id"])
+    return ids
+
+
+def _pages(client, headers, per_page, **params):
+    pages, page = [], 1
+    while True:
+        r = client.get("/api/v1/transactions", params={"page": page, "per_page": per_page, **params}, headers=headers)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        pages.append(body)
+        if page * per_page >= body["total"]:
+            return pages
+        page += 1
+
+
+QUERIES = [
+    {},
+    {"type": "income"},
+    {"start_date": "2022-06-01", "end_date": "2024-06-01"},
+    {"start_date": "2023-01-01", "type": "expense"},
+]
+
+
+def test_list_is_unchanged_by_archiving(client, headers, user, db):
+    ids = _seed(client, headers)
+    before = {(per_page, i): _pages(client, headers, per_page, **q) for per_page in (3, 7, 50) for i, q in enumerate(QUERIES)}
+
+    moved = archive.archive_user(db, user[0], 2023)
+    db.commit()
+    assert sum(moved.values()) == 12 and len(archive.partitions(db, user[0])) == 3
+
+    after = {(per_page, i): _pages(client, headers, per_page, **q) for per_page in (3, 7, 50) for i, q in enumerate(QUERIES)}
+    assert after == before
+    # newest first, across the hot/cold boundary
+    items = before[(50, 0)][0]["items"]
+    assert [t["date"] for t in items] == sorted((t["date"] for t in items), reverse=True)
+    assert len(items) == len(ids)
+
+
+def test_archived_rows_are_readable_and_read_only(client, headers, user, db):
+    ids = _seed(client, headers)
+    old = client.get(f"/api/v1/transactions/{ids[0]}", headers=headers).json()
+    archive.archive_user(db, user[0], 2023)
+    db.commit()
+
+    r = client.get(f"/api/v1/transactions/{ids[0]}", headers=headers)
+    assert r.status_code == 200 and r.json() == old
+    assert client.put(f"/api/v1/transactions/{ids[0]}", json={"amount": 1}, headers=headers).status_code == 409
+    assert client.delete(f"/api/v1/transactions/{ids[0]}", headers=headers).status_code == 409
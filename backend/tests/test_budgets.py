@@ -0,0 +1,39 @@
+# tests/test_budgets.py
+from datetime import date
+
+
+def _expense(client, headers, amount, category_id):
+    r = client.post("/api/v1/transactions", json={
+        "type": "expense", "amount": amount, "date": date.today().isoformat(), "category_id": category_id,
+    }, headers=headers)
+    assert r.status_code == 201, r.text
+
+
+def _category(client, headers):
+    r = client.post("/api/v1/categories", json={"name": "Groceries"}, headers=headers)
+    assert r.status_code in (200, 201), r.text
+    return r.json()["id"]
+
+
+def test_fresh_budget_reports_two_decimal_amounts(client, headers):
+    r = client.post("/api/v1/budgets", json={"category_id": _category(client, headers), "limit": 100}, headers=headers)
+    assert r.status_code == 201, r.text
+    body = r.json()
+    assert (body["limit"], body["spent"], body["remaining"]) == ("100.00", "0.00", "100.00")
+    assert client.get(f"/api/v1/budgets/{body['id']}", headers=headers).json()["spent"] == "0.00"
+
+
+def test_acknowledge_alert(client, headers):
+    cat = _category(client, headers)
+    r = client.post("/api/v1/budgets", json={"category_id": cat, "limit": 100, "alert_threshold": 50}, headers=headers)
+    assert r.status_code == 201, r.text
+    _expense(client, headers, 60, cat)
+
+    alerts = client.get("/api/v1/budgets/alerts", headers=headers).json()
+    assert [(a["level"], a["spent"], a["limit_amount"]) for a in alerts] == [("warning", "60.00", "100.00")]
+
+    r = client.post(f"/api/v1/budgets/alerts/{alerts[0]['id']}/ack", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == {**alerts[0], "acknowledged": True}
+    assert client.get("/api/v1/budgets/alerts", headers=headers).json() == []
+    assert client.post("/api/v1/budgets/alerts/999999/ack", headers=headers).status_code == 404
@@ -0,0 +1,128 @@
+# tests/test_cache.py
+import threading
+import time
+from datetime import date
+
+from app.api.v1 import analytics
+from app.services.cache import MemoryBackend, RedisBackend, ResultCache
+
+
+class StubRedis:
+    """The redis-py calls RedisBackend makes (get / set(ex=)); values come back as bytes like the real client."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        self.ttls[key] = ex
+
+
+def _redis_client():
+    try:
+        import fakeredis
+    except ImportError:
+        return StubRedis()
+    return fakeredis.FakeRedis()
+
+
+def _expense(client, headers, amount):
+    r = client.post("/api/v1/transactions", json={"type": "expense", "amount": amount, "date": "2025-04-01"}, headers=headers)
+    assert r.status_code == 201, r.text
+
+
+def _summary_total(client, headers):
+    r = client.get("/api/v1/analytics/summary", headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()["totals"]["expense"]
+
+
+def test_write_invalidates_the_caches_of_every_worker(client, headers, monkeypatch):
+    # two workers: each has its own in-process cache and neither hears about the other's writes
+    worker_a = ResultCache(MemoryBackend())
+    worker_b = ResultCache(MemoryBackend())
+    _expense(client, headers, 10)
+    for cache in (worker_a, worker_b):
+        monkeypatch.setattr(analytics, "analytics_cache", cache)
+        assert _summary_total(client, headers) == 10.0
+        assert _summary_total(client, headers) == 10.0  # served from this worker's cache
+
+    _expense(client, headers, 5)
+    for cache in (worker_a, worker_b):
+        monkeypatch.setattr(analytics, "analytics_cache", cache)
+        assert _summary_total(client, headers) == 15.0
+
+
+def test_result_is_cached_per_version():
+    cache = ResultCache(MemoryBackend())
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute(1, 0, "x", {"a": 1}, compute) == 1
+    assert cache.get_or_compute(1, 0, "x", {"a": 1}, compute) == 1
+    assert cache.get_or_compute(1, 1, "x", {"a": 1}, compute) == 2
+    assert cache.get_or_compute(2, 1, "x", {"a": 1}, compute) == 3
+
+
+def test_concurrent_identical_misses_run_the_loader_once():
+    cache = ResultCache(MemoryBackend())
+    calls, n = [], 16
+    start = threading.Barrier(n)
+    results = [None] * n
+
+    def load():
+        calls.append(1)
+        time.sleep(0.2)  # long enough for every thread to arrive while the leader is still loading
+        return {"total": 42}
+
+    def request(i):
+        start.wait()
+        results[i] = cache.get_or_compute(1, 0, "summary", {"top": 5}, load)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"total": 42}] * n
+
+
+def test_loader_errors_are_not_cached():
+    cache = ResultCache(MemoryBackend())
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("no FX rates for USD")
+
+    for _ in range(2):
+        try:
+            cache.get_or_compute(1, 0, "by_date", {}, fail)
+        except ValueError:
+            pass
+    assert len(calls) == 2
+
+
+def test_redis_backend_is_shared_between_workers():
+    client = _redis_client()
+    worker_a = ResultCache(RedisBackend(client, ttl_seconds=60))
+    worker_b = ResultCache(RedisBackend(client, ttl_seconds=60))
+    value = [{"date": date(2025, 1, 1), "total": 9.5}]
+
+    assert worker_a.get_or_compute(7, 3, "by_date", {"granularity": "day"}, lambda: value) == value
+    # the other worker reads what the first stored (as JSON, so dates come back as ISO strings)
+    assert worker_b.get_or_compute(7, 3, "by_date", {"granularity": "day"}, lambda: "recomputed") == [
+        {"date": "2025-01-01", "total": 9.5}
+    ]
+    # a newer data version is a different key
+    assert worker_b.get_or_compute(7, 4, "by_date", {"granularity": "day"}, lambda: "recomputed") == "recomputed"
+    if isinstance(client, StubRedis):
+        assert set(client.ttls.values()) == {60}
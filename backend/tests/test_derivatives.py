@@ -0,0 +1,55 @@
+# tests/test_derivatives.py
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from app.services import derivatives
+from app.services import storage as st
+
+
+def _png(size=(300, 100)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, "red").save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _exists(key: str) -> bool:
+    try:
+        st.storage().size(key)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def test_missing_thumbnail_of_a_receipt_is_regenerated(client, headers):
+    r = client.post("/api/v1/receipts", files={"file": ("r.png", _png(), "image/png")}, headers=headers)
+    assert r.status_code == 201, r.text
+    key = st.key_from_file_path(r.json()["file_path"])
+    thumb = derivatives.variant("thumb")
+    st.storage().delete(derivatives.derivative_key(key, thumb))
+
+    r = client.get(f"/derivatives/{thumb}/{key}")
+    assert r.status_code == 200 and r.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(r.content)).size == (240, 80)
+
+
+def test_only_receipt_originals_are_rendered(client, headers):
+    r = client.post("/api/v1/receipts", files={"file": ("r.png", _png(), "image/png")}, headers=headers)
+    key = st.key_from_file_path(r.json()["file_path"])
+    thumb = derivatives.variant("thumb")
+    own = derivatives.derivative_key(key, thumb)
+    assert client.get(f"/derivatives/{thumb}/{key}").status_code == 200
+
+    # a derivative of a derivative would be written under derived/<variant>/derived/...
+    for path in (own, "./" + own, "zz/../" + own):
+        assert client.get(f"/derivatives/{thumb}/{path}").status_code == 404
+    assert not _exists(derivatives.derivative_key(own, thumb))
+
+    # an image in storage that no receipt points at
+    st.storage().save("zz/9/yy/stray.png", io.BytesIO(_png()))
+    assert client.get(f"/derivatives/{thumb}/zz/9/yy/stray.png").status_code == 404
+    assert not _exists(derivatives.derivative_key("zz/9/yy/stray.png", thumb))
+
+    assert client.get(f"/derivatives/{thumb}/zz/9/yy/missing.png").status_code == 404
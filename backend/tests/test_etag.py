@@ -0,0 +1,56 @@
+# tests/test_etag.py
+from app.db import models
+from app.services.data_version import bump_data_version, get_data_version
+
+
+def _txn(client, headers, amount=10, day="2025-03-01"):
+    r = client.post("/api/v1/transactions", json={"type": "expense", "amount": amount, "date": day}, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def test_registration_creates_version_row(user, db):
+    user_id, _ = user
+    row = db.query(models.UserDataVersion).filter(models.UserDataVersion.user_id == user_id).one()
+    assert row.version == 0
+
+
+def test_bump_upserts_when_row_is_missing(user, db):
+    user_id, _ = user
+    db.query(models.UserDataVersion).filter(models.UserDataVersion.user_id == user_id).delete()
+    db.commit()
+    bump_data_version(db, user_id)
+    bump_data_version(db, user_id)  # same transaction: second call hits the row the first inserted
+    db.commit()
+    assert get_data_version(db, user_id) == 2
+
+
+def test_304_until_a_write_changes_the_version(client, headers):
+    _txn(client, headers)
+    first = client.get("/api/v1/transactions", headers=headers)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+
+    again = client.get("/api/v1/transactions", headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+    _txn(client, headers, amount=20)
+    changed = client.get("/api/v1/transactions", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["total"] == 2
+
+
+def test_etag_depends_on_query_but_not_param_order(client, headers):
+    a = client.get("/api/v1/transactions?page=1&per_page=5", headers=headers).headers["etag"]
+    b = client.get("/api/v1/transactions?per_page=5&page=1", headers=headers).headers["etag"]
+    c = client.get("/api/v1/transactions?page=1&per_page=6", headers=headers).headers["etag"]
+    assert a == b != c
+
+
+def test_etag_is_per_user(client, register):
+    _, h1 = register()
+    _, h2 = register()
+    etag = client.get("/api/v1/categories", headers=h1).headers["etag"]
+    assert client.get("/api/v1/categories", headers={**h2, "If-None-Match": etag}).status_code == 200
@@ -0,0 +1,58 @@
+# tests/test_fx_etag.py
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.db import models
+from app.db.session import engine
+from app.services import fx
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def no_rates(db):
+    db.query(models.FxRate).delete()
+    db.commit()
+    fx.rates.refresh(db, force=True)
+    yield
+    db.query(models.FxRate).delete()
+    db.commit()
+    fx.rates.refresh(db, force=True)
+
+
+def test_empty_table_matches_the_initial_version(db, no_rates, statements):
+    cache = fx.FxRateCache("INR")
+    cache.refresh(db)
+    assert cache.version == fx.FxRateCache.EMPTY
+    # only the count/max check ran, not the full load
+    assert len([s for s in statements if "fx_rates" in s]) == 1
+
+
+def test_plain_etag_does_not_read_fx_rates(client, headers, no_rates, statements):
+    fx.rates.invalidate()  # a due FX check would run now if the guard asked for it
+    assert client.get("/api/v1/transactions", headers=headers).status_code == 200
+    assert not [s for s in statements if "fx_rates" in s]
+
+
+def test_rate_import_changes_only_converted_etags(client, headers, db, no_rates):
+    txns = client.get("/api/v1/transactions", headers=headers).headers["etag"]
+    by_category = client.get("/api/v1/analytics/by_category", headers=headers).headers["etag"]
+
+    fx.import_rates(db, [("USD", date(2025, 1, 1), Decimal("83"))])
+    db.commit()
+
+    assert client.get("/api/v1/transactions", headers={**headers, "If-None-Match": txns}).status_code == 304
+    assert client.get("/api/v1/analytics/by_category", headers={**headers, "If-None-Match": by_category}).status_code == 200
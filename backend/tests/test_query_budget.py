@@ -0,0 +1,68 @@
+# tests/test_query_budget.py
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import query_stats
+from app.db.query_stats import RequestQueries, unbudgeted
+from app.services import fx
+from app.services.principals import principal_cache
+
+
+@pytest.fixture
+def strict(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET_STRICT", True)
+
+
+@pytest.fixture
+def fresh_process(monkeypatch):
+    """Caches as a newly started worker has them: no principals, FX table never checked."""
+    principal_cache.clear()
+    monkeypatch.setattr(fx, "rates", fx.FxRateCache(settings.FX_BASE_CURRENCY, settings.FX_CACHE_TTL_SECONDS))
+
+
+def _seed(client, headers):
+    r = client.post("/api/v1/categories", json={"name": "Food"}, headers=headers)
+    assert r.status_code in (200, 201), r.text
+    r = client.post("/api/v1/transactions", json={"type": "expense", "amount": 4, "date": "2025-05-01"}, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/transactions", "/api/v1/transactions/{txn_id}", "/api/v1/categories", "/api/v1/receipts",
+])
+def test_budgets_hold_on_a_fresh_process(client, headers, strict, fresh_process, path):
+    txn_id = _seed(client, headers)
+    principal_cache.clear()
+    r = client.get(path.format(txn_id=txn_id), headers=headers)
+    assert r.status_code == 200, r.text
+
+
+def test_unbudgeted_statements_are_timed_but_not_counted():
+    stats = RequestQueries()
+    stats.add("SELECT 1", 0.001)
+    stats.add("SELECT 2", 0.001, budgeted=False)
+    assert (stats.count, stats.budgeted) == (2, 1)
+
+
+def test_unbudgeted_applies_inside_the_block_only(db):
+    stats = RequestQueries()
+    token = query_stats._current.set(stats)
+    try:
+        with unbudgeted():
+            db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 1"))
+    finally:
+        query_stats._current.reset(token)
+    assert (stats.count, stats.budgeted) == (2, 1)
+
+
+def test_cold_lookups_do_not_count(client, headers, strict, fresh_process, monkeypatch):
+    from app.api.v1 import categories
+    _seed(client, headers)
+    principal_cache.clear()
+    # listing categories is one statement of its own; principal + data version lookups come on top
+    monkeypatch.setattr(categories.list_categories, "__query_budget__", 1)
+    r = client.get("/api/v1/categories", headers=headers)
+    assert r.status_code == 200, r.text
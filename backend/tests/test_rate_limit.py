@@ -0,0 +1,67 @@
+# tests/test_rate_limit.py
+import asyncio
+import uuid
+
+from app.core import metrics
+from app.services import rate_limit
+from app.services.rate_limit import MemoryBuckets, RateLimiter, RateLimitMiddleware, Rule
+
+
+def test_large_body_is_not_buffered_whole():
+    limiter = RateLimiter(MemoryBuckets(), Rule("ip", 100, 100), Rule("email", 100, 100))
+    middleware = RateLimitMiddleware(None, limiter, paths=["/login"])
+    chunk = b"x" * 3000
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for _ in range(9)]
+    messages.append({"type": "http.request", "body": chunk, "more_body": False})
+
+    captured = {}
+
+    async def app(scope, receive, send):
+        captured["pulled"] = 10 - len(messages)
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        captured["body"] = body
+
+    middleware.app = app
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "POST", "path": "/login", "headers": [], "client": ("10.0.0.1", 1)}
+    asyncio.run(middleware(scope, receive, send))
+    assert captured["pulled"] == 2  # stopped once past _MAX_BODY (4096)
+    assert captured["body"] == chunk * 10
+
+
+def test_small_body_is_replayed_whole():
+    limiter = RateLimiter(MemoryBuckets(), Rule("ip", 100, 100), Rule("email", 100, 100))
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["first"] = await receive()
+
+    async def receive():
+        return {"type": "http.request", "body": b'{"email": "a@b.c"}', "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "POST", "path": "/login", "headers": [], "client": ("10.0.0.1", 1)}
+    asyncio.run(RateLimitMiddleware(app, limiter, paths=["/login"])(scope, receive, send))
+    assert seen["first"] == {"type": "http.request", "body": b'{"email": "a@b.c"}', "more_body": False}
+
+
+def test_429_is_counted_in_http_metrics(client, monkeypatch):
+    monkeypatch.setattr(rate_limit.auth_limiter, "email_rule", Rule("email", 1, 1))
+    payload = {"email": f"{uuid.uuid4().hex[:12]}@example.com", "password": "wrong-password"}
+    client.post("/api/v1/auth/login", json=payload)
+    r = client.post("/api/v1/auth/login", json=payload)
+    assert r.status_code == 429
+    lines = [line for line in metrics.render().splitlines() if line.startswith("http_requests_total{")]
+    assert any('"/api/v1/auth/login"' in line and '"429"' in line for line in lines), lines
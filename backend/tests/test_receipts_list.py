@@ -0,0 +1,76 @@
+# tests/test_receipts_list.py
+import json
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.db import models
+from app.db.session import engine
+
+
+@pytest.fixture
+def receipts(user, db):
+    user_id, _ = user
+    rows = [
+        models.Receipt(user_id=user_id, file_path=f"uploads/r{i}.png", raw_text=f"SHOP {i}\nTOTAL {i}.50",
+                       parsed_json=json.dumps({"total": f"{i}.50"}), status="done", total=Decimal(f"{i}.50"), merchant=f"SHOP {i}")
+        for i in range(7)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [r.id for r in rows]
+
+
+def _page(client, headers, **params):
+    r = client.get("/api/v1/receipts", params=params, headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_keyset_pages_walk_every_receipt_once(client, headers, receipts):
+    ids, cursor = [], None
+    while True:
+        page = _page(client, headers, limit=3, **({"cursor": cursor} if cursor else {}))
+        assert len(page["items"]) <= 3 and page["limit"] == 3
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == sorted(receipts, reverse=True)
+
+
+def test_new_receipts_do_not_shift_later_pages(client, headers, user, db, receipts):
+    first = _page(client, headers, limit=3)
+    db.add(models.Receipt(user_id=user[0], file_path="uploads/new.png"))
+    db.commit()
+    second = _page(client, headers, limit=3, cursor=first["next_cursor"])
+    assert [item["id"] for item in second["items"]] == sorted(receipts, reverse=True)[3:6]
+
+
+def test_list_leaves_out_the_ocr_text(client, headers, receipts):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        item = _page(client, headers)["items"][0]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    selects = [s for s in statements if "FROM receipts" in s]
+    assert selects and not [s for s in selects if "raw_text" in s or "parsed_json" in s]
+    assert "raw_text" not in item and item["total"] == "6.50" and item["merchant"] == "SHOP 6"
+
+
+def test_fields_projection(client, headers, receipts):
+    assert set(_page(client, headers, fields="id,total")["items"][0]) == {"id", "total"}
+    assert _page(client, headers, fields="id,raw_text")["items"][0]["raw_text"] == "SHOP 6\nTOTAL 6.50"
+    assert client.get("/api/v1/receipts", params={"fields": "id,bogus"}, headers=headers).status_code == 400
+    assert client.get("/api/v1/receipts", params={"limit": 101}, headers=headers).status_code == 422
+
+
+def test_detail_has_the_ocr_text(client, headers, receipts):
+    r = client.get(f"/api/v1/receipts/{receipts[0]}", headers=headers)
+    assert r.status_code == 200 and r.json()["raw_text"] == "SHOP 0\nTOTAL 0.50"
@@ -0,0 +1,27 @@
+# tests/test_recurring.py
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("numpy")
+
+
+def test_refresh_detects_a_monthly_series(client, headers):
+    for n in range(6, 0, -1):
+        r = client.post("/api/v1/transactions", json={
+            "type": "expense", "amount": 499, "date": (date.today() - timedelta(days=30 * n)).isoformat(),
+            "description": f"NETFLIX.COM {n}",
+        }, headers=headers)
+        assert r.status_code == 201, r.text
+
+    r = client.post("/api/v1/analytics/recurring/refresh", headers=headers)
+    assert r.status_code == 200, r.text
+    assert [(s["merchant_key"], s["cadence"], s["amount"]) for s in r.json()] == [("netflix", "monthly", 499.0)]
+    assert client.get("/api/v1/analytics/recurring", headers=headers).json() == r.json()
+
+
+def test_refresh_uses_the_writer_session(app):
+    from fastapi.routing import APIRoute
+    from app.api.v1.deps import get_db_dep
+    route = next(r for r in app.routes if isinstance(r, APIRoute) and r.path == "/api/v1/analytics/recurring/refresh")
+    assert get_db_dep in [d.call for d in route.dependant.dependencies]
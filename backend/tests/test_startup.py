@@ -0,0 +1,25 @@
+# tests/test_startup.py
+"""Cold start budget: benchmarks/startup_profile.py in fresh interpreters (slow-ish, a few seconds)."""
+import json
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND
+
+# the budget the README documents (time measured under -X importtime, which adds ~10%); raise it on slower machines
+MAX_SECONDS = os.getenv("STARTUP_MAX_SECONDS", "2")
+MAX_RSS_MB = os.getenv("STARTUP_MAX_RSS_MB", "120")
+
+
+def test_app_starts_within_budget_without_heavy_modules(tmp_path):
+    out = tmp_path / "startup.json"
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_profile", "--runs", "5",
+         "--max-seconds", MAX_SECONDS, "--max-rss-mb", MAX_RSS_MB, "--out", str(out)],
+        cwd=BACKEND, env=dict(os.environ), capture_output=True, text=True, timeout=300,
+    )
+    assert out.exists(), proc.stdout + proc.stderr
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["heavy_loaded"] == []
+    assert proc.returncode == 0, proc.stdout[-2000:]
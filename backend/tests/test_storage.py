@@ -0,0 +1,107 @@
+# tests/test_storage.py
+import io
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.files import parse_range
+from app.services import storage
+from app.services.storage import LocalStorage, new_key
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("bytes=0-9", (0, 9)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),  # suffix longer than the file: all of it
+    ("bytes=50-500", (50, 99)),  # end clamped to the file
+    ("bytes=0-1,5-6", None),  # multi-range: whole file
+    ("items=0-9", None),
+    ("bytes=9-3", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=100-200", "bytes=-0"])
+def test_parse_range_past_the_end_is_416(header):
+    with pytest.raises(HTTPException) as exc:
+        parse_range(header, 100)
+    assert exc.value.status_code == 416
+    assert exc.value.headers["Content-Range"] == "bytes */100"
+
+
+def test_new_key_is_sharded_per_user_and_file():
+    key = new_key(42, "bill.png")
+    user_shard, user_id, file_shard, name = key.split("/")
+    assert user_id == "42" and name.endswith("_bill.png")
+    assert len(user_shard) == len(file_shard) == 2
+    assert new_key(42, "bill.png").split("/")[0] == user_shard
+
+
+def _exercise(backend):
+    data = bytes(range(256)) * 20
+    backend.save("ab/1/cd/file.bin", io.BytesIO(data))
+    assert backend.size("ab/1/cd/file.bin") == len(data)
+    assert b"".join(backend.iter_range("ab/1/cd/file.bin")) == data
+    assert b"".join(backend.iter_range("ab/1/cd/file.bin", 100, 1099)) == data[100:1100]
+    with backend.local_path("ab/1/cd/file.bin") as path:
+        with open(path, "rb") as f:
+            assert f.read() == data
+    backend.delete("ab/1/cd/file.bin")
+    backend.delete("ab/1/cd/file.bin")  # missing is fine
+    with pytest.raises(FileNotFoundError):
+        backend.size("ab/1/cd/file.bin")
+
+
+def test_local_storage(tmp_path):
+    backend = LocalStorage(str(tmp_path))
+    _exercise(backend)
+    for bad in ("../outside", "a/../../outside", ""):
+        with pytest.raises(ValueError):
+            backend.path(bad)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class NoLocalPath(storage.Storage):
+        def save(self, key, fileobj): pass
+        def size(self, key): return 0
+        def iter_range(self, key, start=0, end=None): yield b""
+        def delete(self, key): pass
+
+    with pytest.raises(TypeError, match="local_path"):
+        NoLocalPath()
+
+
+def test_s3_storage(monkeypatch):
+    pytest.importorskip("boto3")
+    moto_server = pytest.importorskip("moto.server")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    server = moto_server.ThreadedMotoServer(port=5078, verbose=False)
+    server.start()
+    try:
+        backend = storage.S3Storage("test-bucket", "uploads/", "http://127.0.0.1:5078", "us-east-1")
+        backend.client.create_bucket(Bucket="test-bucket")
+        _exercise(backend)
+    finally:
+        server.stop()
+
+
+def test_uploads_route_serves_ranges(client):
+    data = b"0123456789" * 10
+    storage.storage().save("zz/9/yy/range.txt", io.BytesIO(data))
+
+    full = client.get("/uploads/zz/9/yy/range.txt")
+    assert full.status_code == 200 and full.content == data
+    assert full.headers["accept-ranges"] == "bytes"
+
+    part = client.get("/uploads/zz/9/yy/range.txt", headers={"Range": "bytes=10-19"})
+    assert part.status_code == 206 and part.content == data[10:20]
+    assert part.headers["content-range"] == "bytes 10-19/100"
+
+    assert client.get("/uploads/zz/9/yy/range.txt", headers={"Range": "bytes=100-"}).status_code == 416
+    assert client.get("/uploads/zz/9/yy/missing.txt").status_code == 404
@@ -125,20 +125,27 @@ function ReceiptUpload({ token, onUploaded }) {
 
 function ReceiptsList({ token }) {
   const [list, setList] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [details, setDetails] = useState({});  // receipt id -> full receipt (OCR text), fetched on demand
   const [loading, setLoading] = useState(false);
 
-  async function load() {
+  async function getJson(url) {
+    const res = await fetch(url, { headers: { Authorization: "Bearer " + token } });
+    if (!res.ok) {
+      const err = await res.json().catch(()=>({detail:res.statusText}));
+      throw new Error(err.detail || res.statusText);
+    }
+    return res.json();
+  }
+
+  // cursor: next_cursor of the last page to append the next one, null to reload from the top
+  async function load(cursor = null) {
     setLoading(true);
     try {
-      const res = await fetch(`${BASE_URL}/receipts`, {
-        headers: { Authorization: "Bearer " + token },
-      });
-      if (!res.ok) {
-        const err = await res.json().catch(()=>({detail:res.statusText}));
-        throw new Error(err.detail || res.statusText);
-      }
-      const data = await res.json();
-      setList(data);
+      const data = await getJson(`${BASE_URL}/receipts?limit=20${cursor ? `&cursor=${cursor}` : ""}`);
+      setList(prev => cursor ? [...prev, ...data.items] : data.items);
+      setNextCursor(data.next_cursor);
+      if (!cursor) setDetails({});
     } catch (err) {
       alert("Could not load receipts: " + err.message);
     } finally {
@@ -146,6 +153,19 @@ function ReceiptsList({ token }) {
     }
   }
 
+  async function toggleDetails(id) {
+    if (details[id]) {
+      setDetails(prev => { const next = {...prev}; delete next[id]; return next; });
+      return;
+    }
+    try {
+      const full = await getJson(`${BASE_URL}/receipts/${id}`);
+      setDetails(prev => ({...prev, [id]: full}));
+    } catch (err) {
+      alert("Could not load receipt: " + err.message);
+    }
+  }
+
   useEffect(()=> {
     if (token) load();
   }, [token]);
@@ -156,7 +176,7 @@ function ReceiptsList({ token }) {
     <div className="card">
       <div style={{display:"flex",justifyContent:"space-between",alignItems:"center"}}>
         <h3>Receipts</h3>
-        <button className="btn-ghost" onClick={load}>{loading ? "Refreshing..." : "Refresh"}</button>
+        <button className="btn-ghost" onClick={()=>load()}>{loading ? "Refreshing..." : "Refresh"}</button>
       </div>
 
       {list.length === 0 && <div className="small">No receipts yet.</div>}
@@ -164,9 +184,16 @@ function ReceiptsList({ token }) {
       {list.map(r => (
         <div key={r.id} className="receipt">
           <div style={{display:"flex",justifyContent:"space-between",alignItems:"center"}}>
-            <div>
-              <strong>Receipt #{r.id}</strong>
-              <div className="small">Uploaded: {new Date(r.uploaded_at).toLocaleString()}</div>
+            <div style={{display:"flex",gap:12,alignItems:"center"}}>
+              {r.thumbnail_url && (
+                <a href={`${BASE_URL.replace("/api/v1","")}/${r.preview_url}`} target="_blank" rel="noreferrer">
+                  <img src={`${BASE_URL.replace("/api/v1","")}/${r.thumbnail_url}`} alt={`Receipt #${r.id}`} loading="lazy" style={{maxWidth:80,maxHeight:80,borderRadius:4}} />
+                </a>
+              )}
+              <div>
+                <strong>Receipt #{r.id}</strong>
+                <div className="small">Uploaded: {new Date(r.uploaded_at).toLocaleString()}</div>
+              </div>
             </div>
             <div style={{display:"flex",gap:8}}>
               <a className="btn-ghost" href={`${BASE_URL.replace("/api/v1","")}/${r.file_path}`} target="_blank" rel="noreferrer">Open file</a>
@@ -175,16 +202,30 @@ function ReceiptsList({ token }) {
           </div>
 
           <div style={{marginTop:8}}>
-            <div><strong>Merchant:</strong> {safeGet(r.parsed_json, "merchant") ?? "—"}</div>
-            <div><strong>Total:</strong> {safeGet(r.parsed_json, "total") ?? "—"}</div>
-            <div className="small" style={{marginTop:6}}><strong>Raw OCR text:</strong></div>
-            <div className="json-box">{r.raw_text || "(empty - OCR may still be running)"}</div>
+            <div><strong>Merchant:</strong> {r.merchant ?? "—"}</div>
+            <div><strong>Total:</strong> {r.total ?? "—"}</div>
+            <div className="small"><strong>OCR:</strong> {r.status === "pending" ? "running..." : r.status}</div>
+            <button className="btn-ghost" style={{marginTop:6}} onClick={()=>toggleDetails(r.id)}>
+              {details[r.id] ? "Hide OCR text" : "Show OCR text"}
+            </button>
+            {details[r.id] && (
+              <>
+                <div className="small" style={{marginTop:6}}><strong>Raw OCR text:</strong></div>
+                <div className="json-box">{details[r.id].raw_text || "(empty - OCR may still be running)"}</div>
 
-            <div className="small" style={{marginTop:8}}><strong>Parsed JSON:</strong></div>
-            <div className="json-box">{prettyJson(r.parsed_json)}</div>
+                <div className="small" style={{marginTop:8}}><strong>Parsed JSON:</strong></div>
+                <div className="json-box">{prettyJson(details[r.id].parsed_json)}</div>
+              </>
+            )}
           </div>
         </div>
       ))}
+
+      {nextCursor && (
+        <button className="btn-ghost" onClick={()=>load(nextCursor)} disabled={loading}>
+          {loading ? "Loading..." : "Load more"}
+        </button>
+      )}
     </div>
   );
 }
@@ -198,15 +239,6 @@ function prettyJson(maybe) {
     return String(maybe);
   }
 }
-function safeGet(parsed_json, key) {
-  if (!parsed_json) return null;
-  try {
-    const obj = typeof parsed_json === "string" ? JSON.parse(parsed_json) : parsed_json;
-    return obj[key];
-  } catch {
-    return null;
-  }
-}
 
 export default function App(){
   const [token, setToken] = useAuthToken();